@@ -0,0 +1,3 @@
+from sekai.bench.runner import main
+
+main()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from sonolus.build.engine import package_engine, unpackage_data
+from sonolus.script.project import BuildConfig
+
+MODES = ("play", "watch", "preview", "tutorial")
+
+# Callbacks that run every frame, where growth costs the most.
+HOT_CALLBACKS = frozenset({"updateSequential", "updateParallel", "touch", "updateSpawn", "update"})
+
+# Minimal passes leave too many temporaries for this engine to allocate, so they are not offered.
+PASSES = {
+    "1": BuildConfig.FAST_PASSES,
+    "2": BuildConfig.STANDARD_PASSES,
+}
+
+
+class NodeStats:
+    """Size statistics for every root in a compiled node table.
+
+    Nodes are stored after their arguments, so a single forward pass computes each statistic bottom-up.
+    """
+
+    nodes: list[dict]
+    depths: list[int]
+    instructions: list[int]
+
+    def __init__(self, nodes: list[dict]):
+        self.nodes = nodes
+        self.depths = []
+        self.instructions = []
+        for node in nodes:
+            args = node.get("args")
+            if args is None:
+                self.depths.append(1)
+                self.instructions.append(0)
+            else:
+                self.depths.append(1 + max((self.depths[i] for i in args), default=0))
+                self.instructions.append(1 + sum(self.instructions[i] for i in args))
+
+    def node_count(self, root: int) -> int:
+        seen = {root}
+        stack = [root]
+        while stack:
+            for arg in self.nodes[stack.pop()].get("args", ()):
+                if arg not in seen:
+                    seen.add(arg)
+                    stack.append(arg)
+        return len(seen)
+
+    def summarize(self, root: int) -> dict[str, int]:
+        """Summarize the callback rooted at the given node.
+
+        ``nodes`` counts distinct nodes, ``depth`` is the longest chain of nested calls, and ``instructions``
+        counts function evaluations with shared subtrees expanded, which is an upper bound on the work done by a
+        single run of the callback.
+        """
+        return {
+            "nodes": self.node_count(root),
+            "depth": self.depths[root],
+            "instructions": self.instructions[root],
+        }
+
+
+def summarize_mode(data: dict) -> dict:
+    stats = NodeStats(data["nodes"])
+    archetypes = {}
+    first_by_callbacks = {}
+    for archetype in data.get("archetypes", []):
+        callbacks = {
+            name: value["index"] for name, value in archetype.items() if isinstance(value, dict) and "index" in value
+        }
+        key = tuple(sorted(callbacks.items()))
+        if key in first_by_callbacks:
+            # Derived archetypes share the compiled callbacks of their base.
+            archetypes[archetype["name"]] = {"shared_with": first_by_callbacks[key]}
+            continue
+        first_by_callbacks[key] = archetype["name"]
+        archetypes[archetype["name"]] = {name: stats.summarize(index) for name, index in callbacks.items()}
+    global_callbacks = {name: stats.summarize(index) for name, index in data.items() if isinstance(index, int)}
+    return {
+        "total_nodes": len(data["nodes"]),
+        "archetypes": archetypes,
+        "callbacks": global_callbacks,
+    }
+
+
+def build_report(passes_level: str = "2") -> dict:
+    from sekai.project import engine
+
+    packaged = package_engine(engine.data, BuildConfig(passes=PASSES[passes_level]))
+    mode_data = {
+        "play": packaged.play_data,
+        "watch": packaged.watch_data,
+        "preview": packaged.preview_data,
+        "tutorial": packaged.tutorial_data,
+    }
+    return {
+        "optimization": passes_level,
+        "modes": {mode: summarize_mode(unpackage_data(mode_data[mode])) for mode in MODES},
+    }
+
+
+def iter_callbacks(report: dict):
+    for mode, mode_report in report["modes"].items():
+        for archetype, callbacks in mode_report["archetypes"].items():
+            if "shared_with" in callbacks:
+                continue
+            for callback, summary in callbacks.items():
+                yield (mode, archetype, callback), summary
+        for callback, summary in mode_report["callbacks"].items():
+            yield (mode, "<global>", callback), summary
+
+
+def diff_reports(baseline: dict, current: dict, threshold: float) -> tuple[list[list[str]], bool]:
+    """Compare two reports and return table rows for changed callbacks and whether a hot callback regressed.
+
+    A hot callback regresses when its instruction count grows by more than ``threshold`` (a fraction).
+    """
+    baseline_callbacks = dict(iter_callbacks(baseline))
+    current_callbacks = dict(iter_callbacks(current))
+    rows = []
+    regressed = False
+    for key in sorted(baseline_callbacks.keys() | current_callbacks.keys()):
+        before = baseline_callbacks.get(key, {"nodes": 0, "depth": 0, "instructions": 0})
+        after = current_callbacks.get(key, {"nodes": 0, "depth": 0, "instructions": 0})
+        if before == after:
+            continue
+        mode, archetype, callback = key
+        is_hot = callback in HOT_CALLBACKS
+        growth = after["instructions"] - before["instructions"]
+        is_regression = is_hot and growth > threshold * max(before["instructions"], 1)
+        regressed |= is_regression
+        rows.append(
+            [
+                "!" if is_regression else ("*" if is_hot else ""),
+                mode,
+                archetype,
+                callback,
+                f"{before['nodes']} -> {after['nodes']}",
+                f"{before['depth']} -> {after['depth']}",
+                f"{before['instructions']} -> {after['instructions']} ({growth:+d})",
+            ]
+        )
+    return rows, regressed
+
+
+def print_table(rows: list[list[str]]) -> None:
+    if not rows:
+        return
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+
+
+def print_summary(report: dict) -> None:
+    rows = [["mode", "archetype", "callback", "nodes", "depth", "instructions"]]
+    for (mode, archetype, callback), summary in sorted(
+        iter_callbacks(report), key=lambda item: item[1]["instructions"], reverse=True
+    ):
+        rows.append(
+            [mode, archetype, callback, str(summary["nodes"]), str(summary["depth"]), str(summary["instructions"])]
+        )
+    print_table(rows)
+    print()
+    for mode, mode_report in report["modes"].items():
+        print(f"{mode}: {mode_report['total_nodes']} nodes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report compiled engine size per mode, archetype and callback.")
+    parser.add_argument("-O", dest="optimization", choices=list(PASSES), default="2", help="Optimization level.")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previously saved report.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="Allowed relative instruction growth of per-frame callbacks before failing (default: 0.05).",
+    )
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10_000)
+    report = build_report(args.optimization)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline is None:
+        print_summary(report)
+        return
+
+    rows, regressed = diff_reports(json.loads(args.baseline.read_text()), report, args.threshold)
+    if rows:
+        print_table([["", "mode", "archetype", "callback", "nodes", "depth", "instructions"], *rows])
+    else:
+        print("No changes from baseline.")
+    if regressed:
+        print(f"\nPer-frame callbacks (!) grew by more than {args.threshold:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
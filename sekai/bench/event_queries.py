@@ -0,0 +1,106 @@
+"""Randomized check of event list queries resumed from a cursor.
+
+``init_event_list`` and ``query_event_list`` run unmodified in plain Python under sonolus.py's simulation context, on
+event lists with duplicate keys. Every query of a random sequence of forward steps, seeks and exact-key lookups is made
+both from a cursor and from the head of the list, and both results must match the last event at or before the key
+found by bisecting the sorted keys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from bisect import bisect_right
+from typing import Any
+
+from sonolus.script.archetype import EntityRef, PlayArchetype, entity_data
+from sonolus.script.debug import simulation_context
+
+from sekai.lib.baseevent import BaseEvent, init_event_list, query_event_list
+
+CASES = 200
+QUERIES = 200
+
+_entities: dict[int, SimEvent] = {}
+
+
+class SimEvent(PlayArchetype, BaseEvent):
+    name = "SimEvent"
+
+    event_time: float = entity_data()
+    next_ref: EntityRef[SimEvent] = entity_data()
+
+    @classmethod
+    def at(cls, index: int, check: bool = True) -> SimEvent:
+        return _entities[index]
+
+
+def generate_keys(rng: random.Random) -> list[float]:
+    # A coarse grid, so that runs of events share a key.
+    return sorted(rng.randrange(64) / 4 for _ in range(rng.choice((0, 1, 2, rng.randint(3, 300)))))
+
+
+def generate_queries(rng: random.Random, keys: list[float]) -> list[float]:
+    queries = []
+    key = rng.uniform(-1, 17)
+    for _ in range(QUERIES):
+        action = rng.random()
+        if action < 0.5:
+            key += rng.choice((0.0, rng.uniform(0, 0.5), rng.uniform(0, 4)))
+        elif action < 0.7:
+            key = rng.uniform(-1, 17)
+        elif action < 0.9 and keys:
+            key = rng.choice(keys)
+        else:
+            key -= rng.uniform(0, 2)
+        queries.append(key)
+    return queries
+
+
+def expected_result(keys: list[float], key: float) -> tuple[int, int]:
+    # Events are numbered from 1 in key order, so the last event at or before the key is its position.
+    position = bisect_right(keys, key)
+    return position, position + 1 if position < len(keys) else 0
+
+
+def run_case(seed: int) -> bool:
+    rng = random.Random(seed)
+    keys = generate_keys(rng)
+    queries = generate_queries(rng, keys)
+    with simulation_context():
+        _entities.clear()
+        for i, key in enumerate(keys, start=1):
+            _entities[i] = SimEvent(event_time=key)
+        for i in range(1, len(keys)):
+            _entities[i].next_ref = EntityRef[SimEvent](index=i + 1)
+        first_ref = EntityRef[SimEvent](index=1 if keys else 0)
+        init_event_list(first_ref)
+        cursor = EntityRef[Any](index=0)
+        for key in queries:
+            expected = expected_result(keys, key)
+            a, b = query_event_list(first_ref, key, lambda e: e.event_time, cursor)
+            head_a, head_b = query_event_list(first_ref, key, lambda e: e.event_time)
+            if (a.index, b.index) != expected or (head_a.index, head_b.index) != expected or cursor.index != a.index:
+                return False
+    return True
+
+
+def run(cases: int = CASES, seed: int = 0) -> dict:
+    mismatches = [case_seed for case_seed in range(seed, seed + cases) if not run_case(case_seed)]
+    return {"cases": cases, "queries": cases * QUERIES, "seed": seed, "mismatched_seeds": mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check event list queries from a cursor against the skip list.")
+    parser.add_argument("--cases", type=int, default=CASES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = run(args.cases, args.seed)
+    print(json.dumps(result))
+    if result["mismatched_seeds"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
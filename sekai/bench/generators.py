@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import itertools
+import random
+from dataclasses import dataclass
+
+from sonolus.script.level import ExternalEntityData, ExternalLevelData
+from sonolus.script.timing import TimescaleEase
+
+from sekai.level_utils import (
+    LevelBpmChange,
+    LevelCameraChange,
+    LevelEntities,
+    LevelNote,
+    LevelSlide,
+    LevelStage,
+    LevelStageMaskChange,
+    LevelStagePivotChange,
+    LevelStageStyleChange,
+    LevelTimescaleChange,
+    LevelTimescaleGroup,
+)
+from sekai.lib.connector import ConnectorKind
+from sekai.lib.note import NoteKind
+from sekai.lib.stage import DivisionParity, JudgeLineColor, StageBorderStyle
+
+# Notes and guides are spread over this many beats per thousand, so density stays constant as charts grow.
+BEATS_PER_THOUSAND_NOTES = 250
+
+TAP_KINDS = (
+    NoteKind.NORM_TAP,
+    NoteKind.CRIT_TAP,
+    NoteKind.NORM_FLICK,
+    NoteKind.CRIT_FLICK,
+    NoteKind.NORM_TRACE,
+    NoteKind.CRIT_TRACE,
+)
+
+EXTENDED_TAP_ARCHETYPES = (
+    "NormalTapNote",
+    "CriticalTapNote",
+    "NormalFlickNote",
+    "CriticalFlickNote",
+    "NormalTraceNote",
+    "CriticalTraceNote",
+)
+
+
+@dataclass
+class ChartShape:
+    """The size of a synthetic chart along each axis that affects build and conversion time."""
+
+    note_count: int = 1000
+    slide_count: int = 100
+    slide_length: int = 8
+    guide_count: int = 100
+    timescale_group_count: int = 4
+    timescale_change_count: int = 16
+    stage_count: int = 2
+    stage_event_count: int = 64
+    seed: int = 0
+
+    @property
+    def beat_span(self) -> float:
+        entity_count = self.note_count + self.slide_count * self.slide_length + self.guide_count
+        return max(16.0, entity_count * BEATS_PER_THOUSAND_NOTES / 1000)
+
+
+def _random_beat(rng: random.Random, shape: ChartShape) -> float:
+    # Quarter-beat grid so that notes regularly share beats with each other.
+    return rng.randrange(int(shape.beat_span * 4)) / 4
+
+
+def generate_timescale_groups(rng: random.Random, shape: ChartShape) -> list[LevelTimescaleGroup]:
+    groups = []
+    for _ in range(shape.timescale_group_count):
+        changes = [LevelTimescaleChange(beat=0.0, timescale=1.0)]
+        changes.extend(
+            LevelTimescaleChange(
+                beat=_random_beat(rng, shape),
+                timescale=rng.choice((0.5, 1.0, 2.0, -1.0)),
+                timescale_ease=rng.choice((TimescaleEase.NONE, TimescaleEase.LINEAR)),
+            )
+            for _ in range(shape.timescale_change_count - 1)
+        )
+        groups.append(LevelTimescaleGroup(changes=changes))
+    return groups
+
+
+def generate_stages(rng: random.Random, shape: ChartShape) -> list[LevelStage]:
+    stages = []
+    for i in range(shape.stage_count):
+        stage = LevelStage(from_start=i == 0, until_end=i == 0)
+        for _ in range(shape.stage_event_count // 3):
+            stage.mask_changes.append(
+                LevelStageMaskChange(beat=_random_beat(rng, shape), lane=rng.randint(-3, 3), size=rng.randint(3, 6))
+            )
+            stage.pivot_changes.append(
+                LevelStagePivotChange(
+                    beat=_random_beat(rng, shape),
+                    lane=rng.randint(-3, 3),
+                    division_size=rng.choice((1.0, 2.0)),
+                    division_parity=DivisionParity.EVEN,
+                    abs_y_offset=0.0,
+                    y_beat_offset=0.0,
+                )
+            )
+            stage.style_changes.append(
+                LevelStageStyleChange(
+                    beat=_random_beat(rng, shape),
+                    judge_line_color=JudgeLineColor.NEUTRAL,
+                    left_border_style=StageBorderStyle.DEFAULT,
+                    right_border_style=StageBorderStyle.DEFAULT,
+                    alpha=1.0,
+                    lane_alpha=1.0,
+                    judge_line_alpha=1.0,
+                )
+            )
+        stages.append(stage)
+    return stages
+
+
+def generate_level_entities(shape: ChartShape) -> list[LevelEntities]:
+    """Generate the entities of a synthetic chart for ``build_level``."""
+    rng = random.Random(shape.seed)
+    groups = generate_timescale_groups(rng, shape)
+    stages = generate_stages(rng, shape)
+    entities: list[LevelEntities] = [LevelBpmChange(beat=0.0, bpm=120.0), *groups, *stages]
+    entities.extend(
+        LevelCameraChange(beat=_random_beat(rng, shape), lane=rng.randint(-2, 2))
+        for _ in range(shape.stage_event_count // 4)
+    )
+
+    def pick_group() -> LevelTimescaleGroup | None:
+        return rng.choice(groups) if groups else None
+
+    def pick_stage() -> LevelStage | None:
+        return rng.choice(stages) if stages else None
+
+    entities.extend(
+        LevelNote(
+            beat=_random_beat(rng, shape),
+            lane=rng.randint(-5, 5),
+            size=rng.choice((1.0, 1.5, 2.0)),
+            kind=rng.choice(TAP_KINDS),
+            timescale_group=pick_group(),
+            stage=pick_stage(),
+        )
+        for _ in range(shape.note_count)
+    )
+    for _ in range(shape.slide_count):
+        is_critical = rng.random() < 0.25
+        segment_kind = ConnectorKind.ACTIVE_CRITICAL if is_critical else ConnectorKind.ACTIVE_NORMAL
+        start_beat = _random_beat(rng, shape)
+        length = max(2, shape.slide_length)
+        slide = LevelSlide()
+        for i in range(length):
+            if i == 0:
+                kind = NoteKind.CRIT_HEAD_TAP if is_critical else NoteKind.NORM_HEAD_TAP
+            elif i == length - 1:
+                kind = NoteKind.CRIT_TAIL_RELEASE if is_critical else NoteKind.NORM_TAIL_RELEASE
+            else:
+                kind = NoteKind.CRIT_TICK if is_critical else NoteKind.NORM_TICK
+            slide.notes.append(
+                LevelNote(
+                    beat=start_beat + i / 2,
+                    lane=rng.randint(-5, 5),
+                    size=1.0,
+                    kind=kind,
+                    timescale_group=pick_group(),
+                    segment_kind=segment_kind,
+                    is_separator=0 < i < length - 1 and rng.random() < 0.1,
+                )
+            )
+        entities.append(slide)
+        entities.append(
+            LevelNote(
+                beat=start_beat + rng.uniform(0, (length - 1) / 2),
+                lane=0.0,
+                size=1.0,
+                kind=NoteKind.CRIT_TICK if is_critical else NoteKind.NORM_TICK,
+                timescale_group=pick_group(),
+                attach=slide,
+            )
+        )
+    return entities
+
+
+def generate_extended_level_data(shape: ChartShape) -> ExternalLevelData:
+    """Generate a synthetic chart in the chcy-extended format for ``convert_extended_level_data``."""
+    rng = random.Random(shape.seed)
+    entities = [
+        ExternalEntityData("Initialization", {}),
+        ExternalEntityData("#BPM_CHANGE", {"#BEAT": 0.0, "#BPM": 120.0}),
+    ]
+
+    def add(archetype: str, data: dict) -> int:
+        entities.append(ExternalEntityData(archetype, data))
+        return len(entities) - 1
+
+    group_indices = []
+    for _ in range(max(1, shape.timescale_group_count)):
+        group_index = add("TimeScaleGroup", {})
+        group_indices.append(group_index)
+        beats = sorted(_random_beat(rng, shape) for _ in range(shape.timescale_change_count - 1))
+        previous_index = None
+        for beat in [0.0, *beats]:
+            change_index = add("TimeScaleChange", {"#BEAT": beat, "timeScale": rng.choice((0.5, 1.0, 2.0))})
+            if previous_index is None:
+                entities[group_index].data["first"] = change_index
+            else:
+                entities[previous_index].data["next"] = change_index
+            previous_index = change_index
+
+    note_indices = [
+        add(
+            rng.choice(EXTENDED_TAP_ARCHETYPES),
+            {
+                "#BEAT": _random_beat(rng, shape),
+                "lane": rng.randint(-5, 5),
+                "size": rng.choice((1.0, 1.5, 2.0)),
+                "timeScaleGroup": rng.choice(group_indices),
+            },
+        )
+        for _ in range(shape.note_count)
+    ]
+    for _ in range(shape.slide_count):
+        prefix = "Critical" if rng.random() < 0.25 else "Normal"
+        start_beat = _random_beat(rng, shape)
+        length = max(2, shape.slide_length)
+        slide_indices = []
+        for i in range(length):
+            if i == 0:
+                archetype = f"{prefix}SlideStartNote"
+            elif i == length - 1:
+                archetype = f"{prefix}SlideEndNote"
+            else:
+                archetype = f"{prefix}SlideTickNote"
+            slide_indices.append(
+                add(
+                    archetype,
+                    {
+                        "#BEAT": start_beat + i / 2,
+                        "lane": rng.randint(-5, 5),
+                        "size": 1.0,
+                        "timeScaleGroup": rng.choice(group_indices),
+                    },
+                )
+            )
+        connector_indices = [
+            add(
+                f"{prefix}SlideConnector",
+                {"head": head, "tail": tail, "start": slide_indices[0], "end": slide_indices[-1], "ease": 0},
+            )
+            for head, tail in itertools.pairwise(slide_indices)
+        ]
+        for note_index in slide_indices:
+            entities[note_index].data["slide"] = connector_indices[0]
+        add(
+            f"{prefix}AttachedSlideTickNote",
+            {
+                "#BEAT": start_beat + rng.uniform(0, (length - 1) / 2),
+                "timeScaleGroup": rng.choice(group_indices),
+                "attach": rng.choice(connector_indices),
+                "slide": connector_indices[0],
+            },
+        )
+    for _ in range(min(len(note_indices) // 2, shape.note_count // 10)):
+        left, right = rng.sample(note_indices, 2)
+        add("SimLine", {"a": left, "b": right})
+
+    # A small pool of endpoints so that many guides share the same anchor positions.
+    points = [
+        (_random_beat(rng, shape), rng.randint(-12, 12) / 2, rng.choice((1.0, 1.5, 2.0)), rng.choice(group_indices))
+        for _ in range(max(2, shape.guide_count // 4))
+    ]
+    for _ in range(shape.guide_count):
+        start, end = sorted(rng.sample(points, 2))
+        data = {"ease": rng.choice((-2, -1, 0, 1, 2)), "fade": rng.choice((0, 1, 2)), "color": rng.randint(0, 7)}
+        for name, (beat, lane, size, group_index) in (("start", start), ("head", start), ("tail", end), ("end", end)):
+            data[f"{name}Beat"] = beat
+            data[f"{name}Lane"] = lane
+            data[f"{name}Size"] = size
+            data[f"{name}TimeScaleGroup"] = group_index
+        add("Guide", data)
+
+    return ExternalLevelData(bgm_offset=0.0, entities=entities)
@@ -0,0 +1,52 @@
+import argparse
+import json
+import time
+
+from sonolus.script.level import ExternalLevelData
+
+from sekai.bench.generators import ChartShape, generate_extended_level_data
+from sekai.lib.converter import convert_extended_level_data
+from sekai.play.note import AnchorNote
+
+GUIDE_COUNT = 50_000
+
+
+def generate_guide_level(guide_count: int = GUIDE_COUNT, seed: int = 0) -> ExternalLevelData:
+    """Generate chcy-extended level data made of guides with many coincident endpoints."""
+    return generate_extended_level_data(
+        ChartShape(
+            note_count=0,
+            slide_count=0,
+            guide_count=guide_count,
+            timescale_group_count=1,
+            timescale_change_count=1,
+            stage_count=0,
+            stage_event_count=0,
+            seed=seed,
+        )
+    )
+
+
+def run(guide_count: int = GUIDE_COUNT, seed: int = 0) -> dict:
+    data = generate_guide_level(guide_count, seed)
+    start = time.perf_counter()
+    level_data = convert_extended_level_data(data)
+    elapsed = time.perf_counter() - start
+    return {
+        "guides": guide_count,
+        "entities": len(level_data.entities),
+        "anchors": sum(isinstance(e, AnchorNote) for e in level_data.entities),
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chcy-extended guide conversion.")
+    parser.add_argument("--guides", type=int, default=GUIDE_COUNT)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.guides, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Randomized equivalence check of play input assignment against the original full-scan assignment.
+
+The engine's ``preassign_taps`` and ``preassign_releases`` run unmodified in plain Python under sonolus.py's
+simulation context, with touches, the screen and the current time replaced by generated values and notes looked up
+from generated records. The reference functions are the assignment loops as they were before the screen strip index
+and preference carry-over, and every note capture and input lockout they produce must match.
+"""
+
+import argparse
+import json
+import random
+from collections.abc import Callable
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from sonolus.script.archetype import EntityRef
+from sonolus.script.array import Array, Dim
+from sonolus.script.debug import simulation_context
+from sonolus.script.interval import Interval
+from sonolus.script.quad import Quad, Rect
+from sonolus.script.runtime import screen, time, touches
+from sonolus.script.vec import Vec2
+
+from sekai.lib.buckets import SLIDE_END_LOCKOUT_DURATION
+from sekai.lib.layout import DynamicLayout, HitboxTarget, segment_closeness_score
+from sekai.lib.note import NoteKind, is_head
+from sekai.play import input_manager, note
+from sekai.play.input_manager import (
+    INPUT_SCORE_TIME_SCALE,
+    INPUT_SLOTS,
+    InputState,
+    disallow_empty,
+    disallow_release,
+    is_allowed_release,
+)
+
+CASES = 500
+CURRENT_TIME = 10.0
+SCREEN_HALF_WIDTH = 1.8
+
+
+def reference_preassign_taps():
+    active = note.NoteMemory.active_tap_input_notes
+    active.sort(key=lambda ref: ref.get().target_time)
+
+    input_assigned = +Array[bool, Dim[INPUT_SLOTS]]
+    for i in range(INPUT_SLOTS):
+        if i >= len(touches()) or not touches()[i].started:
+            input_assigned[i] = True
+
+    scores = +Array[float, Dim[INPUT_SLOTS]]
+    preferred = +Array[int, Dim[INPUT_SLOTS]]
+
+    for _ in range(INPUT_SLOTS):
+        for i in range(INPUT_SLOTS):
+            scores[i] = 0.0
+            preferred[i] = -1
+
+        for i in range(INPUT_SLOTS):
+            if input_assigned[i]:
+                continue
+            touch = touches()[i]
+            for note_i in range(len(active)):
+                target_note = active[note_i].get()
+                if target_note.captured_touch_id != 0:
+                    continue
+                if not target_note.hitbox.bounds.contains_point(touch.position):
+                    continue
+                if touch.time not in target_note.unadjusted_input_interval:
+                    continue
+                score = (
+                    segment_closeness_score(touch.position, target_note.hitbox.target) / DynamicLayout.w_scale
+                    + (time() - target_note.target_time) / INPUT_SCORE_TIME_SCALE
+                )
+                if preferred[i] == -1 or score > scores[i]:
+                    scores[i] = score
+                    preferred[i] = note_i
+
+        if not assign_preferred(active, input_assigned, scores, preferred, is_release=False):
+            break
+
+
+def reference_preassign_releases():
+    active = note.NoteMemory.active_release_input_notes
+    active.sort(key=lambda ref: ref.get().target_time)
+
+    input_assigned = +Array[bool, Dim[INPUT_SLOTS]]
+    for i in range(INPUT_SLOTS):
+        if i >= len(touches()) or not touches()[i].ended:
+            input_assigned[i] = True
+
+    scores = +Array[float, Dim[INPUT_SLOTS]]
+    preferred = +Array[int, Dim[INPUT_SLOTS]]
+
+    for _ in range(INPUT_SLOTS):
+        for i in range(INPUT_SLOTS):
+            scores[i] = 0.0
+            preferred[i] = -1
+
+        for i in range(INPUT_SLOTS):
+            if input_assigned[i]:
+                continue
+            touch = touches()[i]
+            for note_i in range(len(active)):
+                target_note = active[note_i].get()
+                if target_note.captured_touch_id != 0:
+                    continue
+                if not target_note.hitbox.bounds.contains_point(touch.position):
+                    continue
+                if touch.time not in target_note.unadjusted_input_interval:
+                    continue
+                ignore_lockout = False
+                if target_note.active_head_ref.index > 0:
+                    head_bounds = target_note.active_head_ref.get().active_connector_info.input_bounds
+                    ongoing = False
+                    for t in touches():
+                        if not t.ended and head_bounds.contains_point(t.position):
+                            ongoing = True
+                            break
+                    ignore_lockout = not ongoing
+                if not ignore_lockout and not is_allowed_release(touch, target_note.target_time):
+                    continue
+                score = (
+                    segment_closeness_score(touch.position, target_note.hitbox.target) / DynamicLayout.w_scale
+                    + (time() - target_note.target_time) / INPUT_SCORE_TIME_SCALE
+                )
+                if preferred[i] == -1 or score > scores[i]:
+                    scores[i] = score
+                    preferred[i] = note_i
+
+        if not assign_preferred(active, input_assigned, scores, preferred, is_release=True):
+            break
+
+
+def assign_preferred(active, input_assigned, scores, preferred, is_release: bool) -> bool:
+    any_assigned = False
+    for i in range(INPUT_SLOTS):
+        note_i = preferred[i]
+        if note_i < 0:
+            continue
+        is_best = True
+        for j in range(INPUT_SLOTS):
+            if j == i or preferred[j] != note_i:
+                continue
+            if scores[j] > scores[i] or (scores[j] == scores[i] and j < i):
+                is_best = False
+                break
+        if not is_best:
+            continue
+        target_note = active[note_i].get()
+        touch = touches()[i]
+        disallow_empty(touch)
+        if is_release:
+            target_note.captured_touch_time = touch.time
+        else:
+            if not is_head(target_note.kind):
+                disallow_release(touch, target_note.target_time + SLIDE_END_LOCKOUT_DURATION)
+            target_note.captured_touch_time = min(touch.time, touch.start_time)
+        target_note.captured_touch_id = touch.id
+        input_assigned[i] = True
+        any_assigned = True
+    return any_assigned
+
+
+def random_quad(rng: random.Random, x: float, half_width: float) -> Quad:
+    skew = rng.uniform(-0.3, 0.3)
+    return Quad(
+        bl=Vec2(x - half_width, -1),
+        tl=Vec2(x - half_width * 0.6 + skew, 0.6),
+        tr=Vec2(x + half_width * 0.6 + skew, 0.6),
+        br=Vec2(x + half_width, -1),
+    )
+
+
+def generate_case(seed: int) -> dict:
+    """Generate notes, touches and existing release lockouts for one frame of input."""
+    rng = random.Random(seed)
+    kinds = list(NoteKind)
+    # Crowded frames put every note in a few strips, so buckets overflow and assignment falls back to a full scan.
+    crowded = rng.random() < 0.1
+    note_count = rng.randint(40, 80) if crowded else rng.randint(0, 24)
+    notes = []
+    heads = []
+    for _ in range(note_count):
+        if notes and rng.random() < 0.1:
+            # Duplicates tie on score, which exercises tie breaking by touch slot and candidate order.
+            notes.append(dict(notes[rng.randrange(len(notes))]))
+            continue
+        x = rng.uniform(-0.3, 0.3) if crowded else rng.uniform(-SCREEN_HALF_WIDTH, SCREEN_HALF_WIDTH)
+        half_width = rng.uniform(0.05, 0.6)
+        target_time = CURRENT_TIME + rng.uniform(-0.15, 0.15)
+        head = 0
+        if rng.random() < 0.4:
+            heads.append(random_quad(rng, rng.uniform(-SCREEN_HALF_WIDTH, SCREEN_HALF_WIDTH), rng.uniform(0.1, 0.8)))
+            head = len(heads)
+        notes.append(
+            {
+                "x": x,
+                "half_width": half_width,
+                "bounds": random_quad(rng, x, half_width),
+                "target_time": target_time,
+                "kind": rng.choice(kinds),
+                "captured_touch_id": rng.randint(1, 100) if rng.random() < 0.1 else 0,
+                "head": head,
+            }
+        )
+    for i, data in enumerate(notes):
+        data["release_input"] = not is_head(data["kind"]) and i % 2 == 1
+    touch_list = []
+    for i in range(rng.randint(0, INPUT_SLOTS)):
+        state = rng.random()
+        touch_time = CURRENT_TIME + rng.uniform(-0.12, 0.12)
+        touch_list.append(
+            SimpleNamespace(
+                id=i + 1,
+                position=Vec2(rng.uniform(-SCREEN_HALF_WIDTH, SCREEN_HALF_WIDTH), rng.uniform(-1, 0.6)),
+                started=state < 0.4,
+                ended=0.4 <= state < 0.8,
+                time=touch_time,
+                start_time=touch_time - rng.uniform(0, 0.5) if state >= 0.4 else touch_time,
+            )
+        )
+    lockouts = {touch.id: CURRENT_TIME + rng.uniform(-0.2, 0.2) for touch in touch_list if rng.random() < 0.3}
+    return {"notes": notes, "heads": heads, "touches": touch_list, "lockouts": lockouts}
+
+
+def build_entities(case: dict) -> dict[int, SimpleNamespace]:
+    """Build the note records looked up by entity index; heads follow the notes."""
+    entities = {}
+    head_offset = len(case["notes"]) + 1
+    for i, head_bounds in enumerate(case["heads"]):
+        entities[head_offset + i] = SimpleNamespace(active_connector_info=SimpleNamespace(input_bounds=head_bounds))
+    for i, data in enumerate(case["notes"]):
+        entities[i + 1] = SimpleNamespace(
+            kind=data["kind"],
+            target_time=data["target_time"],
+            unadjusted_input_interval=Interval(data["target_time"] - 0.1, data["target_time"] + 0.1),
+            hitbox=SimpleNamespace(
+                bounds=data["bounds"],
+                target=HitboxTarget(
+                    l=Vec2(data["x"] - data["half_width"], -0.6), r=Vec2(data["x"] + data["half_width"], -0.6)
+                ),
+            ),
+            captured_touch_id=data["captured_touch_id"],
+            captured_touch_time=0.0,
+            active_head_ref=EntityRef[note.BaseNote](index=head_offset + data["head"] - 1 if data["head"] else 0),
+        )
+    return entities
+
+
+@contextmanager
+def entity_lookup(entities: dict[int, SimpleNamespace]):
+    original = note.BaseNote.__dict__.get("at")
+    note.BaseNote.at = classmethod(lambda cls, index, check=True: entities[index])
+    try:
+        yield
+    finally:
+        if original is None:
+            del note.BaseNote.at
+        else:
+            note.BaseNote.at = original
+
+
+def run_assignment(case: dict, preassign_taps: Callable[[], None], preassign_releases: Callable[[], None]) -> dict:
+    entities = build_entities(case)
+    area = Rect(l=-SCREEN_HALF_WIDTH, r=SCREEN_HALF_WIDTH, t=1, b=-1)
+    replacements = {
+        touches: lambda: case["touches"],
+        screen: lambda: area,
+        time: lambda: CURRENT_TIME,
+    }
+    with simulation_context() as ctx, entity_lookup(entities):
+        ctx.additional_replacements.update(replacements)
+        ctx._update_loaded_modules()
+        DynamicLayout.w_scale = 1.0
+        for touch_id, until_time in case["lockouts"].items():
+            InputState.disallowed_release_touches[touch_id] = until_time
+        for i, data in enumerate(case["notes"]):
+            ref = EntityRef[note.BaseNote](index=i + 1)
+            if data["release_input"]:
+                note.NoteMemory.active_release_input_notes.append(ref)
+            else:
+                note.NoteMemory.active_tap_input_notes.append(ref)
+        preassign_taps()
+        preassign_releases()
+        return {
+            "captures": [
+                (entity.captured_touch_id, entity.captured_touch_time)
+                for index, entity in sorted(entities.items())
+                if index <= len(case["notes"])
+            ],
+            "disallowed_empty": sorted(InputState.disallowed_empty_touches),
+            "disallowed_release": sorted(
+                (key, InputState.disallowed_release_touches[key]) for key in InputState.disallowed_release_touches
+            ),
+        }
+
+
+def run(cases: int = CASES, seed: int = 0) -> dict:
+    mismatches = []
+    for case_seed in range(seed, seed + cases):
+        case = generate_case(case_seed)
+        expected = run_assignment(case, reference_preassign_taps, reference_preassign_releases)
+        actual = run_assignment(case, input_manager.preassign_taps, input_manager.preassign_releases)
+        if actual != expected:
+            mismatches.append(case_seed)
+    return {"cases": cases, "seed": seed, "mismatched_seeds": mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check play input assignment against the full-scan reference.")
+    parser.add_argument("--cases", type=int, default=CASES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = run(args.cases, args.seed)
+    print(json.dumps(result))
+    if result["mismatched_seeds"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Golden comparison of the level data produced by ``build_level``.
+
+The serialized level data of ``sekai.test_level`` and of randomized levels is hashed and compared against the hashes in
+``level_golden.json``. The randomized levels only use the ``sekai.level_utils`` entity types, and favor the cases
+``build_level`` has to order consistently: chords, slide notes and attachments sharing beats, separators, connectors
+without a segment kind and notes without a timescale group.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+from pathlib import Path
+
+from sonolus.build.level import build_level_data
+
+from sekai.level_utils import (
+    LevelBpmChange,
+    LevelCameraChange,
+    LevelEntities,
+    LevelFeverChance,
+    LevelFeverStart,
+    LevelNote,
+    LevelSkill,
+    LevelSlide,
+    LevelStage,
+    LevelStageMaskChange,
+    LevelTimescaleChange,
+    LevelTimescaleGroup,
+    build_level,
+)
+from sekai.lib.connector import ConnectorKind
+from sekai.lib.layout import FlickDirection
+from sekai.lib.note import NoteKind
+
+GOLDEN_PATH = Path(__file__).with_name("level_golden.json")
+RANDOM_LEVELS = 20
+
+TAP_KINDS = (
+    NoteKind.NORM_TAP,
+    NoteKind.CRIT_TAP,
+    NoteKind.NORM_FLICK,
+    NoteKind.CRIT_FLICK,
+    NoteKind.NORM_TRACE,
+    NoteKind.CRIT_TRACE,
+    NoteKind.NORM_RELEASE,
+    NoteKind.DAMAGE,
+)
+SLIDE_KINDS = (
+    (NoteKind.NORM_HEAD_TAP, NoteKind.NORM_TICK, NoteKind.NORM_TAIL_RELEASE, ConnectorKind.ACTIVE_NORMAL),
+    (NoteKind.CRIT_HEAD_FLICK, NoteKind.CRIT_TICK, NoteKind.CRIT_TAIL_FLICK, ConnectorKind.ACTIVE_CRITICAL),
+    (NoteKind.ANCHOR, NoteKind.ANCHOR, NoteKind.ANCHOR, ConnectorKind.GUIDE_GREEN),
+)
+
+
+def generate_random_level(seed: int) -> list[LevelEntities]:
+    rng = random.Random(seed)
+
+    def beat() -> float:
+        # A coarse grid, so that notes regularly share beats.
+        return rng.randrange(64) / 2
+
+    groups = [
+        LevelTimescaleGroup(
+            changes=[
+                LevelTimescaleChange(beat=beat(), timescale=rng.choice((0.5, 1.0, 2.0)))
+                for _ in range(rng.randint(1, 4))
+            ]
+        )
+        for _ in range(rng.randint(0, 2))
+    ]
+    stages = [
+        LevelStage(
+            from_start=rng.random() < 0.5,
+            mask_changes=[
+                LevelStageMaskChange(beat=beat(), lane=rng.randint(-3, 3), size=rng.randint(3, 6)) for _ in range(3)
+            ],
+        )
+        for _ in range(rng.randint(0, 2))
+    ]
+
+    def pick_group() -> LevelTimescaleGroup | None:
+        return rng.choice([None, *groups])
+
+    def pick_stage() -> LevelStage | None:
+        return rng.choice([None, *stages])
+
+    entities: list[LevelEntities] = [LevelBpmChange(beat=0.0, bpm=rng.choice((60.0, 120.0, 150.0))), *groups, *stages]
+    entities.extend(LevelCameraChange(beat=beat(), lane=rng.randint(-2, 2)) for _ in range(rng.randint(0, 3)))
+    entities.extend(
+        LevelNote(
+            beat=beat(),
+            lane=rng.randint(-5, 5),
+            size=rng.choice((1.0, 1.5, 2.0)),
+            kind=rng.choice(TAP_KINDS),
+            timescale_group=pick_group(),
+            stage=pick_stage(),
+            direction=rng.choice(list(FlickDirection)),
+            is_fake=rng.random() < 0.1,
+        )
+        for _ in range(rng.randint(0, 40))
+    )
+
+    for _ in range(rng.randint(0, 6)):
+        head_kind, tick_kind, tail_kind, segment_kind = rng.choice(SLIDE_KINDS)
+        start = beat()
+        beats = sorted(start + rng.randrange(16) / 4 for _ in range(rng.randint(2, 10)))
+        beats[-1] = max(beats[-1], start + 0.25)
+        slide = LevelSlide()
+        for i, note_beat in enumerate(beats):
+            kind = head_kind if i == 0 else tail_kind if i == len(beats) - 1 else tick_kind
+            slide.notes.append(
+                LevelNote(
+                    beat=note_beat,
+                    lane=rng.randint(-5, 5),
+                    size=1.0,
+                    kind=kind,
+                    timescale_group=pick_group(),
+                    is_separator=rng.random() < 0.2,
+                    segment_kind=ConnectorKind.NONE if rng.random() < 0.1 else segment_kind,
+                )
+            )
+            if i == len(beats) - 1:
+                break
+            # Attached notes between this note and the next, some on the beat of this note.
+            slide.notes.extend(
+                LevelNote(
+                    beat=rng.choice((note_beat, rng.uniform(note_beat, beats[i + 1]))),
+                    lane=0.0,
+                    size=1.0,
+                    kind=tick_kind,
+                    segment_kind=segment_kind,
+                    is_separator=rng.random() < 0.2,
+                    attach=slide,
+                )
+                for _ in range(rng.choice((0, 0, 1, 2)))
+            )
+        entities.append(slide)
+        entities.extend(
+            LevelNote(
+                beat=rng.choice((rng.choice(beats), rng.uniform(beats[0], beats[-1]))),
+                lane=0.0,
+                size=1.0,
+                kind=tick_kind,
+                timescale_group=pick_group(),
+                attach=slide,
+            )
+            for _ in range(rng.randint(0, 3))
+        )
+
+    if rng.random() < 0.5:
+        entities.append(LevelFeverChance(beat=beat(), force=rng.random() < 0.5))
+        entities.append(LevelFeverStart(beat=beat()))
+    entities.extend(LevelSkill(beat=beat(), effect=rng.randint(0, 3)) for _ in range(rng.randint(0, 2)))
+    rng.shuffle(entities)
+    return entities
+
+
+def level_data_hash(entities: list[LevelEntities]) -> str:
+    level = build_level(name="golden", title="Golden", bgm=None, entities=entities)
+    data = json.dumps(build_level_data(level.data), separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def compute_hashes(random_levels: int = RANDOM_LEVELS) -> dict[str, str]:
+    from sekai.test_level import entities as test_level_entities
+
+    hashes = {"test_level": level_data_hash(test_level_entities)}
+    for seed in range(random_levels):
+        hashes[f"random_{seed}"] = level_data_hash(generate_random_level(seed))
+    return hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the level data built by build_level against golden hashes.")
+    parser.add_argument("--levels", type=int, default=RANDOM_LEVELS, help="Number of randomized levels.")
+    parser.add_argument("--golden", type=Path, default=GOLDEN_PATH)
+    parser.add_argument("--update", action="store_true", help="Write the current hashes as the new golden.")
+    args = parser.parse_args()
+
+    hashes = compute_hashes(args.levels)
+    if args.update:
+        args.golden.write_text(json.dumps(hashes, indent=2) + "\n")
+        return
+    golden = json.loads(args.golden.read_text())
+    mismatches = sorted(name for name, value in hashes.items() if golden.get(name) != value)
+    print(json.dumps({"levels": len(hashes), "mismatched": mismatches}))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Per-frame work of the release lockout check with many slides held at once.
+
+Every active slide ends on the same frame. Most fingers lift inside the hitbox of every slide end and the rest keep
+holding slides, so each lifted finger is a candidate for every note and the lockout decides which notes it can take.
+The check used to rescan ``touches()`` for each touch and note pair that passed the hitbox and input window checks,
+and now scans once per note and caches the flag. Both run unmodified in plain Python under sonolus.py's simulation
+context on the same frames, and must make the same assignments.
+
+Touch visits count every element read while iterating ``touches()``. Besides the lockout scans, that includes the
+single check for an ended touch at the start of the current assignment.
+"""
+
+import argparse
+import json
+import random
+from collections.abc import Callable
+from types import SimpleNamespace
+
+from sonolus.script.array import Array, Dim
+from sonolus.script.runtime import time, touches
+from sonolus.script.vec import Vec2
+
+from sekai.bench.input_assignment import CURRENT_TIME, SCREEN_HALF_WIDTH, random_quad, run_assignment
+from sekai.lib.layout import DynamicLayout, segment_closeness_score
+from sekai.lib.note import NoteKind
+from sekai.play import input_manager, note
+from sekai.play.input_manager import (
+    INPUT_SCORE_TIME_SCALE,
+    INPUT_SLOTS,
+    InputBuckets,
+    disallow_empty,
+    fill_input_buckets,
+    input_bucket,
+    input_candidate,
+    input_candidate_count,
+    is_allowed_release,
+    settle_preferences,
+)
+
+SLIDES = 10
+TOUCHES = 10
+HELD_RATE = 0.2
+FRAMES = 50
+
+
+class CountingTouches(list):
+    visits = 0
+
+    def __iter__(self):
+        for touch in super().__iter__():
+            CountingTouches.visits += 1
+            yield touch
+
+
+def per_pair_preassign_releases():
+    """Release assignment as it was before the lockout flag was cached, rescanning touches for every pair."""
+    active = note.NoteMemory.active_release_input_notes
+    active.sort(key=lambda ref: ref.get().target_time)
+
+    buckets = +InputBuckets
+    fill_input_buckets(buckets, active)
+
+    input_assigned = +Array[bool, Dim[INPUT_SLOTS]]
+    for i in range(INPUT_SLOTS):
+        if i >= len(touches()) or not touches()[i].ended:
+            input_assigned[i] = True
+
+    scores = +Array[float, Dim[INPUT_SLOTS]]
+    preferred = +Array[int, Dim[INPUT_SLOTS]]
+    stale = +Array[bool, Dim[INPUT_SLOTS]]
+    for i in range(INPUT_SLOTS):
+        preferred[i] = -1
+        stale[i] = not input_assigned[i]
+
+    for _ in range(INPUT_SLOTS):
+        for i in range(INPUT_SLOTS):
+            if not stale[i]:
+                continue
+            stale[i] = False
+            scores[i] = 0.0
+            preferred[i] = -1
+            touch = touches()[i]
+            bucket = input_bucket(touch.position.x)
+            for k in range(input_candidate_count(buckets, len(active), bucket)):
+                note_i = input_candidate(buckets, bucket, k)
+                target_note = active[note_i].get()
+                if target_note.captured_touch_id != 0:
+                    continue
+                if not target_note.hitbox.bounds.contains_point(touch.position):
+                    continue
+                if touch.time not in target_note.unadjusted_input_interval:
+                    continue
+                ignore_lockout = False
+                if target_note.active_head_ref.index > 0:
+                    head_bounds = target_note.active_head_ref.get().active_connector_info.input_bounds
+                    ongoing = False
+                    for t in touches():
+                        if not t.ended and head_bounds.contains_point(t.position):
+                            ongoing = True
+                            break
+                    ignore_lockout = not ongoing
+                if not ignore_lockout and not is_allowed_release(touch, target_note.target_time):
+                    continue
+                score = (
+                    segment_closeness_score(touch.position, target_note.hitbox.target) / DynamicLayout.w_scale
+                    + (time() - target_note.target_time) / INPUT_SCORE_TIME_SCALE
+                )
+                if preferred[i] == -1 or score > scores[i]:
+                    scores[i] = score
+                    preferred[i] = note_i
+
+        any_assigned = False
+        for i in range(INPUT_SLOTS):
+            note_i = preferred[i]
+            if note_i < 0:
+                continue
+            is_best = True
+            for j in range(INPUT_SLOTS):
+                if j == i or preferred[j] != note_i:
+                    continue
+                if scores[j] > scores[i] or (scores[j] == scores[i] and j < i):
+                    is_best = False
+                    break
+            if not is_best:
+                continue
+            target_note = active[note_i].get()
+            touch = touches()[i]
+            disallow_empty(touch)
+            target_note.captured_touch_id = touch.id
+            target_note.captured_touch_time = touch.time
+            input_assigned[i] = True
+            any_assigned = True
+
+        if not any_assigned:
+            break
+
+        settle_preferences(active, input_assigned, preferred, stale)
+
+
+def generate_frame(seed: int, slides: int, touch_count: int, held_rate: float) -> dict:
+    """Generate a frame where every slide ends and most fingers lift, in the input case format."""
+    rng = random.Random(seed)
+    notes = []
+    heads = []
+    head_xs = []
+    for i in range(slides):
+        x = rng.uniform(-0.3, 0.3)
+        head_xs.append(rng.uniform(-SCREEN_HALF_WIDTH, SCREEN_HALF_WIDTH))
+        heads.append(random_quad(rng, head_xs[-1], rng.uniform(0.1, 0.8)))
+        notes.append(
+            {
+                "x": x,
+                "half_width": SCREEN_HALF_WIDTH,
+                "bounds": random_quad(rng, x, SCREEN_HALF_WIDTH * 2),
+                "target_time": CURRENT_TIME + rng.uniform(-0.05, 0.05),
+                "kind": NoteKind.NORM_TAIL_RELEASE,
+                "captured_touch_id": 0,
+                "head": i + 1,
+                "release_input": True,
+            }
+        )
+    touch_list = CountingTouches()
+    for i in range(touch_count):
+        touch_time = CURRENT_TIME + rng.uniform(-0.03, 0.03)
+        # Fingers still holding a slide keep the release lockout of the slides they're on.
+        is_held = rng.random() < held_rate and head_xs
+        touch_list.append(
+            SimpleNamespace(
+                id=i + 1,
+                position=Vec2(rng.choice(head_xs), -0.5) if is_held else Vec2(rng.uniform(-1, 1), rng.uniform(-0.8, 0)),
+                started=False,
+                ended=not is_held,
+                time=touch_time,
+                start_time=touch_time - rng.uniform(0.5, 2),
+            )
+        )
+    # Some fingers are locked out from releasing, so the lockout decides which notes they can take.
+    lockouts = {touch.id: CURRENT_TIME + 1 for touch in touch_list if rng.random() < 0.5}
+    return {"notes": notes, "heads": heads, "touches": touch_list, "lockouts": lockouts}
+
+
+def measure(case: dict, preassign_releases: Callable[[], None]) -> tuple[dict, int]:
+    """Run one frame of release assignment and return its assignments and touch visits."""
+
+    def counted_preassign_releases():
+        CountingTouches.visits = 0
+        preassign_releases()
+
+    result = run_assignment(case, lambda: None, counted_preassign_releases)
+    return result, CountingTouches.visits
+
+
+def run(
+    slides: int = SLIDES, touch_count: int = TOUCHES, held_rate: float = HELD_RATE, frames: int = FRAMES, seed: int = 0
+) -> dict:
+    visits = {"per_pair": 0, "cached": 0}
+    captured = 0
+    mismatches = []
+    for frame_seed in range(seed, seed + frames):
+        case = generate_frame(frame_seed, slides, touch_count, held_rate)
+        expected, per_pair_visits = measure(case, per_pair_preassign_releases)
+        actual, cached_visits = measure(case, input_manager.preassign_releases)
+        visits["per_pair"] += per_pair_visits
+        visits["cached"] += cached_visits
+        captured += sum(touch_id != 0 for touch_id, _ in expected["captures"])
+        if actual != expected:
+            mismatches.append(frame_seed)
+    return {
+        "slides": slides,
+        "touches": touch_count,
+        "held_rate": held_rate,
+        "frames": frames,
+        "captures_per_frame": captured / frames,
+        "touch_visits_per_frame": {name: count / frames for name, count in visits.items()},
+        "mismatched_seeds": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare release lockout work with and without the cached flag.")
+    parser.add_argument("--slides", type=int, default=SLIDES)
+    parser.add_argument("--touches", type=int, default=TOUCHES)
+    parser.add_argument("--held-rate", type=float, default=HELD_RATE, help="Chance that a finger keeps holding.")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = run(args.slides, args.touches, args.held_rate, args.frames, args.seed)
+    print(json.dumps(result, indent=2))
+    if result["mismatched_seeds"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import gzip
+import json
+import random
+from math import ceil
+
+DURATION = 300.0
+FRAME_RATES = (60, 120, 240)
+NOTE_COUNT = 1500
+MISS_RATE = 0.03
+HEAL_COUNT = 2
+INITIAL_LIFE = 1000
+
+# Life increments applied by the engine for a missed note and a heal skill.
+MISS_INCREMENT = -80
+HEAL_INCREMENT = 250
+
+
+def simulate_life_changes(
+    duration: float, note_count: int, miss_rate: float, heal_count: int, seed: int
+) -> list[tuple[float, float]]:
+    """Return the times at which a synthetic run's life changes, with the life from that time on."""
+    rng = random.Random(seed)
+    increments = [
+        (duration * (i + 0.5) / note_count, MISS_INCREMENT) for i in range(note_count) if rng.random() < miss_rate
+    ]
+    increments.extend((duration * (i + 1) / (heal_count + 1), HEAL_INCREMENT) for i in range(heal_count))
+    increments.sort()
+    max_life = max(2000, INITIAL_LIFE * 2)
+    life = INITIAL_LIFE
+    changes = []
+    for change_time, increment in increments:
+        new_life = min(max(life + increment, 0), max_life)
+        if new_life != life:
+            life = new_life
+            changes.append((change_time, life))
+    return changes
+
+
+def per_frame_items(changes: list[tuple[float, float]], duration: float, fps: int) -> list[tuple[float, float]]:
+    """The life stream as recorded every frame, the encoding used before recording only changes."""
+    items = []
+    life = INITIAL_LIFE
+    next_change = 0
+    for frame in range(int(duration * fps) + 1):
+        frame_time = frame / fps
+        while next_change < len(changes) and changes[next_change][0] <= frame_time:
+            life = changes[next_change][1]
+            next_change += 1
+        items.append((frame_time, life))
+    return items
+
+
+def change_only_items(changes: list[tuple[float, float]], fps: int) -> list[tuple[float, float]]:
+    """The life stream as recorded on change, with the keyframe written when the stage initializes.
+
+    Changes are written on the first frame that sees them, matching the per-frame encoding's keys.
+    """
+    items = [(-2.0, float(INITIAL_LIFE))]
+    for change_time, life in changes:
+        frame_time = ceil(change_time * fps) / fps
+        if items[-1][0] == frame_time:
+            items[-1] = (frame_time, life)
+        else:
+            items.append((frame_time, life))
+    return items
+
+
+def encoded_size(items: list[tuple[float, float]]) -> dict[str, int]:
+    """Approximate the size of a stream in replay data as compact JSON keys and values, raw and gzipped."""
+    data = json.dumps(
+        {"keys": [key for key, _ in items], "values": [value for _, value in items]}, separators=(",", ":")
+    ).encode()
+    return {"keys": len(items), "bytes": len(data), "gzip_bytes": len(gzip.compress(data))}
+
+
+def run(
+    duration: float = DURATION,
+    frame_rates: tuple[int, ...] = FRAME_RATES,
+    note_count: int = NOTE_COUNT,
+    miss_rate: float = MISS_RATE,
+    heal_count: int = HEAL_COUNT,
+    seed: int = 0,
+) -> dict:
+    changes = simulate_life_changes(duration, note_count, miss_rate, heal_count, seed)
+    return {
+        "duration": duration,
+        "life_changes": len(changes),
+        "frame_rates": {
+            str(fps): {
+                "per_frame": encoded_size(per_frame_items(changes, duration, fps)),
+                "change_only": encoded_size(change_only_items(changes, fps)),
+            }
+            for fps in frame_rates
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare replay life stream sizes for a synthetic run.")
+    parser.add_argument("--duration", type=float, default=DURATION, help="Length of the run in seconds.")
+    parser.add_argument("--fps", type=int, nargs="+", default=list(FRAME_RATES))
+    parser.add_argument("--notes", type=int, default=NOTE_COUNT)
+    parser.add_argument("--miss-rate", type=float, default=MISS_RATE)
+    parser.add_argument("--heals", type=int, default=HEAL_COUNT)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.duration, tuple(args.fps), args.notes, args.miss_rate, args.heals, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
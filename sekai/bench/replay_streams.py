@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+
+from sonolus.script.stream import StreamGroup
+from sonolus.script.values import sizeof
+
+from sekai.lib.streams import Streams
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Streams that watch mode reads as a value at a time, either the previous key or interpolated between keys, so entries
+# in the middle of a run of equal values change nothing. Other streams are iterated as events and are left alone.
+COMPACTABLE_STREAMS = frozenset({"connector_visual_states", "fever_chance_counter", "life"})
+
+
+@dataclass
+class StreamField:
+    name: str
+    offset: int
+    element_size: int
+    group_size: int | None
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.element_size * (self.group_size or 1)
+
+
+@dataclass
+class BackingStream:
+    """A single backing stream of a replay, located in the engine's stream declarations."""
+
+    field: StreamField
+    # The index within a stream group, which is the index of the entity that wrote it, or None for plain streams.
+    entity: int | None
+    component: int
+    data: dict
+
+
+def stream_fields() -> list[StreamField]:
+    Streams._init_()
+    fields = []
+    for name, offset, annotation in Streams._streams_:
+        if issubclass(annotation, StreamGroup):
+            fields.append(StreamField(name, offset, max(1, sizeof(annotation.element_type())), annotation.size()))
+        else:
+            fields.append(StreamField(name, offset, annotation.backing_size(), None))
+    return fields
+
+
+def locate(stream_id: int, fields: list[StreamField]) -> tuple[StreamField, int | None, int] | None:
+    for field in fields:
+        if field.offset <= stream_id < field.end:
+            index, component = divmod(stream_id - field.offset, field.element_size)
+            return field, index if field.group_size is not None else None, component
+    return None
+
+
+def load_replay(path: Path) -> tuple[dict, bool]:
+    raw = path.read_bytes()
+    compressed = raw.startswith(GZIP_MAGIC)
+    return json.loads(gzip.decompress(raw) if compressed else raw), compressed
+
+
+def save_replay(path: Path, replay: dict, compressed: bool) -> None:
+    raw = json.dumps(replay, separators=(",", ":")).encode()
+    path.write_bytes(gzip.compress(raw) if compressed else raw)
+
+
+def decode_streams(replay: dict) -> tuple[list[BackingStream], list[dict]]:
+    """Split the replay's streams into those declared by the engine and any it doesn't declare."""
+    if "streams" not in replay:
+        raise ValueError("Replay data has no streams")
+    fields = stream_fields()
+    decoded = []
+    unknown = []
+    for data in replay["streams"]:
+        location = locate(data["id"], fields)
+        if location is None:
+            unknown.append(data)
+        else:
+            decoded.append(BackingStream(*location, data))
+    return decoded, unknown
+
+
+def encoded_bytes(data: dict) -> int:
+    return len(json.dumps(data, separators=(",", ":")).encode())
+
+
+def summarize(streams: list[BackingStream], top: int) -> dict:
+    by_stream: dict[str, dict] = {}
+    by_entity: dict[int, dict] = {}
+    for stream in streams:
+        entries = len(stream.data["keys"])
+        size = encoded_bytes(stream.data)
+        summary = by_stream.setdefault(stream.field.name, {"backing_streams": 0, "entries": 0, "bytes": 0})
+        summary["backing_streams"] += 1
+        summary["entries"] += entries
+        summary["bytes"] += size
+        if stream.entity is not None:
+            summary = by_entity.setdefault(stream.entity, {"entries": 0, "bytes": 0, "streams": {}})
+            summary["entries"] += entries
+            summary["bytes"] += size
+            summary["streams"][stream.field.name] = summary["streams"].get(stream.field.name, 0) + entries
+    largest = sorted(by_entity.items(), key=lambda item: item[1]["bytes"], reverse=True)[:top]
+    return {
+        "streams": dict(sorted(by_stream.items(), key=lambda item: item[1]["bytes"], reverse=True)),
+        "entities": {str(entity): summary for entity, summary in largest},
+    }
+
+
+def compact_entries(keys: list[float], values: list[float]) -> tuple[list[float], list[float]]:
+    """Remove entries in the middle of a run of equal values, keeping the first and last entry of every run."""
+    if len(keys) <= 2:
+        return keys, values
+    compact_keys = [keys[0]]
+    compact_values = [values[0]]
+    for i in range(1, len(keys) - 1):
+        if values[i - 1] == values[i] == values[i + 1]:
+            continue
+        compact_keys.append(keys[i])
+        compact_values.append(values[i])
+    compact_keys.append(keys[-1])
+    compact_values.append(values[-1])
+    return compact_keys, compact_values
+
+
+def value_at(keys: list[float], values: list[float], key: float) -> float:
+    """Read a stream like ``Stream.__getitem__``, interpolating linearly between the surrounding keys."""
+    if not keys:
+        return 0
+    right = bisect_left(keys, key)
+    if right < len(keys) and keys[right] == key:
+        return values[right]
+    if right == 0:
+        return values[0]
+    if right == len(keys):
+        return values[-1]
+    left = right - 1
+    progress = (key - keys[left]) / (keys[right] - keys[left])
+    return values[left] + (values[right] - values[left]) * progress
+
+
+def previous_inclusive_at(keys: list[float], values: list[float], key: float) -> float:
+    """Read a stream like ``Stream.get_previous_inclusive``."""
+    if not keys:
+        return 0
+    return values[max(bisect_right(keys, key) - 1, 0)]
+
+
+def reads_match(data: dict, compacted: dict) -> bool:
+    """Check that every read watch mode makes returns the same value from both streams.
+
+    Reads are checked at every original key and halfway between consecutive keys, which covers every interval where
+    the result of a read can change.
+    """
+    keys = data["keys"]
+    samples = [*keys, *((a + b) / 2 for a, b in pairwise(keys))]
+    if keys:
+        samples.extend((keys[0] - 1, keys[-1] + 1))
+    return all(
+        value_at(keys, data["values"], t) == value_at(compacted["keys"], compacted["values"], t)
+        and previous_inclusive_at(keys, data["values"], t)
+        == previous_inclusive_at(compacted["keys"], compacted["values"], t)
+        for t in samples
+    ) and (not keys or (keys[0], keys[-1]) == (compacted["keys"][0], compacted["keys"][-1]))
+
+
+def compact_replay(replay: dict) -> tuple[dict, list[str]]:
+    """Return a copy of the replay with compactable streams compacted, and any streams whose reads changed."""
+    streams, _ = decode_streams(replay)
+    compactable = {id(stream.data) for stream in streams if stream.field.name in COMPACTABLE_STREAMS}
+    compacted_streams = []
+    mismatches = []
+    for data in replay["streams"]:
+        if id(data) not in compactable:
+            compacted_streams.append(data)
+            continue
+        keys, values = compact_entries(data["keys"], data["values"])
+        compacted = {**data, "keys": keys, "values": values}
+        if not reads_match(data, compacted):
+            mismatches.append(str(data["id"]))
+        compacted_streams.append(compacted)
+    return {**replay, "streams": compacted_streams}, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report replay stream sizes and optionally write a compacted copy.")
+    parser.add_argument("replay", type=Path, help="Exported replay data, gzipped or plain JSON.")
+    parser.add_argument("--top", type=int, default=20, help="Number of entities with the largest streams to list.")
+    parser.add_argument("--compact", type=Path, help="Write the replay with redundant stream entries removed here.")
+    args = parser.parse_args()
+
+    replay, compressed = load_replay(args.replay)
+    streams, unknown = decode_streams(replay)
+    report = summarize(streams, args.top)
+    report["unknown_streams"] = len(unknown)
+    if args.compact is not None:
+        compacted, mismatches = compact_replay(replay)
+        compacted_streams, _ = decode_streams(compacted)
+        report["compacted"] = summarize(compacted_streams, 0)["streams"]
+        if mismatches:
+            print(json.dumps(report, indent=2))
+            print(f"Compaction changed reads of streams {', '.join(mismatches)}, not writing.", file=sys.stderr)
+            sys.exit(1)
+        save_replay(args.compact, compacted, compressed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
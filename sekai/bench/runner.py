@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
+from multiprocessing import get_context
+from pathlib import Path
+
+from sekai.bench.generators import (
+    ChartShape,
+    generate_extended_level_data,
+    generate_level_entities,
+    generate_stages,
+)
+from sekai.level_utils import (
+    LevelNote,
+    LevelSlide,
+    _build_stage,
+    _emit_sim_lines,
+    _note_archetype_for,
+    build_level,
+)
+from sekai.lib.converter import convert_extended_level_data
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _prepare_build_level(shape: ChartShape) -> Callable[[], int]:
+    entities = generate_level_entities(shape)
+    return lambda: len(build_level("bench", "Bench", None, entities).data.entities)
+
+
+def _prepare_convert_extended_level_data(shape: ChartShape) -> Callable[[], int]:
+    data = generate_extended_level_data(shape)
+    return lambda: len(convert_extended_level_data(data).entities)
+
+
+def _prepare_emit_sim_lines(shape: ChartShape) -> Callable[[], int]:
+    level_notes = []
+    for entity in generate_level_entities(shape):
+        if isinstance(entity, LevelNote):
+            level_notes.append(entity)
+        elif isinstance(entity, LevelSlide):
+            level_notes.extend(entity.notes)
+    notes = [_note_archetype_for(n.kind, n.is_fake)(beat=n.beat, lane=n.lane, size=n.size) for n in level_notes]
+
+    def run() -> int:
+        _emit_sim_lines(notes, [])
+        return len(notes)
+
+    return run
+
+
+def _prepare_build_stage(shape: ChartShape) -> Callable[[], int]:
+    stages = generate_stages(random.Random(shape.seed), shape)
+    return lambda: sum(len(_build_stage(stage)[1]) for stage in stages)
+
+
+# Each stage prepares its input untimed and returns a callable that runs the measured work.
+# The callable returns the number of entities it emitted or, for _emit_sim_lines, the number of notes it scanned.
+STAGES: dict[str, Callable[[ChartShape], Callable[[], int]]] = {
+    "build_level": _prepare_build_level,
+    "convert_extended_level_data": _prepare_convert_extended_level_data,
+    "_emit_sim_lines": _prepare_emit_sim_lines,
+    "_build_stage": _prepare_build_stage,
+}
+
+
+def run_stage(name: str, shape: ChartShape) -> dict:
+    """Run a single stage and measure it.
+
+    Peak RSS is the high-water mark of the current process, so stages should each run in a fresh process for it
+    to be attributed to that stage alone.
+    """
+    run = STAGES[name](shape)
+    baseline_rss = _peak_rss_bytes()
+    start = time.perf_counter()
+    entities = run()
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "entities": entities,
+        "entities_per_second": entities / seconds if seconds > 0 else None,
+        "baseline_rss_bytes": baseline_rss,
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+
+def run_stages(shape: ChartShape, names: list[str], isolate: bool = True) -> dict[str, dict]:
+    results = {}
+    for name in names:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                results[name] = executor.submit(run_stage, name, shape).result()
+        else:
+            results[name] = run_stage(name, shape)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark level build and conversion throughput.")
+    for shape_field in fields(ChartShape):
+        parser.add_argument(f"--{shape_field.name.replace('_', '-')}", type=int, default=shape_field.default)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--no-isolate", action="store_true", help="Run every stage in this process.")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    shape = ChartShape(**{f.name: getattr(args, f.name) for f in fields(ChartShape)})
+    report = {
+        "commit": _git_commit(),
+        "shape": asdict(shape),
+        "stages": run_stages(shape, args.stages, isolate=not args.no_isolate),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import cache
+from importlib.metadata import version
+from pathlib import Path
+
+from sonolus.build.engine import PackagedEngine, package_engine, package_rom
+from sonolus.script.internal.context import ProjectContextState, ReadOnlyMemory
+from sonolus.script.project import BuildConfig
+
+PACKAGE_ROOT = Path(__file__).parent
+PACKAGE_NAME = PACKAGE_ROOT.name
+
+MODE_MODULES = {
+    "play": "sekai.play.mode",
+    "watch": "sekai.watch.mode",
+    "preview": "sekai.preview.mode",
+    "tutorial": "sekai.tutorial.mode",
+}
+
+# Minimal passes leave too many temporaries for this engine to allocate, so they are not offered.
+PASSES = {
+    "1": BuildConfig.FAST_PASSES,
+    "2": BuildConfig.STANDARD_PASSES,
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+def module_path(module: str) -> Path | None:
+    parts = module.split(".")
+    if parts[0] != PACKAGE_NAME:
+        return None
+    base = PACKAGE_ROOT.joinpath(*parts[1:])
+    if base.with_suffix(".py").is_file():
+        return base.with_suffix(".py")
+    if (base / "__init__.py").is_file():
+        return base / "__init__.py"
+    return None
+
+
+@cache
+def imported_modules(path: Path) -> frozenset[str]:
+    modules = set()
+    for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+            modules.add(node.module)
+            # Names imported from a package may themselves be submodules.
+            modules.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return frozenset(modules)
+
+
+def source_closure(module: str) -> list[Path]:
+    """Return the source files of a module and everything it transitively imports from this package."""
+    seen: dict[str, Path] = {}
+    stack = [module]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        path = module_path(name)
+        if path is None:
+            continue
+        seen[name] = path
+        # Importing a submodule also runs the __init__ of every enclosing package.
+        parts = name.split(".")
+        stack.extend(".".join(parts[:i]) for i in range(1, len(parts)))
+        stack.extend(imported_modules(path))
+    return sorted(set(seen.values()))
+
+
+def hash_sources(paths: list[Path], salt: str) -> str:
+    digest = hashlib.sha256(salt.encode())
+    for path in paths:
+        digest.update(str(path.relative_to(PACKAGE_ROOT)).encode())
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass
+class BuildCache:
+    """Compiled mode data and the shared compile state from previous builds.
+
+    The ROM is shared between modes and only ever appended to, so it is saved with the cache and reused to keep the
+    ROM indexes baked into cached modes valid.
+    """
+
+    path: Path
+    key: str
+    rom_values: list[float] = field(default_factory=list)
+    rom_indexes: dict[tuple[float, ...], int] = field(default_factory=dict)
+    debug_str_mappings: dict[str, int] = field(default_factory=dict)
+    mode_hashes: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path, key: str) -> BuildCache:
+        manifest_path = path / MANIFEST_NAME
+        if not manifest_path.is_file():
+            return cls(path=path, key=key)
+        manifest = json.loads(gzip.decompress(manifest_path.read_bytes()))
+        if manifest["key"] != key:
+            # A different compiler or configuration invalidates everything, including the ROM.
+            return cls(path=path, key=key)
+        return cls(
+            path=path,
+            key=key,
+            rom_values=manifest["rom_values"],
+            rom_indexes={tuple(values): index for values, index in manifest["rom_indexes"]},
+            debug_str_mappings=manifest["debug_str_mappings"],
+            mode_hashes={
+                mode: mode_hash for mode, mode_hash in manifest["mode_hashes"].items() if (path / mode).is_file()
+            },
+        )
+
+    def save(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "key": self.key,
+            "rom_values": self.rom_values,
+            "rom_indexes": [[list(values), index] for values, index in self.rom_indexes.items()],
+            "debug_str_mappings": self.debug_str_mappings,
+            "mode_hashes": self.mode_hashes,
+        }
+        (self.path / MANIFEST_NAME).write_bytes(gzip.compress(json.dumps(manifest).encode(), mtime=0))
+
+    def project_state(self, config: BuildConfig) -> ProjectContextState:
+        rom = ReadOnlyMemory()
+        if self.rom_values:
+            rom.values = list(self.rom_values)
+            rom.indexes = dict(self.rom_indexes)
+        return ProjectContextState.from_build_config(config, rom=rom, debug_str_mappings=dict(self.debug_str_mappings))
+
+    def update_state(self, project_state: ProjectContextState) -> None:
+        self.rom_values = list(project_state.rom.values)
+        self.rom_indexes = dict(project_state.rom.indexes)
+        self.debug_str_mappings = dict(project_state.debug_str_mappings)
+
+    def get(self, mode: str, mode_hash: str) -> bytes | None:
+        if self.mode_hashes.get(mode) != mode_hash:
+            return None
+        return (self.path / mode).read_bytes()
+
+    def set(self, mode: str, mode_hash: str, data: bytes) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / mode).write_bytes(data)
+        self.mode_hashes[mode] = mode_hash
+
+
+def build_engine(build_dir: Path, passes_level: str = "2") -> dict:
+    """Build the engine into ``build_dir / "dist" / "engine"``, reusing cached modes, and return timings."""
+    timings: dict = {"modes": {}}
+    start = time.perf_counter()
+
+    from sekai.project import engine
+
+    timings["import_seconds"] = time.perf_counter() - start
+
+    hash_start = time.perf_counter()
+    salt = f"{version('sonolus.py')}:{sys.version_info[:2]}:{passes_level}"
+    mode_hashes = {mode: hash_sources(source_closure(module), salt) for mode, module in MODE_MODULES.items()}
+    timings["hash_seconds"] = time.perf_counter() - hash_start
+
+    cache = BuildCache.load(build_dir / "cache", key=salt)
+    mode_data = {mode: cache.get(mode, mode_hash) for mode, mode_hash in mode_hashes.items()}
+    stale = [mode for mode, data in mode_data.items() if data is None]
+
+    compile_start = time.perf_counter()
+    config = BuildConfig(
+        passes=PASSES[passes_level],
+        build_play="play" in stale,
+        build_watch="watch" in stale,
+        build_preview="preview" in stale,
+        build_tutorial="tutorial" in stale,
+    )
+    project_state = cache.project_state(config)
+    packaged = package_engine(engine.data, config, project_state=project_state)
+    compile_seconds = time.perf_counter() - compile_start
+    for mode in MODE_MODULES:
+        if mode in stale:
+            mode_data[mode] = getattr(packaged, f"{mode}_data")
+            cache.set(mode, mode_hashes[mode], mode_data[mode])
+            timings["modes"][mode] = "compiled"
+        else:
+            timings["modes"][mode] = "cached"
+    timings["compile_seconds"] = compile_seconds
+    cache.update_state(project_state)
+    cache.save()
+
+    PackagedEngine(
+        configuration=packaged.configuration,
+        play_data=mode_data["play"],
+        watch_data=mode_data["watch"],
+        preview_data=mode_data["preview"],
+        tutorial_data=mode_data["tutorial"],
+        rom=package_rom(project_state.rom),
+    ).write(build_dir / "dist" / "engine")
+
+    timings["total_seconds"] = time.perf_counter() - start
+    return timings
+
+
+def print_timings(timings: dict) -> None:
+    for mode, status in timings["modes"].items():
+        print(f"{mode}: {status}")
+    print(f"import: {timings['import_seconds']:.2f}s")
+    print(f"hash: {timings['hash_seconds']:.2f}s")
+    print(f"compile: {timings['compile_seconds']:.2f}s")
+    print(f"total: {timings['total_seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the engine, recompiling only modes whose sources changed.")
+    parser.add_argument("--build-dir", type=Path, default=Path("build"))
+    parser.add_argument(
+        "-O", dest="optimization", choices=list(PASSES), default="2", help="Optimization level, 1 for faster builds."
+    )
+    parser.add_argument("--clean", action="store_true", help="Discard the cache before building.")
+    parser.add_argument("--timings", action="store_true", help="Print which modes were reused and where time went.")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10_000)
+    if args.clean:
+        shutil.rmtree(args.build_dir / "cache", ignore_errors=True)
+    timings = build_engine(args.build_dir, args.optimization)
+    if args.timings:
+        print_timings(timings)
+
+
+if __name__ == "__main__":
+    main()
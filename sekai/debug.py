@@ -1 +1,4 @@
 DISABLE_NOTES = False
+PROFILE_FRAMES = False
+PROFILE_INPUT = False
+REPORT_SKIN_FALLBACKS = False
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import itertools
 import struct
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import cast
 
 from sonolus.build.collection import Asset
-from sonolus.script.archetype import PlayArchetype
+from sonolus.script.archetype import EntityRef, PlayArchetype
 from sonolus.script.level import Level, LevelData
 from sonolus.script.timing import TimescaleEase
 
@@ -204,6 +206,13 @@ def _note_archetype_for(kind: NoteKind, is_fake: bool) -> type[PlayArchetype]:
     return _NOTE_ARCHETYPE_BY_KIND[key]
 
 
+_LEVEL_EVENT_BUILDERS: dict[type, Callable[..., PlayArchetype]] = {
+    LevelFeverChance: lambda e: FeverChance(beat=e.beat, force=e.force),
+    LevelFeverStart: lambda e: FeverStart(beat=e.beat),
+    LevelSkill: lambda e: Skill(beat=e.beat, effect=e.effect, level=e.level),
+}
+
+
 def build_level(
     name: str,
     title: str,
@@ -218,29 +227,22 @@ def build_level(
     slides: list[LevelSlide] = []
     event_entities: list[PlayArchetype] = []
 
+    collected: dict[type, list] = {
+        LevelBpmChange: bpm_changes,
+        LevelTimescaleGroup: level_ts_groups,
+        LevelStage: level_stages,
+        LevelCameraChange: level_camera_changes,
+        LevelNote: top_notes,
+        LevelSlide: slides,
+    }
     for entity in entities:
-        if isinstance(entity, LevelBpmChange):
-            bpm_changes.append(entity)
-        elif isinstance(entity, LevelTimescaleGroup):
-            level_ts_groups.append(entity)
-        elif isinstance(entity, LevelStage):
-            level_stages.append(entity)
-        elif isinstance(entity, LevelCameraChange):
-            level_camera_changes.append(entity)
-        elif isinstance(entity, LevelNote):
-            top_notes.append(entity)
-        elif isinstance(entity, LevelSlide):
-            slides.append(entity)
-        elif isinstance(entity, LevelFeverChance):
-            event_entities.append(FeverChance(beat=entity.beat, force=entity.force))
-        elif isinstance(entity, LevelFeverStart):
-            event_entities.append(FeverStart(beat=entity.beat))
-        elif isinstance(entity, LevelSkill):
-            event_entities.append(Skill(beat=entity.beat, effect=entity.effect, level=entity.level))
-        elif not isinstance(
-            entity, (LevelBpmChange, LevelTimescaleGroup, LevelStage, LevelCameraChange, LevelNote, LevelSlide)
-        ):
-            raise TypeError(f"Unsupported level entity: {type(entity).__name__}")
+        entity_type = type(entity)
+        if entity_type in collected:
+            collected[entity_type].append(entity)
+        elif entity_type in _LEVEL_EVENT_BUILDERS:
+            event_entities.append(_LEVEL_EVENT_BUILDERS[entity_type](entity))
+        else:
+            raise TypeError(f"Unsupported level entity: {entity_type.__name__}")
 
     out_entities: list[PlayArchetype] = []
 
@@ -267,13 +269,20 @@ def build_level(
         stage_map[id(level_stage)] = stage
         out_entities.extend(stage_entities)
 
+    # Building refs is comparatively expensive, so each group and stage ref is built once and shared by its notes.
+    ts_group_refs: dict[int, EntityRef] = {}
+    stage_refs = {key: stage.ref() for key, stage in stage_map.items()}
+
     first_camera = _build_camera_changes(level_camera_changes, out_entities)
 
     note_entities: list[BaseNote] = []
-    slide_non_attached: dict[int, list[BaseNote]] = {}
+    # Non-attached notes of each slide sorted by beat, along with their beats for bisecting.
+    slide_non_attached: dict[int, tuple[list[float], list[BaseNote]]] = {}
 
     def emit_note(level_note: LevelNote, force_separator: bool = False) -> BaseNote:
-        ts_group = resolve_ts_group(level_note.timescale_group)
+        ts_group_key = id(level_note.timescale_group)
+        if ts_group_key not in ts_group_refs:
+            ts_group_refs[ts_group_key] = resolve_ts_group(level_note.timescale_group).ref()
         archetype_cls = _note_archetype_for(level_note.kind, level_note.is_fake)
         kwargs: dict[str, object] = {
             "beat": level_note.beat,
@@ -286,10 +295,10 @@ def build_level(
             "segment_alpha": level_note.segment_alpha,
             "segment_layer": level_note.segment_layer,
             "segment_through_judge_line": level_note.segment_through_judge_line,
-            "timescale_group": ts_group.ref(),
+            "timescale_group": ts_group_refs[ts_group_key],
         }
         if level_note.stage is not None:
-            kwargs["stage_ref"] = stage_map[id(level_note.stage)].ref()
+            kwargs["stage_ref"] = stage_refs[id(level_note.stage)]
         note = cast(BaseNote, archetype_cls(**kwargs))
         note_entities.append(note)
         out_entities.append(note)
@@ -319,17 +328,19 @@ def build_level(
 
         for prev_note, next_note in itertools.pairwise(non_attached):
             prev_note.next_ref = next_note.ref()
-        slide_non_attached[id(slide)] = non_attached
+        # Stable, so notes on the same beat keep their slide order.
+        sorted_non_attached = sorted(non_attached, key=lambda n: n.beat)
+        slide_non_attached[id(slide)] = ([n.beat for n in sorted_non_attached], sorted_non_attached)
 
-        separator_indices = sorted(i for i, ln in enumerate(slide.notes) if i in (0, last_index) or ln.is_separator)
+        separator_indices = [i for i, ln in enumerate(slide.notes) if i in (0, last_index) or ln.is_separator]
         separator_index_set = set(separator_indices)
         boundary_indices = [i for i, ln in enumerate(slide.notes) if i in separator_index_set or ln.attach is None]
         for a, b in itertools.pairwise(boundary_indices):
             seg_kind = slide.notes[a].segment_kind
             if seg_kind == ConnectorKind.NONE:
                 continue
-            seg_head_idx = a if a in separator_index_set else max(s for s in separator_indices if s < a)
-            seg_tail_idx = b if b in separator_index_set else min(s for s in separator_indices if s > b)
+            seg_head_idx = a if a in separator_index_set else separator_indices[bisect_left(separator_indices, a) - 1]
+            seg_tail_idx = b if b in separator_index_set else separator_indices[bisect_right(separator_indices, b)]
             seg_head = built[seg_head_idx]
             seg_tail = built[seg_tail_idx]
             connector = Connector(
@@ -349,18 +360,16 @@ def build_level(
             out_entities.append(connector)
 
     for note, slide in pending_attachments:
-        candidates = slide_non_attached[id(slide)]
-        attach_head: BaseNote | None = None
-        attach_tail: BaseNote | None = None
-        for cand in candidates:
-            if cand.beat <= note.beat and (attach_head is None or cand.beat > attach_head.beat):
-                attach_head = cand
-            if cand.beat >= note.beat and (attach_tail is None or cand.beat < attach_tail.beat):
-                attach_tail = cand
-        if attach_head is None or attach_tail is None:
+        beats, candidates = slide_non_attached[id(slide)]
+        # The head is the latest candidate at or before the note and the tail is the earliest at or after it,
+        # taking the first in slide order among candidates on the same beat.
+        head_index = bisect_right(beats, note.beat) - 1
+        tail_index = bisect_left(beats, note.beat)
+        if head_index < 0 or tail_index >= len(beats):
             raise ValueError(f"Attached note at beat {note.beat} is outside the non-attached span of its slide")
-        note.attach_head_ref = attach_head.ref()
-        note.attach_tail_ref = attach_tail.ref()
+        head_index = bisect_left(beats, beats[head_index])
+        note.attach_head_ref = candidates[head_index].ref()
+        note.attach_tail_ref = candidates[tail_index].ref()
         note.is_attached = True
 
     out_entities.extend(BpmChange(beat=level_bpm.beat, bpm=level_bpm.bpm) for level_bpm in bpm_changes)
@@ -375,12 +384,9 @@ def build_level(
     )
     if first_camera is not None:
         initialization.first_camera_ref = first_camera.ref()
-    out_entities.insert(0, initialization)
 
-    sorted_entities = sorted(
-        out_entities,
-        key=lambda e: (not isinstance(e, Initialization), getattr(e, "beat", -1.0)),
-    )
+    # Entities without a beat (groups, stages, connectors, sim lines) go first, right after initialization.
+    sorted_entities = [initialization, *sorted(out_entities, key=lambda e: getattr(e, "beat", -1.0))]
 
     return Level(
         name=name,
@@ -388,7 +394,7 @@ def build_level(
         bgm=bgm if bgm is not None else _build_silent_wav(),
         data=LevelData(
             bgm_offset=0.0,
-            entities=list(sorted_entities),
+            entities=sorted_entities,
         ),
     )
 
@@ -506,14 +512,21 @@ def _chain_next_refs(events: list) -> None:
 
 
 def _emit_sim_lines(note_entities: list[BaseNote], out_entities: list[PlayArchetype]) -> None:
-    buckets: dict[float, list[BaseNote]] = {}
-    for note in note_entities:
-        if note.key in _SIM_LINE_EXCLUDED_KINDS:
-            continue
-        buckets.setdefault(note.beat, []).append(note)
-    for group in buckets.values():
-        if len(group) < 2:
+    # A single stable sort puts notes on the same beat next to each other, ordered by lane.
+    # Beats are ranked by first appearance so sim lines keep their emission order.
+    beat_rank: dict[float, int] = {}
+    candidates = [note for note in note_entities if note.key not in _SIM_LINE_EXCLUDED_KINDS]
+    for note in candidates:
+        beat_rank.setdefault(note.beat, len(beat_rank))
+    candidates.sort(key=lambda n: (beat_rank[n.beat], n.lane))
+    # The lines of a chord are chained so that the chord spawns as a single entity.
+    chord_lines: list[SimLine] = []
+    for left, right in itertools.pairwise(candidates):
+        if left.beat != right.beat:
+            _chain_next_refs(chord_lines)
+            chord_lines = []
             continue
-        group.sort(key=lambda n: n.lane)
-        for left, right in itertools.pairwise(group):
-            out_entities.append(SimLine(left_ref=left.ref(), right_ref=right.ref()))
+        line = SimLine(left_ref=left.ref(), right_ref=right.ref())
+        chord_lines.append(line)
+        out_entities.append(line)
+    _chain_next_refs(chord_lines)
@@ -20,6 +20,8 @@ CONNECTOR = "Connector"
 SLIDE_MANAGER = "SlideManager"
 SLOT_GLOW_EFFECT = "SlotGlowEffect"
 SLOT_EFFECT = "SlotEffect"
+SLOT_EFFECT_MANAGER = "SlotEffectManager"
+SLOT_EFFECT_REQUEST = "SlotEffectRequest"
 
 NORMAL_TAP_NOTE = "NormalTapNote"
 CRITICAL_TAP_NOTE = "CriticalTapNote"
@@ -95,6 +97,7 @@ FAKE_TRANSIENT_HIDDEN_TICK_NOTE = "FakeTransientHiddenTickNote"
 COMBO_JUDGE = "ComboJudge"
 JUDGMENT_ACCURACY = "JudgmentAccuracy"
 DAMAGE_FLASH = "DamageFlash"
+HUD = "Hud"
 SKILL = "Skill"
 FEVER_CHANCE = "FeverChance"
 FEVER_START = "FeverStart"
@@ -54,8 +54,14 @@ def init_event_list[T: BaseEvent](first_ref: EntityRef[T]):
 
 
 def query_event_list[T: BaseEvent, K: float](
-    first_ref: EntityRef[T], key: K, accessor: Callable[[T], K]
+    first_ref: EntityRef[T], key: K, accessor: Callable[[T], K], cursor: EntityRef[Any] | None = None
 ) -> tuple[EntityRef[T], EntityRef[T]]:
+    """Return the last event with a key <= the given key and the event after it, either of which may be 0.
+
+    If a cursor is given, it must be 0 or the first result of an earlier query on the same list, and is moved to the
+    new result. Queries at or after the cursor gallop forward from it, so stepping through keys in order costs O(1)
+    amortized per query. Queries before the cursor descend the skip list from the head as usual.
+    """
     ref_type = type(first_ref)
     a = ref_type(0)
     b = ref_type(0)
@@ -63,16 +69,37 @@ def query_event_list[T: BaseEvent, K: float](
     if first_ref.index <= 0:
         return result
     first = first_ref.get()
-    if accessor(first) > key:
+    if cursor is not None and cursor.index > 0 and accessor(cursor.with_archetype(type(first)).get()) <= key:
+        a.index = cursor.index
+        while True:
+            # Take the longest skip from the current event that doesn't pass the key.
+            # Only events at multiples of 2**level have a skip at that level, so skips lengthen as the walk goes on.
+            next_index = 0
+            level = 0
+            while level < len(first.skip_refs):
+                next_skip = +a.get().skip_refs[level].with_archetype(type(first))
+                if next_skip.index <= 0 or accessor(next_skip.get()) > key:
+                    break
+                next_index = next_skip.index
+                level += 1
+            if next_index <= 0:
+                break
+            a.index = next_index
+    elif accessor(first) > key:
         b.index = first_ref.index
+        if cursor is not None:
+            cursor.index = 0
         return result
-    a.index = first_ref.index
-    level = first.skip_levels - 1
-    while level >= 0:
-        next_skip = +a.get().skip_refs[level].with_archetype(type(first))
-        while next_skip.index > 0 and accessor(next_skip.get()) <= key:
-            a.index = next_skip.index
-            next_skip.index = a.get().skip_refs[level].index
-        level -= 1
+    else:
+        a.index = first_ref.index
+        level = first.skip_levels - 1
+        while level >= 0:
+            next_skip = +a.get().skip_refs[level].with_archetype(type(first))
+            while next_skip.index > 0 and accessor(next_skip.get()) <= key:
+                a.index = next_skip.index
+                next_skip.index = a.get().skip_refs[level].index
+            level -= 1
     b.index = a.get().next_ref.index
+    if cursor is not None:
+        cursor.index = a.index
     return result
@@ -3,8 +3,11 @@ from math import ceil, cos, pi, sin
 from typing import Literal, assert_never
 
 from sonolus.script.archetype import EntityRef
+from sonolus.script.array import Array, Dim
+from sonolus.script.debug import debug_log
 from sonolus.script.effect import Effect, LoopedEffectHandle
-from sonolus.script.interval import clamp, lerp, remap_clamped, unlerp_clamped
+from sonolus.script.globals import level_data
+from sonolus.script.interval import clamp, lerp, remap, remap_clamped, unlerp, unlerp_clamped
 from sonolus.script.particle import Particle, ParticleHandle
 from sonolus.script.quad import Quad, QuadLike
 from sonolus.script.record import Record
@@ -12,6 +15,7 @@ from sonolus.script.runtime import time
 from sonolus.script.sprite import Sprite
 from sonolus.script.timing import beat_to_time
 
+from sekai.debug import REPORT_SKIN_FALLBACKS
 from sekai.lib.ease import EaseType, ease
 from sekai.lib.effect import Effects
 from sekai.lib.layer import (
@@ -28,8 +32,10 @@ from sekai.lib.layer import (
 )
 from sekai.lib.layout import (
     DynamicLayout,
+    Layout,
     approach,
     get_alpha,
+    is_perspective_area_on_screen,
     iter_slot_lanes,
     layout_circular_effect,
     layout_linear_effect,
@@ -47,6 +53,12 @@ CONNECTOR_TRAIL_SPAWN_PERIOD = 0.1
 CONNECTOR_SLOT_SPAWN_PERIOD = 0.2
 CONNECTOR_THROUGH_JUDGE_LINE_DESPAWN_DELAY = 5.0
 CONNECTOR_LENIENCY = 1
+CONNECTOR_TESSELLATION_SIZE = 17
+# Screen-space error of each straight segment at quality 1, matching what uniform sampling settled on.
+CONNECTOR_TESSELLATION_ERROR = 1 / 625
+CONNECTOR_MIN_VISIBLE_ALPHA = 1 / 255
+# Minimum projected height of a segment at quality 1, before level of detail starts merging segments.
+CONNECTOR_LOD_SEGMENT_HEIGHT = 0.02
 
 
 class ConnectorKind(IntEnum):
@@ -111,6 +123,41 @@ def get_active_connector_sprites(kind: ActiveConnectorKind) -> ActiveConnectorSp
     return result
 
 
+class ConnectorSprites(Record):
+    normal: Sprite
+    active: Sprite
+    has_active: bool
+
+
+@level_data
+class ConnectorSpriteLookup:
+    # Indexed by connector kind, so drawing doesn't need to match on it. Unused kinds stay empty.
+    sprites: Array[ConnectorSprites, Dim[ConnectorKind.GUIDE_BLACK + 1]]
+
+
+def init_connector_sprite_lookup():
+    """Resolve the sprites of every connector kind from the active skin.
+
+    With ``sekai.debug.REPORT_SKIN_FALLBACKS`` enabled, logs ``kind * 100 + render type`` for each active connector
+    kind, so the fallbacks selected for the loaded skin show up in the debug log.
+    """
+    for kind in (
+        ConnectorKind.ACTIVE_NORMAL,
+        ConnectorKind.ACTIVE_CRITICAL,
+        ConnectorKind.ACTIVE_FAKE_NORMAL,
+        ConnectorKind.ACTIVE_FAKE_CRITICAL,
+    ):
+        connection = get_active_connector_sprites(kind).connection
+        sprites = ConnectorSpriteLookup.sprites[kind]
+        sprites.normal @= connection.normal
+        sprites.active @= connection.active
+        sprites.has_active = connection.active.is_available
+        if REPORT_SKIN_FALLBACKS:
+            debug_log(kind * 100 + connection.render_type)
+    for kind in range(ConnectorKind.GUIDE_NEUTRAL, ConnectorKind.GUIDE_BLACK + 1):
+        ConnectorSpriteLookup.sprites[kind].normal @= get_guide_connector_sprite(kind)
+
+
 def get_guide_connector_sprite(kind: GuideConnectorKind) -> Sprite:
     result = +Sprite
     match kind:
@@ -291,6 +338,90 @@ def get_connector_quality_option(kind: ConnectorKind) -> float:
             assert_never(kind)
 
 
+class ConnectorTessellation(Record):
+    """Points along a connector's ease curve, placed so the straight segments between them stay within tolerance.
+
+    Points are stored as fractions of the way from ``start_ease_frac`` to ``end_ease_frac`` in ascending order,
+    including both ends, together with the eased value at each point.
+    """
+
+    start_ease_frac: float
+    end_ease_frac: float
+    count: int
+    fracs: Array[float, Dim[CONNECTOR_TESSELLATION_SIZE]]
+    eased: Array[float, Dim[CONNECTOR_TESSELLATION_SIZE]]
+
+    def frac_at(self, ease_frac: float) -> float:
+        if self.start_ease_frac == self.end_ease_frac:
+            return 0.0
+        return unlerp(self.start_ease_frac, self.end_ease_frac, ease_frac)
+
+    def piece_error(self, ease_type: EaseType, index: int) -> float:
+        error = 0.0
+        for r in (0.25, 0.5, 0.75):
+            frac = lerp(self.fracs[index], self.fracs[index + 1], r)
+            eased = ease(ease_type, lerp(self.start_ease_frac, self.end_ease_frac, frac))
+            error = max(error, abs(eased - lerp(self.eased[index], self.eased[index + 1], r)))
+        return error
+
+
+def tessellate_connector(
+    tessellation: ConnectorTessellation,
+    kind: ConnectorKind,
+    ease_type: EaseType,
+    head_lane: float,
+    head_size: float,
+    head_ease_frac: float,
+    tail_lane: float,
+    tail_size: float,
+    tail_ease_frac: float,
+):
+    """Adaptively subdivide a connector's ease curve, splitting the worst segment until all are within tolerance.
+
+    The tolerance comes from the connector's quality option and is converted to lanes at the judge line, using the
+    lanes and sizes at preprocess time. Must be called after the layout is initialized.
+    """
+    tessellation.start_ease_frac = head_ease_frac
+    tessellation.end_ease_frac = tail_ease_frac
+    tessellation.count = 2
+    tessellation.fracs[0] = 0.0
+    tessellation.fracs[1] = 1.0
+    tessellation.eased[0] = ease(ease_type, head_ease_frac)
+    tessellation.eased[1] = ease(ease_type, tail_ease_frac)
+    if ease_type in {EaseType.NONE, EaseType.LINEAR}:
+        return
+    lane_span = abs(tail_lane - head_lane) + abs(tail_size - head_size)
+    eased_span = abs(tessellation.eased[1] - tessellation.eased[0])
+    quality = get_connector_quality_option(kind)
+    if lane_span == 0 or eased_span == 0 or quality <= 0:
+        return
+    tolerance = CONNECTOR_TESSELLATION_ERROR / (quality**2 * Layout.w_scale) * eased_span / lane_span
+
+    errors = +Array[float, Dim[CONNECTOR_TESSELLATION_SIZE]]
+    errors[0] = tessellation.piece_error(ease_type, 0)
+    while tessellation.count < CONNECTOR_TESSELLATION_SIZE:
+        worst = 0
+        for i in range(1, tessellation.count - 1):
+            if errors[i] > errors[worst]:
+                worst = i
+        if errors[worst] <= tolerance:
+            break
+        i = tessellation.count
+        while i > worst + 1:
+            tessellation.fracs[i] = tessellation.fracs[i - 1]
+            tessellation.eased[i] = tessellation.eased[i - 1]
+            errors[i] = errors[i - 1]
+            i -= 1
+        frac = (tessellation.fracs[worst] + tessellation.fracs[worst + 2]) / 2
+        tessellation.fracs[worst + 1] = frac
+        tessellation.eased[worst + 1] = ease(
+            ease_type, lerp(tessellation.start_ease_frac, tessellation.end_ease_frac, frac)
+        )
+        tessellation.count += 1
+        errors[worst] = tessellation.piece_error(ease_type, worst)
+        errors[worst + 1] = tessellation.piece_error(ease_type, worst + 1)
+
+
 def draw_connector(
     kind: ConnectorKind,
     visual_state: ConnectorVisualState,
@@ -312,6 +443,7 @@ def draw_connector(
     segment_tail_alpha: float,
     layer: ConnectorLayer,
     bypass_tail_target_time_check: bool = False,
+    tessellation: ConnectorTessellation | None = None,
 ):
     if (
         (head_visual_progress < DynamicLayout.progress_start and tail_visual_progress < DynamicLayout.progress_start)
@@ -333,34 +465,9 @@ def draw_connector(
         tail_lane = head_lane
         tail_size = head_size
 
-    normal_sprite = Sprite(-1)
-    active_sprite = Sprite(-1)
-    match kind:
-        case (
-            ConnectorKind.ACTIVE_NORMAL
-            | ConnectorKind.ACTIVE_CRITICAL
-            | ConnectorKind.ACTIVE_FAKE_NORMAL
-            | ConnectorKind.ACTIVE_FAKE_CRITICAL
-        ):
-            sprites = get_active_connector_sprites(kind)
-            normal_sprite @= sprites.connection.normal
-            active_sprite @= sprites.connection.active
-        case (
-            ConnectorKind.GUIDE_NEUTRAL
-            | ConnectorKind.GUIDE_RED
-            | ConnectorKind.GUIDE_GREEN
-            | ConnectorKind.GUIDE_BLUE
-            | ConnectorKind.GUIDE_YELLOW
-            | ConnectorKind.GUIDE_PURPLE
-            | ConnectorKind.GUIDE_CYAN
-            | ConnectorKind.GUIDE_BLACK
-        ):
-            sprites = get_guide_connector_sprite(kind)
-            normal_sprite @= sprites
-        case ConnectorKind.NONE:
-            return
-        case _:
-            assert_never(kind)
+    if kind == ConnectorKind.NONE:
+        return
+    sprites = ConnectorSpriteLookup.sprites[kind]
 
     match kind:
         case ConnectorKind.ACTIVE_NORMAL | ConnectorKind.ACTIVE_CRITICAL:
@@ -415,12 +522,24 @@ def draw_connector(
     start_pos_y = pre_rotation_vec_at(start_lane, start_travel).y
     end_pos_y = pre_rotation_vec_at(end_lane, end_travel).y
 
+    if max(start_alpha, end_alpha) * get_connector_alpha_option(kind) < CONNECTOR_MIN_VISIBLE_ALPHA:
+        return
+    # Ease curves are monotonic, so the drawn lanes never leave the range spanned by the two ends.
+    if not is_perspective_area_on_screen(
+        min(start_lane - start_size, end_lane - end_size),
+        max(start_lane + start_size, end_lane + end_size),
+        start_travel,
+        end_travel,
+    ):
+        return
+
     delta_alpha = abs(start_alpha - end_alpha) * get_connector_alpha_option(kind)
     scale = delta_alpha * max(1.0, abs(start_pos_y - end_pos_y)) * 3 if delta_alpha else 0.0
     match ease_type:
         case EaseType.NONE:
             pass
-        case _:
+        case _ if tessellation is None:
+            # A tessellation already covers the curve, leaving only alpha to need uniform segments.
             left_start_lane = start_lane - start_size
             left_end_lane = end_lane - end_size
             right_start_lane = start_lane + start_size
@@ -456,8 +575,11 @@ def draw_connector(
                 scale = max(scale, max_offset**0.5 * 2.5)
     quality = get_connector_quality_option(kind)
     segment_count = max(1, ceil(scale * quality * 10))
+    # Far away connectors are short on screen, so they don't need as many segments.
+    max_segment_count = max(1, ceil(abs(start_pos_y - end_pos_y) * quality / CONNECTOR_LOD_SEGMENT_HEIGHT))
+    segment_count = min(segment_count, max_segment_count)
     z_normal = get_connector_z(kind, segment_head_target_time, segment_head_lane, active=False, layer=layer)
-    if visual_state == ConnectorVisualState.ACTIVE and active_sprite.is_available:
+    if visual_state == ConnectorVisualState.ACTIVE and sprites.has_active:
         z_active = get_connector_z(kind, segment_head_target_time, segment_head_lane, active=True, layer=layer)
     else:
         z_active = z_normal
@@ -469,14 +591,68 @@ def draw_connector(
     last_target_time = lerp(head_target_time, tail_target_time, start_frac)
 
     anim_factor1, anim_factor2 = (1, 1)
-    if visual_state == ConnectorVisualState.ACTIVE and active_sprite.is_available and Options.connector_animation:
+    if visual_state == ConnectorVisualState.ACTIVE and sprites.has_active and Options.connector_animation:
         anim_factor1, anim_factor2 = get_cross_fate_opacities(1.0, time() - segment_head_target_time, 0.5)
 
-    for i in range(1, segment_count + 1):
+    # Uniform segments are merged with the tessellation's points that fall inside the drawn range, if any.
+    start_tessellation_frac = 0.0
+    end_tessellation_frac = 0.0
+    tessellation_index = 0
+    merge_tessellation = False
+    if tessellation is not None:
+        start_tessellation_frac = tessellation.frac_at(start_ease_frac)
+        end_tessellation_frac = tessellation.frac_at(end_ease_frac)
+        tessellation_index = 1
+        while (
+            tessellation_index < tessellation.count - 1
+            and tessellation.fracs[tessellation_index] <= start_tessellation_frac
+        ):
+            tessellation_index += 1
+        end_tessellation_index = tessellation_index
+        while (
+            end_tessellation_index < tessellation.count - 1
+            and tessellation.fracs[end_tessellation_index] < end_tessellation_frac
+        ):
+            end_tessellation_index += 1
+        # Past the level of detail budget, the uniform segments just follow the tessellation instead.
+        merge_tessellation = segment_count + end_tessellation_index - tessellation_index <= max_segment_count
+        if not merge_tessellation:
+            segment_count = max_segment_count
+
+    i = 1
+    while i <= segment_count:
         segment_frac = i / segment_count
+        if tessellation is None:
+            next_eased = ease(ease_type, lerp(start_ease_frac, end_ease_frac, segment_frac))
+            i += 1
+        else:
+            tessellation_frac = lerp(start_tessellation_frac, end_tessellation_frac, segment_frac)
+            while (
+                tessellation_index < tessellation.count - 1
+                and tessellation.fracs[tessellation_index] < tessellation_frac
+                and not merge_tessellation
+            ):
+                tessellation_index += 1
+            if (
+                merge_tessellation
+                and tessellation_index < tessellation.count - 1
+                and tessellation.fracs[tessellation_index] < tessellation_frac
+            ):
+                tessellation_frac = tessellation.fracs[tessellation_index]
+                segment_frac = unlerp(start_tessellation_frac, end_tessellation_frac, tessellation_frac)
+                next_eased = tessellation.eased[tessellation_index]
+                tessellation_index += 1
+            else:
+                next_eased = remap(
+                    tessellation.fracs[tessellation_index - 1],
+                    tessellation.fracs[tessellation_index],
+                    tessellation.eased[tessellation_index - 1],
+                    tessellation.eased[tessellation_index],
+                    tessellation_frac,
+                )
+                i += 1
         next_frac = lerp(start_frac, end_frac, segment_frac)
-        next_ease_frac = lerp(start_ease_frac, end_ease_frac, segment_frac)
-        next_interp_frac = unlerp_clamped(eased_head_ease_frac, eased_tail_ease_frac, ease(ease_type, next_ease_frac))
+        next_interp_frac = unlerp_clamped(eased_head_ease_frac, eased_tail_ease_frac, next_eased)
         next_visual_progress = lerp(start_visual_progress, end_visual_progress, segment_frac)
         next_travel = approach(next_visual_progress)
         next_lane = lerp(head_lane, tail_lane, next_interp_frac)
@@ -502,14 +678,14 @@ def draw_connector(
             end_travel=next_travel,
         )
 
-        if visual_state == ConnectorVisualState.ACTIVE and active_sprite.is_available:
+        if visual_state == ConnectorVisualState.ACTIVE and sprites.has_active:
             if Options.connector_animation:
-                normal_sprite.draw(layout, z=z_normal, a=base_a * anim_factor1)
-                active_sprite.draw(layout, z=z_active, a=base_a * anim_factor2)
+                sprites.normal.draw(layout, z=z_normal, a=base_a * anim_factor1)
+                sprites.active.draw(layout, z=z_active, a=base_a * anim_factor2)
             else:
-                normal_sprite.draw(layout, z=z_normal, a=base_a)
+                sprites.normal.draw(layout, z=z_normal, a=base_a)
         else:
-            normal_sprite.draw(
+            sprites.normal.draw(
                 layout, z=z_normal, a=base_a * (1 if visual_state != ConnectorVisualState.INACTIVE else 0.5)
             )
 
@@ -1,4 +1,6 @@
-from typing import Any, Literal
+from collections.abc import Iterable, Iterator
+from heapq import merge
+from typing import Literal
 
 from sonolus.script.archetype import PlayArchetype
 from sonolus.script.level import ExternalEntityData, ExternalLevelData, LevelData
@@ -95,6 +97,13 @@ fade_alpha_mapping = {
     2: (0.0, 1.0),
 }
 
+type AnchorPosition = Literal["segment_head", "segment_tail", "head", "tail"]
+
+ANCHOR_POSITIONS: tuple[AnchorPosition, ...] = ("segment_head", "segment_tail", "head", "tail")
+
+# Guide endpoints closer than this are treated as the same anchor.
+ANCHOR_QUANTUM = 2**-20
+
 guide_kind_mapping = {
     0: ConnectorKind.GUIDE_NEUTRAL,
     1: ConnectorKind.GUIDE_RED,
@@ -109,24 +118,18 @@ guide_kind_mapping = {
 
 class ExtendedLevelData:
     entities: list[ExternalEntityData]
-    entities_by_archetype: dict[str, list[tuple[int, ExternalEntityData]]]
-    note_entities: list[tuple[int, ExternalEntityData]]
-    connector_entities: list[tuple[int, ExternalEntityData]]
+    indices_by_archetype: dict[str, list[int]]
 
     def __init__(self, entities: list[ExternalEntityData]):
         self.entities = entities
-        self.entities_by_archetype = {}
-        self.note_entities = []
-        self.connector_entities = []
+        self.indices_by_archetype = {}
         for i, entity in enumerate(entities):
-            if entity.archetype not in self.entities_by_archetype:
-                self.entities_by_archetype[entity.archetype] = []
-            self.entities_by_archetype[entity.archetype].append((i, entity))
+            if entity.archetype not in self.indices_by_archetype:
+                self.indices_by_archetype[entity.archetype] = []
+            self.indices_by_archetype[entity.archetype].append(i)
 
-            if entity.archetype in note_type_mapping:
-                self.note_entities.append((i, entity))
-            if entity.archetype in active_connector_kind_mapping:
-                self.connector_entities.append((i, entity))
+    def has_archetype(self, archetype: str) -> bool:
+        return archetype in self.indices_by_archetype
 
     def iter_all(self):
         return iter(self.entities)
@@ -135,44 +138,59 @@ class ExtendedLevelData:
         return enumerate(self.entities)
 
     def iter_by_archetype(self, archetype: str):
-        return (entity for i, entity in self.entities_by_archetype.get(archetype, []))
+        return (self.entities[i] for i in self.indices_by_archetype.get(archetype, []))
 
     def enumerate_by_archetype(self, archetype: str):
-        return iter(self.entities_by_archetype.get(archetype, []))
+        return ((i, self.entities[i]) for i in self.indices_by_archetype.get(archetype, []))
+
+    def enumerate_by_archetypes(self, archetypes: Iterable[str]):
+        # Each index list is already ascending, so merging keeps the original entity order.
+        indices = merge(*(self.indices_by_archetype.get(archetype, []) for archetype in archetypes))
+        return ((i, self.entities[i]) for i in indices)
 
     def __getitem__(self, index: int) -> ExternalEntityData:
         return self.entities[index]
 
     def iter_note_archetypes(self):
-        return iter(self.note_entities)
+        return self.enumerate_by_archetypes(note_type_mapping)
 
     def iter_active_connector_archetypes(self):
-        return iter(self.connector_entities)
+        return self.enumerate_by_archetypes(active_connector_kind_mapping)
 
 
 def convert_extended_level_data(data: ExternalLevelData) -> LevelData | None:
-    if not any(e.archetype == "TimeScaleGroup" for e in data.entities):
-        return None
     extended_data = ExtendedLevelData(data.entities)
+    if not extended_data.has_archetype("TimeScaleGroup"):
+        return None
     bpm_changes = convert_bpm_changes(extended_data)
     timescale_groups_by_index, timescale_entities = convert_timescale_groups(extended_data)
     notes = convert_notes(extended_data, timescale_groups_by_index)
     guides = convert_guides(extended_data, timescale_groups_by_index)
-    entities = [
-        Initialization(),
-        *bpm_changes,
-        *timescale_entities,
-        *notes,
-        *guides,
-    ]
-    entities = sorted(entities, key=lambda e: (not isinstance(e, Initialization), (getattr(e, "beat", -1))))
-    link_slide_notes(entities)
     return LevelData(
         bgm_offset=data.bgm_offset,
-        entities=entities,
+        entities=[Initialization(), *merge_by_beat(bpm_changes, timescale_entities, notes, guides)],
     )
 
 
+def entity_beat(entity: PlayArchetype) -> float:
+    return getattr(entity, "beat", -1)
+
+
+def merge_by_beat(*entity_lists: list[PlayArchetype]) -> Iterator[PlayArchetype]:
+    """Merge entity lists into beat order, keeping the relative order of entities on the same beat.
+
+    Each list is sorted in place and the results are merged lazily, which is equivalent to a stable sort of
+    their concatenation without materializing it.
+    """
+    for entities in entity_lists:
+        entities.sort(key=entity_beat)
+    return merge(*entity_lists, key=entity_beat)
+
+
+def quantize_anchor_value(value: float) -> int:
+    return round(value / ANCHOR_QUANTUM)
+
+
 def convert_timescale_groups(data: ExtendedLevelData) -> tuple[dict[int, TimescaleChange], list[PlayArchetype]]:
     groups_by_original_index = {}
     entities = []
@@ -219,6 +237,8 @@ def convert_notes(
     entities = []
     notes_by_original_index = {}
     connectors_by_original_index = {}
+    # Only notes that reference a connector need a second look once the connectors exist.
+    pending_connector_refs = []
     for i, entity in data.iter_note_archetypes():
         note_class = note_type_mapping[entity.archetype]
         note = note_class(
@@ -228,20 +248,29 @@ def convert_notes(
             direction=flick_direction_mapping[entity.data.get("direction", 0)],
             segment_kind=ConnectorKind.ACTIVE_NORMAL,
         )
+        timescale_group_index = entity.data.get("timeScaleGroup", -1)
+        if timescale_group_index in timescale_groups_by_index:
+            note.timescale_group = timescale_groups_by_index[timescale_group_index].ref()
+        attach_index = entity.data.get("attach", -1)
+        slide_index = entity.data.get("slide", -1)
+        if attach_index > 0 or slide_index > 0:
+            pending_connector_refs.append((note, attach_index, slide_index))
         entities.append(note)
         notes_by_original_index[i] = note
     for i, entity in data.iter_active_connector_archetypes():
-        connector = Connector(
-            head_ref=notes_by_original_index[entity.data["head"]].ref(),
-            tail_ref=notes_by_original_index[entity.data["tail"]].ref(),
-            segment_head_ref=notes_by_original_index[entity.data["start"]].ref(),
-            segment_tail_ref=notes_by_original_index[entity.data["end"]].ref(),
-            active_head_ref=notes_by_original_index[entity.data["start"]].ref(),
-            active_tail_ref=notes_by_original_index[entity.data["end"]].ref(),
-        )
         head = notes_by_original_index[entity.data["head"]]
         tail = notes_by_original_index[entity.data["tail"]]
         segment_head = notes_by_original_index[entity.data["start"]]
+        segment_tail = notes_by_original_index[entity.data["end"]]
+        connector = Connector(
+            head_ref=head.ref(),
+            tail_ref=tail.ref(),
+            segment_head_ref=segment_head.ref(),
+            segment_tail_ref=segment_tail.ref(),
+            active_head_ref=segment_head.ref(),
+            active_tail_ref=segment_tail.ref(),
+        )
+        head.next_ref = tail.ref()
         head.connector_ease = ease_type_mapping[entity.data["ease"]]
         connector_kind = active_connector_kind_mapping[entity.archetype]
         head.segment_kind = connector_kind
@@ -249,101 +278,119 @@ def convert_notes(
         segment_head.segment_kind = connector_kind
         entities.append(connector)
         connectors_by_original_index[i] = connector
-    for i, note in notes_by_original_index.items():
-        entity = data[i]
-        timescale_group_index = entity.data.get("timeScaleGroup", -1)
-        if timescale_group_index in timescale_groups_by_index:
-            note.timescale_group = timescale_groups_by_index[timescale_group_index].ref()
-        attach_index = entity.data.get("attach", -1)
+    for note, attach_index, slide_index in pending_connector_refs:
         if attach_index > 0:
             attach_connector = connectors_by_original_index[attach_index]
             note.attach_head_ref = attach_connector.head_ref
             note.attach_tail_ref = attach_connector.tail_ref
             note.is_attached = True
-        slide_index = entity.data.get("slide", -1)
         if slide_index > 0:
             slide_connector = connectors_by_original_index[slide_index]
             note.active_head_ref = slide_connector.active_head_ref
+    sim_lines = []
     for entity in data.iter_by_archetype("SimLine"):
-        sim_line = SimLine(
-            left_ref=notes_by_original_index[entity.data["a"]].ref(),
-            right_ref=notes_by_original_index[entity.data["b"]].ref(),
-        )
+        left = notes_by_original_index[entity.data["a"]]
+        right = notes_by_original_index[entity.data["b"]]
+        sim_line = SimLine(left_ref=left.ref(), right_ref=right.ref())
+        sim_lines.append((left, right, sim_line))
         entities.append(sim_line)
+    chain_sim_lines(sim_lines)
     return entities
 
 
+def chain_sim_lines(sim_lines: list[tuple[BaseNote, BaseNote, SimLine]]) -> None:
+    """Chain each sim line to the one continuing from its right note, so that a chord spawns as a single entity.
+
+    Lines are only chained on the same beat and from left to right, which keeps chains free of cycles, and only
+    where the continuation is unambiguous.
+    """
+    lines_by_left: dict[int, list[tuple[BaseNote, BaseNote, SimLine]]] = {}
+    right_counts: dict[int, int] = {}
+    for line in sim_lines:
+        lines_by_left.setdefault(id(line[0]), []).append(line)
+        right_counts[id(line[1])] = right_counts.get(id(line[1]), 0) + 1
+    for left, right, sim_line in sim_lines:
+        following = lines_by_left.get(id(right), [])
+        if len(following) != 1 or right_counts[id(right)] != 1:
+            continue
+        _, next_right, next_sim_line = following[0]
+        if left.beat == right.beat == next_right.beat and left.lane < right.lane < next_right.lane:
+            sim_line.next_ref = next_sim_line.ref()
+
+
 def convert_guides(
     data: ExtendedLevelData, timescale_groups_by_index: dict[int, TimescaleChange]
 ) -> list[PlayArchetype]:
     entities = []
 
-    anchors_by_beat = {}
-    anchor_positions = {}
+    anchors = []
+    # Anchors that do not yet occupy a given position, keyed by (anchor key, position) in creation order.
+    free_anchors_by_key = {}
 
     def get_anchor(
         beat: float,
         lane: float,
         size: float,
-        timescale_group: Any,
-        pos: Literal["segment_head", "segment_tail", "head", "tail"],
+        timescale_group_index: int,
+        pos: AnchorPosition,
         segment_kind: ConnectorKind | None = None,
         segment_alpha: float | None = None,
         connector_ease: EaseType | None = None,
     ) -> BaseNote:
-        if beat in anchors_by_beat:
-            for anchor in anchors_by_beat[beat]:
-                if pos in anchor_positions[anchor]:
-                    continue
-                if (
-                    anchor.lane == lane
-                    and anchor.size == size
-                    and anchor.timescale_group == timescale_group
-                    and (segment_kind is None or anchor.segment_kind in (segment_kind, -1))
-                    and (segment_alpha is None or anchor.segment_alpha in (segment_alpha, -1))
-                    and (connector_ease is None or anchor.connector_ease in (connector_ease, -1))
-                ):
-                    if segment_kind is not None and anchor.segment_kind == -1:
-                        anchor.segment_kind = segment_kind
-                    if segment_alpha is not None and anchor.segment_alpha == -1:
-                        anchor.segment_alpha = segment_alpha
-                    if connector_ease is not None and anchor.connector_ease == -1:
-                        anchor.connector_ease = connector_ease
-                    anchor_positions[anchor].add(pos)
-                    return anchor
+        key = (
+            quantize_anchor_value(beat),
+            quantize_anchor_value(lane),
+            quantize_anchor_value(size),
+            timescale_group_index,
+        )
+        candidates = free_anchors_by_key.get((key, pos), [])
+        for i, anchor in enumerate(candidates):
+            if (
+                (segment_kind is None or anchor.segment_kind in (segment_kind, -1))
+                and (segment_alpha is None or anchor.segment_alpha in (segment_alpha, -1))
+                and (connector_ease is None or anchor.connector_ease in (connector_ease, -1))
+            ):
+                if segment_kind is not None and anchor.segment_kind == -1:
+                    anchor.segment_kind = segment_kind
+                if segment_alpha is not None and anchor.segment_alpha == -1:
+                    anchor.segment_alpha = segment_alpha
+                if connector_ease is not None and anchor.connector_ease == -1:
+                    anchor.connector_ease = connector_ease
+                del candidates[i]
+                return anchor
         anchor = AnchorNote(
             beat=beat,
             lane=lane,
             size=size,
-            timescale_group=timescale_group,
+            timescale_group=timescale_groups_by_index[timescale_group_index].ref(),
             segment_kind=segment_kind if segment_kind is not None else -1,
             segment_alpha=segment_alpha if segment_alpha is not None else -1,
             connector_ease=connector_ease if connector_ease is not None else -1,
         )
         entities.append(anchor)
-        if beat not in anchors_by_beat:
-            anchors_by_beat[beat] = []
-        anchors_by_beat[beat].append(anchor)
-        anchor_positions[anchor] = {pos}
+        anchors.append(anchor)
+        for other_pos in ANCHOR_POSITIONS:
+            if other_pos != pos:
+                free_anchors_by_key.setdefault((key, other_pos), []).append(anchor)
         return anchor
 
     for entity in data.iter_by_archetype("Guide"):
         start_beat = entity.data["startBeat"]
         start_lane = entity.data["startLane"]
         start_size = entity.data["startSize"]
-        start_timescale_group = timescale_groups_by_index[entity.data["startTimeScaleGroup"]].ref()
+        start_timescale_group_index = entity.data["startTimeScaleGroup"]
         head_beat = entity.data["headBeat"]
         head_lane = entity.data["headLane"]
         head_size = entity.data["headSize"]
-        head_timescale_group = timescale_groups_by_index[entity.data["headTimeScaleGroup"]].ref()
+        head_timescale_group_index = entity.data["headTimeScaleGroup"]
         tail_beat = entity.data["tailBeat"]
         tail_lane = entity.data["tailLane"]
         tail_size = entity.data["tailSize"]
-        tail_timescale_group = timescale_groups_by_index[entity.data["tailTimeScaleGroup"]].ref()
+        tail_timescale_group_index = entity.data["tailTimeScaleGroup"]
         end_beat = entity.data["endBeat"]
         end_lane = entity.data["endLane"]
         end_size = entity.data["endSize"]
-        end_timescale_group = timescale_groups_by_index[entity.data["endTimeScaleGroup"]].ref()
+        end_timescale_group_index = entity.data["endTimeScaleGroup"]
         ease = ease_type_mapping[entity.data.get("ease", 0)]
         start_alpha, end_alpha = fade_alpha_mapping[entity.data.get("fade", 1)]
         kind = guide_kind_mapping[entity.data.get("color", 0)]
@@ -353,7 +400,7 @@ def convert_guides(
             lane=start_lane,
             size=start_size,
             pos="segment_head",
-            timescale_group=start_timescale_group,
+            timescale_group_index=start_timescale_group_index,
             segment_kind=kind,
             segment_alpha=start_alpha,
         )
@@ -362,7 +409,7 @@ def convert_guides(
             lane=end_lane,
             size=end_size,
             pos="segment_tail",
-            timescale_group=end_timescale_group,
+            timescale_group_index=end_timescale_group_index,
             segment_kind=kind,
             segment_alpha=end_alpha,
         )
@@ -371,7 +418,7 @@ def convert_guides(
             lane=head_lane,
             size=head_size,
             pos="head",
-            timescale_group=head_timescale_group,
+            timescale_group_index=head_timescale_group_index,
             segment_kind=kind,
             connector_ease=ease,
         )
@@ -380,7 +427,7 @@ def convert_guides(
             lane=tail_lane,
             size=tail_size,
             pos="tail",
-            timescale_group=tail_timescale_group,
+            timescale_group_index=tail_timescale_group_index,
             segment_kind=kind,
         )
         connector = Connector(
@@ -389,24 +436,15 @@ def convert_guides(
             segment_head_ref=start.ref(),
             segment_tail_ref=end.ref(),
         )
+        head.next_ref = tail.ref()
         entities.append(connector)
 
-    for anchor_list in anchors_by_beat.values():
-        for anchor in anchor_list:
-            if anchor.segment_kind == -1:
-                anchor.segment_kind = ConnectorKind.GUIDE_NEUTRAL
-            if anchor.segment_alpha == -1:
-                anchor.segment_alpha = 1.0
-            if anchor.connector_ease == -1:
-                anchor.connector_ease = EaseType.LINEAR
+    for anchor in anchors:
+        if anchor.segment_kind == -1:
+            anchor.segment_kind = ConnectorKind.GUIDE_NEUTRAL
+        if anchor.segment_alpha == -1:
+            anchor.segment_alpha = 1.0
+        if anchor.connector_ease == -1:
+            anchor.connector_ease = EaseType.LINEAR
 
     return entities
-
-
-def link_slide_notes(entities: list[PlayArchetype]) -> None:
-    for entity in entities:
-        if not isinstance(entity, Connector):
-            continue
-        head = entity.head_ref.get()
-        tail = entity.tail_ref.get()
-        head.next_ref = tail.ref()
@@ -30,7 +30,6 @@ class LifeManager:
     initial_life: int
     max_life: int
     decrease_life: int
-    first: float
 
 
 class NeumaierSum(Record):
@@ -57,7 +56,6 @@ class ScoreIndicator:
     note_time: float
     percentage: float
     ap: bool
-    first: float
 
     # Play
     total_weight: NeumaierSum
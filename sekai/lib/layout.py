@@ -5,6 +5,7 @@ from math import atan, ceil, floor, log, pi
 from typing import Protocol, assert_never, cast
 
 from sonolus.script.archetype import EntityRef, get_archetype_by_name
+from sonolus.script.array import Array, Dim
 from sonolus.script.debug import static_error
 from sonolus.script.globals import level_data, level_memory
 from sonolus.script.interval import clamp, lerp, remap, unlerp
@@ -235,6 +236,7 @@ class CameraChangeLike(Protocol):
 
 class InitializationLike(Protocol):
     first_camera_ref: EntityRef
+    camera_cursor: EntityRef
 
     @classmethod
     def at(cls, index: int) -> InitializationLike: ...
@@ -248,7 +250,9 @@ def _initialization_archetype() -> type[InitializationLike]:
     return cast(type[InitializationLike], get_archetype_by_name(archetype_names.INITIALIZATION))
 
 
-def get_camera_info(target_time: float | None = None, left_limit: bool = False) -> CameraInfo:
+def get_camera_info(
+    target_time: float | None = None, left_limit: bool = False, cursor: EntityRef | None = None
+) -> CameraInfo:
     result = +CameraInfo
     first_camera_ref = _initialization_archetype().at(0).first_camera_ref
     if first_camera_ref.index <= 0:
@@ -264,7 +268,7 @@ def get_camera_info(target_time: float | None = None, left_limit: bool = False)
         )
         return result
     t = time() if target_time is None else target_time
-    camera_a_ref, camera_b_ref = query_event_list(first_camera_ref, t, lambda e: e.time)
+    camera_a_ref, camera_b_ref = query_event_list(first_camera_ref, t, lambda e: e.time, cursor)
     camera_archetype = _camera_change_archetype()
     if left_limit and camera_a_ref.index > 0:
         camera_curr = get_event_as(camera_a_ref, camera_archetype)
@@ -356,7 +360,7 @@ def get_next_camera_event_time(t: float) -> float:
 def refresh_layout():
     camera = +CameraInfo
     if is_play() or is_watch():
-        camera @= get_camera_info()
+        camera @= get_camera_info(cursor=_initialization_archetype().at(0).camera_cursor)
     else:
         camera @= CameraInfo(
             lane=0.0,
@@ -1357,6 +1361,24 @@ def layout_slide_connector_segment(
     )
 
 
+def is_perspective_area_on_screen(l: float, r: float, start_travel: float, end_travel: float) -> bool:
+    """Conservatively check whether the area between two lanes and two travels may overlap the screen.
+
+    Lane width changes linearly with travel, so the area is exactly the quad between its four corners.
+    """
+    bl = perspective_vec(l, 1, start_travel)
+    br = perspective_vec(r, 1, start_travel)
+    tl = perspective_vec(l, 1, end_travel)
+    tr = perspective_vec(r, 1, end_travel)
+    area = screen()
+    return (
+        max(bl.x, br.x, tl.x, tr.x) >= area.l
+        and min(bl.x, br.x, tl.x, tr.x) <= area.r
+        and max(bl.y, br.y, tl.y, tr.y) >= area.b
+        and min(bl.y, br.y, tl.y, tr.y) <= area.t
+    )
+
+
 def layout_sim_line(
     left_lane: float,
     left_travel: float,
@@ -1527,6 +1549,40 @@ class LayoutTransform(Record):
     size_zoom: float
 
 
+# Notes at the same target time all compute their hitbox from the camera at that time during preprocessing, so
+# transforms are memoized by time in a small direct-mapped table. Chords and notes sharing a beat reuse one entry.
+CAMERA_TRANSFORM_CACHE_SIZE = 32
+CAMERA_TRANSFORM_CACHE_RESOLUTION = 240
+
+
+class CachedLayoutTransform(Record):
+    is_valid: bool
+    time: float
+    left_limit: bool
+    transform: LayoutTransform
+
+
+@level_memory
+class CameraTransformCache:
+    entries: Array[CachedLayoutTransform, Dim[CAMERA_TRANSFORM_CACHE_SIZE]]
+
+
+def layout_transform_at_time(target_time: float, left_limit: bool = False) -> LayoutTransform:
+    """Return the layout transform of the camera at the given time, reusing the result for repeated times.
+
+    This writes level memory, so it may only be called from sequential callbacks.
+    """
+    entry = CameraTransformCache.entries[
+        floor(abs(target_time) * CAMERA_TRANSFORM_CACHE_RESOLUTION) % CAMERA_TRANSFORM_CACHE_SIZE
+    ]
+    if not (entry.is_valid and entry.time == target_time and entry.left_limit == left_limit):
+        entry.is_valid = True
+        entry.time = target_time
+        entry.left_limit = left_limit
+        entry.transform @= layout_transform_at_camera(get_camera_info(target_time, left_limit=left_limit))
+    return entry.transform
+
+
 def current_layout_transform() -> LayoutTransform:
     return LayoutTransform(
         t=DynamicLayout.t,
@@ -1639,8 +1695,9 @@ def compute_hitbox_at_time(
     y_offset: float = 0.0,
     left_limit: bool = False,
 ) -> Hitbox:
+    """Compute the hitbox of a note at the given time, for sequential callbacks such as preprocess."""
     return compute_hitbox(
-        layout_transform_at_camera(get_camera_info(target_time, left_limit=left_limit)),
+        layout_transform_at_time(target_time, left_limit=left_limit),
         lane,
         size,
         leniency,
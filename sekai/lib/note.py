@@ -3,15 +3,19 @@ from enum import IntEnum, auto
 from typing import assert_never, cast
 
 from sonolus.script.archetype import EntityRef, HapticType, PlayArchetype, WatchArchetype, get_archetype_by_name
+from sonolus.script.array import Array, Dim
 from sonolus.script.bucket import Bucket, Judgment
+from sonolus.script.debug import debug_log
 from sonolus.script.easing import ease_in_cubic
 from sonolus.script.effect import Effect
-from sonolus.script.interval import lerp, remap_clamped
+from sonolus.script.globals import level_data
+from sonolus.script.interval import Interval, lerp, remap_clamped
 from sonolus.script.quad import Quad
 from sonolus.script.runtime import is_tutorial, is_watch, level_life, level_score, time
 from sonolus.script.sprite import Sprite
 from sonolus.script.vec import Vec2
 
+from sekai.debug import REPORT_SKIN_FALLBACKS
 from sekai.lib import archetype_names
 from sekai.lib.buckets import (
     EMPTY_JUDGMENT_WINDOW,
@@ -89,14 +93,16 @@ from sekai.lib.skin import (
 from sekai.lib.slot_effect import (
     SLOT_EFFECT_DURATION,
     SLOT_GLOW_EFFECT_DURATION,
+    SlotEffectPool,
+    add_pooled_slot_effect,
     draw_slot_effect,
     draw_slot_glow_effect,
 )
 from sekai.lib.timescale import (
     CompositeTime,
     group_force_note_speed,
+    group_next_time_in_scaled_range,
     group_scaled_time_to_first_time,
-    group_scaled_time_to_first_time_2,
 )
 
 
@@ -291,6 +297,17 @@ def mirror_flick_direction(direction: FlickDirection) -> FlickDirection:
             assert_never(direction)
 
 
+def get_visual_scaled_range(
+    timescale_group: int | EntityRef,
+    target_scaled_time: CompositeTime | float,
+) -> Interval:
+    """Return the range of group scaled times during which a note may be on screen."""
+    if isinstance(target_scaled_time, CompositeTime):
+        target_scaled_time = target_scaled_time.total
+    margin = preempt_time(group_force_note_speed(timescale_group)) * 3
+    return Interval(target_scaled_time - margin, target_scaled_time + margin)
+
+
 def get_visual_spawn_time(
     timescale_group: int | EntityRef,
     target_scaled_time: CompositeTime | float,
@@ -298,13 +315,29 @@ def get_visual_spawn_time(
     if isinstance(target_scaled_time, CompositeTime):
         target_scaled_time = target_scaled_time.total
     force_speed = group_force_note_speed(timescale_group)
+    visual_range = get_visual_scaled_range(timescale_group, target_scaled_time)
     return min(
-        group_scaled_time_to_first_time(timescale_group, target_scaled_time - preempt_time(force_speed) * 3),
-        group_scaled_time_to_first_time_2(timescale_group, target_scaled_time + preempt_time(force_speed) * 3),
+        group_scaled_time_to_first_time(timescale_group, visual_range.start),
+        group_scaled_time_to_first_time(timescale_group, visual_range.end),
         -2 if -3 <= progress_to(target_scaled_time, -2, force_speed) <= 6 else 1e8,
     )
 
 
+def get_visual_wake_time(
+    timescale_group: int | EntityRef,
+    target_scaled_time: CompositeTime | float,
+    time: float,
+    max_time: float,
+) -> float:
+    """Return a time at or after the given time, no later than the max time or when a note next comes back on screen.
+
+    Notes may leave the screen and come back when their group has negative timescales or hides notes for a while.
+    """
+    return group_next_time_in_scaled_range(
+        timescale_group, time, get_visual_scaled_range(timescale_group, target_scaled_time), max_time
+    )
+
+
 def get_attach_params(
     ease_type: EaseType,
     head_lane: float,
@@ -442,7 +475,65 @@ def note_kind_as_critical(kind: NoteKind) -> NoteKind:
             return kind
 
 
+NOTE_SPRITE_KIND_COUNT = NoteKind.ANCHOR + 1
+# Flick and trace flick notes, each normal and critical, have separate sprites when flicking down.
+FLICK_DOWN_SPRITE_SET_COUNT = 4
+
+
+@level_data
+class NoteSpriteLookup:
+    # Indexed by note_sprite_index, so drawing doesn't need to match on the kind. One set per kind, followed by the
+    # down flick sets.
+    sets: Array[NoteSpriteSet, Dim[NOTE_SPRITE_KIND_COUNT + FLICK_DOWN_SPRITE_SET_COUNT]]
+    # The index of the set used when flicking down, which is the kind itself for kinds without a down flick set.
+    down_indices: Array[int, Dim[NOTE_SPRITE_KIND_COUNT]]
+
+
+def note_sprite_index(kind: NoteKind, direction: FlickDirection) -> int:
+    if direction in {FlickDirection.UP_OMNI, FlickDirection.UP_LEFT, FlickDirection.UP_RIGHT}:
+        return kind
+    return NoteSpriteLookup.down_indices[kind]
+
+
+def flick_down_sprite_set_index(kind: NoteKind) -> int:
+    match kind:
+        case NoteKind.NORM_FLICK | NoteKind.NORM_HEAD_FLICK | NoteKind.NORM_TAIL_FLICK:
+            return 0
+        case NoteKind.CRIT_FLICK | NoteKind.CRIT_HEAD_FLICK | NoteKind.CRIT_TAIL_FLICK:
+            return 1
+        case NoteKind.NORM_TRACE_FLICK | NoteKind.NORM_HEAD_TRACE_FLICK | NoteKind.NORM_TAIL_TRACE_FLICK:
+            return 2
+        case NoteKind.CRIT_TRACE_FLICK | NoteKind.CRIT_HEAD_TRACE_FLICK | NoteKind.CRIT_TAIL_TRACE_FLICK:
+            return 3
+        case _:
+            return -1
+
+
+def init_note_sprite_lookup():
+    """Resolve the sprite set of every note kind, and the down flick sets, from the active skin.
+
+    With ``sekai.debug.REPORT_SKIN_FALLBACKS`` enabled, logs ``kind * 100 + body render type * 10 + arrow render
+    type`` for each kind, so the fallbacks selected for the loaded skin show up in the debug log.
+    """
+    for kind in range(NoteKind.NORM_TAP, NoteKind.ANCHOR + 1):
+        NoteSpriteLookup.sets[kind] @= resolve_note_sprite_set(kind, FlickDirection.UP_OMNI)
+        NoteSpriteLookup.down_indices[kind] = kind
+        down_index = flick_down_sprite_set_index(kind)
+        if down_index >= 0:
+            NoteSpriteLookup.down_indices[kind] = NOTE_SPRITE_KIND_COUNT + down_index
+            NoteSpriteLookup.sets[NOTE_SPRITE_KIND_COUNT + down_index] @= resolve_note_sprite_set(
+                kind, FlickDirection.DOWN_OMNI
+            )
+        if REPORT_SKIN_FALLBACKS:
+            sprite_set = NoteSpriteLookup.sets[kind]
+            debug_log(kind * 100 + sprite_set.body.render_type * 10 + sprite_set.arrow.render_type)
+
+
 def get_note_sprite_set(kind: NoteKind, direction: FlickDirection) -> NoteSpriteSet:
+    return NoteSpriteLookup.sets[note_sprite_index(kind, direction)]
+
+
+def resolve_note_sprite_set(kind: NoteKind, direction: FlickDirection) -> NoteSpriteSet:
     result = +NoteSpriteSet
     match kind:
         case NoteKind.NORM_TAP:
@@ -1000,6 +1091,20 @@ def schedule_note_slot_effects(
         return
     if not Options.slot_effect_enabled:
         return
+    if not is_watch():
+        # Play adds every lane of the hit to the slot effect pool in one go, from a single short-lived entity.
+        get_archetype_by_name(archetype_names.SLOT_EFFECT_REQUEST).spawn(
+            kind=kind,
+            lane=lane,
+            size=size,
+            start_time=target_time,
+            direction=direction,
+            judgment=judgment,
+            y_offset=y_offset,
+            pivot_lane=pivot_lane,
+            half_offset=half_offset,
+        )
+        return
     sprite_set = get_note_sprite_set(kind, direction)
     slot_sprite = sprite_set.slot
     if slot_sprite.is_available:
@@ -1015,6 +1120,32 @@ def schedule_note_slot_effects(
             )
 
 
+def add_note_slot_effects(
+    kind: NoteKind,
+    lane: float,
+    size: float,
+    start_time: float,
+    direction: FlickDirection,
+    judgment: Judgment,
+    y_offset: float = 0.0,
+    pivot_lane: float = 0.0,
+    half_offset: bool = False,
+):
+    sprite_set = get_note_sprite_set(kind, direction)
+    slot_sprite = sprite_set.slot
+    if slot_sprite.is_available:
+        end_time = start_time + SLOT_EFFECT_DURATION / Options.effect_animation_speed
+        for slot_lane in iter_slot_lanes(lane, size, pivot_lane=pivot_lane, half_offset=half_offset):
+            add_pooled_slot_effect(SlotEffectPool.slot_effects, slot_sprite, start_time, end_time, slot_lane, y_offset)
+    slot_glow_sprite = sprite_set.slot_glow.get_sprite(judgment)
+    if slot_glow_sprite.is_available:
+        end_time = start_time + SLOT_GLOW_EFFECT_DURATION / Options.effect_animation_speed
+        for slot_lane in iter_slot_lanes(lane, size):
+            add_pooled_slot_effect(
+                SlotEffectPool.slot_glow_effects, slot_glow_sprite, start_time, end_time, slot_lane, y_offset
+            )
+
+
 def draw_tutorial_note_slot_effects(
     kind: NoteKind,
     lane: float,
@@ -0,0 +1,157 @@
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from sonolus.script.archetype import entity_memory
+from sonolus.script.array import Array, Dim
+from sonolus.script.globals import level_memory
+from sonolus.script.interval import clamp
+from sonolus.script.quad import Rect
+from sonolus.script.record import Record
+from sonolus.script.runtime import screen
+
+from sekai.debug import PROFILE_FRAMES, PROFILE_INPUT
+from sekai.lib.layer import LAYER_GUIDE_CONNECTOR_OVER, get_z_alt
+from sekai.lib.skin import ActiveSkin
+
+if TYPE_CHECKING:
+    from sonolus.script.archetype import _BaseArchetype
+
+    _FrameProfiledBase = _BaseArchetype
+else:
+    _FrameProfiledBase = object
+
+
+class ProfileFamily(IntEnum):
+    NOTES = 0
+    CONNECTORS = 1
+    SIM_LINES = 2
+    STAGE = 3
+    PARTICLES = 4
+    UI = 5
+
+
+class FrameProfileCounts(Record):
+    entities: Array[int, Dim[6]]
+    draws: Array[int, Dim[6]]
+
+
+@level_memory
+class FrameProfile:
+    current: FrameProfileCounts
+    last: FrameProfileCounts
+
+
+class FrameProfiled(_FrameProfiledBase):
+    """Mixin for archetypes counted by the frame profiler when ``sekai.debug.PROFILE_FRAMES`` is enabled.
+
+    Level memory can't be written from update_parallel, so draw calls are tallied in entity memory and reported on
+    the entity's next update_sequential, one frame late.
+    """
+
+    profile_draws: int = entity_memory()
+
+    def profile_update(self, family: ProfileFamily):
+        if not PROFILE_FRAMES:
+            return
+        FrameProfile.current.entities[family] += 1
+        FrameProfile.current.draws[family] += self.profile_draws
+        self.profile_draws = 0
+
+    def profile_draw(self, count: int = 1):
+        if not PROFILE_FRAMES:
+            return
+        self.profile_draws += count
+
+
+class InputProfileCounts(Record):
+    """Input assignment counters for a single frame, recorded when ``sekai.debug.PROFILE_INPUT`` is enabled."""
+
+    # Notes taking tap or release input this frame, out of INPUT_PROFILE_CANDIDATE_CAPACITY.
+    tap_candidates: int
+    release_candidates: int
+    # Assignment rounds run by preassign_taps and preassign_releases.
+    tap_rounds: int
+    release_rounds: int
+    # Touch and note pairs skipped by preassign_releases because of a release lockout.
+    release_lockout_skips: int
+    # Touches rejected by is_allowed_empty and touches with a release lockout at the end of input assignment.
+    disallowed_empty_touches: int
+    disallowed_release_touches: int
+    # Candidate lists too crowded for the screen strip index, falling back to scanning every note.
+    bucket_overflows: int
+
+
+def begin_profile_frame():
+    FrameProfile.last @= FrameProfile.current
+    FrameProfile.current @= +FrameProfileCounts
+
+
+PROFILE_ROW_HEIGHT = 0.035
+PROFILE_BAR_GAP = 0.004
+PROFILE_UNIT_WIDTH = 0.004
+PROFILE_MAX_BAR_FRACTION = 0.45
+
+
+def draw_frame_profile(counts: FrameProfileCounts):
+    """Draw one row per family: entity count on top, draw calls below, both as bars from the left screen edge."""
+    if not PROFILE_FRAMES:
+        return
+    area = screen()
+    max_width = area.w * PROFILE_MAX_BAR_FRACTION
+    z = get_z_alt(LAYER_GUIDE_CONNECTOR_OVER, 5)
+    for family in range(len(counts.entities)):
+        top = area.t - PROFILE_ROW_HEIGHT * (family + 1) * 2
+        entities_width = clamp(counts.entities[family] * PROFILE_UNIT_WIDTH, 0, max_width)
+        draws_width = clamp(counts.draws[family] * PROFILE_UNIT_WIDTH, 0, max_width)
+        ActiveSkin.guide_neutral.draw(
+            Rect(l=area.l, r=area.l + entities_width, t=top, b=top - PROFILE_ROW_HEIGHT + PROFILE_BAR_GAP),
+            z=z,
+            a=0.8,
+        )
+        ActiveSkin.guide_red.draw(
+            Rect(
+                l=area.l,
+                r=area.l + draws_width,
+                t=top - PROFILE_ROW_HEIGHT,
+                b=top - 2 * PROFILE_ROW_HEIGHT + PROFILE_BAR_GAP,
+            ),
+            z=z,
+            a=0.8,
+        )
+
+
+# Matches the capacity of the active input note lists in play.
+INPUT_PROFILE_CANDIDATE_CAPACITY = 256
+
+
+def draw_input_profile(counts: InputProfileCounts):
+    """Draw one bar per input counter from the right screen edge, candidate lists scaled to their capacity."""
+    if not PROFILE_INPUT:
+        return
+    area = screen()
+    max_width = area.w * PROFILE_MAX_BAR_FRACTION
+    z = get_z_alt(LAYER_GUIDE_CONNECTOR_OVER, 5)
+    candidate_scale = max_width / INPUT_PROFILE_CANDIDATE_CAPACITY
+    widths = (
+        counts.tap_candidates * candidate_scale,
+        counts.release_candidates * candidate_scale,
+        counts.tap_rounds * PROFILE_UNIT_WIDTH,
+        counts.release_rounds * PROFILE_UNIT_WIDTH,
+        counts.release_lockout_skips * PROFILE_UNIT_WIDTH,
+        counts.disallowed_empty_touches * PROFILE_UNIT_WIDTH,
+        counts.disallowed_release_touches * PROFILE_UNIT_WIDTH,
+        counts.bucket_overflows * PROFILE_UNIT_WIDTH,
+    )
+    for row, width in enumerate(widths):
+        top = area.t - PROFILE_ROW_HEIGHT * row
+        sprite = ActiveSkin.guide_red if row < 2 else ActiveSkin.guide_neutral
+        sprite.draw(
+            Rect(
+                l=area.r - clamp(width, 0, max_width),
+                r=area.r,
+                t=top,
+                b=top - PROFILE_ROW_HEIGHT + PROFILE_BAR_GAP,
+            ),
+            z=z,
+            a=0.8,
+        )
@@ -1,10 +1,55 @@
+from sonolus.script.array import Array, Dim
+from sonolus.script.globals import level_memory
 from sonolus.script.interval import clamp, lerp, unlerp, unlerp_clamped
+from sonolus.script.record import Record
+from sonolus.script.runtime import time
 
 from sekai.lib.layer import LAYER_SIM_LINE, get_z
 from sekai.lib.layout import DynamicLayout, approach, get_alpha, layout_sim_line
 from sekai.lib.options import Options
 from sekai.lib.skin import ActiveSkin
 
+SIM_LINE_POINT_SLOTS = 128
+
+
+class SimLinePoint(Record):
+    lane: float
+    progress: float
+
+
+class PublishedSimLinePoint(Record):
+    owner: int
+    time: float
+    point: SimLinePoint
+
+
+@level_memory
+class SimLineMemory:
+    """Visual lanes and progresses of notes with sim lines, published by the notes once per frame.
+
+    Slots are picked by entity index, so two notes may share a slot. The owner and time of each entry are checked on
+    read, and a stale entry makes the reader compute the point itself.
+    """
+
+    points: Array[PublishedSimLinePoint, Dim[SIM_LINE_POINT_SLOTS]]
+
+
+def publish_sim_line_point(index: int, lane: float, progress: float):
+    entry = SimLineMemory.points[index % SIM_LINE_POINT_SLOTS]
+    entry.owner = index
+    entry.time = time()
+    entry.point.lane = lane
+    entry.point.progress = progress
+
+
+def has_published_sim_line_point(index: int) -> bool:
+    entry = SimLineMemory.points[index % SIM_LINE_POINT_SLOTS]
+    return entry.owner == index and entry.time == time()
+
+
+def published_sim_line_point(index: int) -> SimLinePoint:
+    return SimLineMemory.points[index % SIM_LINE_POINT_SLOTS].point
+
 
 def draw_sim_line(
     left_lane: float,
@@ -1,4 +1,7 @@
+from sonolus.script.array import Array, Dim
+from sonolus.script.globals import level_memory
 from sonolus.script.interval import lerp, unlerp_clamped
+from sonolus.script.record import Record
 from sonolus.script.runtime import time
 from sonolus.script.sprite import Sprite
 
@@ -10,6 +13,57 @@ from sekai.lib.particle import ActiveParticles
 
 SLOT_GLOW_EFFECT_DURATION = 0.25
 SLOT_EFFECT_DURATION = 0.5
+SLOT_EFFECT_POOL_SIZE = 64
+
+
+class SlotEffectEntry(Record):
+    sprite: Sprite
+    start_time: float
+    end_time: float
+    lane: float
+    y_offset: float
+
+
+@level_memory
+class SlotEffectPool:
+    """Live slot effects in play, drawn together by a single manager entity instead of an entity per effect."""
+
+    slot_effects: Array[SlotEffectEntry, Dim[SLOT_EFFECT_POOL_SIZE]]
+    slot_glow_effects: Array[SlotEffectEntry, Dim[SLOT_EFFECT_POOL_SIZE]]
+
+
+def add_pooled_slot_effect(
+    entries: Array[SlotEffectEntry, Dim[SLOT_EFFECT_POOL_SIZE]],
+    sprite: Sprite,
+    start_time: float,
+    end_time: float,
+    lane: float,
+    y_offset: float,
+):
+    """Add an effect to a pool.
+
+    A repeated hit restarts the live effect with the same sprite on the same lane rather than stacking a new one on
+    top. Otherwise the effect replaces whichever entry ends first, which is an expired one unless the pool is full.
+    """
+    target = 0
+    for i in range(len(entries)):
+        entry = entries[i]
+        if entry.lane == lane and entry.sprite.id == sprite.id and entry.end_time >= time():
+            target = i
+            break
+        if entry.end_time < entries[target].end_time:
+            target = i
+    entry = entries[target]
+    entry.sprite = sprite
+    entry.start_time = start_time
+    entry.end_time = end_time
+    entry.lane = lane
+    entry.y_offset = y_offset
+
+
+def is_pooled_slot_effect_live(entry: SlotEffectEntry) -> bool:
+    # Unused entries have equal start and end times.
+    return entry.start_time < entry.end_time and time() <= entry.end_time
 
 
 def draw_slot_glow_effect(
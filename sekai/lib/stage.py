@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from enum import IntEnum
 from math import ceil, cos, floor, pi
-from typing import Protocol, assert_never, cast
+from typing import TYPE_CHECKING, Any, Protocol, assert_never, cast
 
 from sonolus.script import runtime
-from sonolus.script.archetype import EntityRef, get_archetype_by_name
+from sonolus.script.archetype import EntityRef, get_archetype_by_name, shared_memory
 from sonolus.script.interval import clamp, interp, lerp, unlerp_clamped
 from sonolus.script.quad import Quad
 from sonolus.script.record import Record
@@ -192,6 +192,14 @@ class StageStyleChangeLike(Protocol):
     def index(self) -> int: ...
 
 
+class StageEventCursors(Record):
+    """The last mask, pivot and style change found for a stage, for resuming queries from."""
+
+    mask: EntityRef[Any]
+    pivot: EntityRef[Any]
+    style: EntityRef[Any]
+
+
 class DynamicStageLike(Protocol):
     from_start: bool
     until_end: bool
@@ -203,6 +211,14 @@ class DynamicStageLike(Protocol):
     def index(self) -> int: ...
 
 
+if TYPE_CHECKING:
+    from sonolus.script.archetype import _BaseArchetype
+
+    _CachedStagePropsBase = _BaseArchetype
+else:
+    _CachedStagePropsBase = object
+
+
 def _stage_mask_change_archetype() -> type[StageMaskChangeLike]:
     return cast(type[StageMaskChangeLike], get_archetype_by_name(archetype_names.STAGE_MASK_CHANGE))
 
@@ -278,17 +294,10 @@ def get_next_event_time(stage: DynamicStageLike, t: float) -> float:
     return result
 
 
-def get_stage_props(stage: DynamicStageLike, target_time: float | None = None, left_limit: bool = False) -> StageProps:
-    t = target_time if target_time is not None else runtime.time()
-    result = +StageProps
-    result.order = stage.index
-
-    first_mask_change_ref = stage.first_mask_change_ref
-    first_pivot_change_ref = stage.first_pivot_change_ref
-    first_style_change_ref = stage.first_style_change_ref
-
-    # Query mask changes
-    mask_a_ref, mask_b_ref = query_event_list(first_mask_change_ref, t, lambda e: e.time)
+def _query_stage_mask(
+    stage: DynamicStageLike, t: float, left_limit: bool, result: StageProps, cursor: EntityRef | None = None
+):
+    mask_a_ref, mask_b_ref = query_event_list(stage.first_mask_change_ref, t, lambda e: e.time, cursor)
     if left_limit and mask_a_ref.index > 0:
         mask_curr = get_event_as(mask_a_ref, _stage_mask_change_archetype())
         if mask_curr.time == t:
@@ -318,8 +327,11 @@ def get_stage_props(stage: DynamicStageLike, target_time: float | None = None, l
         result.lane = mask_b.lane
         result.width = mask_b.size
 
-    # Query pivot changes
-    pivot_a_ref, pivot_b_ref = query_event_list(first_pivot_change_ref, t, lambda e: e.time)
+
+def _query_stage_pivot(
+    stage: DynamicStageLike, t: float, left_limit: bool, result: StageProps, cursor: EntityRef | None = None
+):
+    pivot_a_ref, pivot_b_ref = query_event_list(stage.first_pivot_change_ref, t, lambda e: e.time, cursor)
     if left_limit and pivot_a_ref.index > 0:
         pivot_curr = get_event_as(pivot_a_ref, _stage_pivot_change_archetype())
         if pivot_curr.time == t:
@@ -357,8 +369,11 @@ def get_stage_props(stage: DynamicStageLike, target_time: float | None = None, l
         result.division.end @= result.division.start
         result.y_offset = pivot_b.y_offset
 
-    # Query style changes
-    style_a_ref, style_b_ref = query_event_list(first_style_change_ref, t, lambda e: e.time)
+
+def _query_stage_style(
+    stage: DynamicStageLike, t: float, left_limit: bool, result: StageProps, cursor: EntityRef | None = None
+):
+    style_a_ref, style_b_ref = query_event_list(stage.first_style_change_ref, t, lambda e: e.time, cursor)
     if left_limit and style_a_ref.index > 0:
         style_curr = get_event_as(style_a_ref, _stage_style_change_archetype())
         if style_curr.time == t:
@@ -408,9 +423,76 @@ def get_stage_props(stage: DynamicStageLike, target_time: float | None = None, l
         result.lane_alpha = style_b.lane_alpha
         result.judge_line_alpha = style_b.judge_line_alpha
 
+
+def get_stage_props(
+    stage: DynamicStageLike,
+    target_time: float | None = None,
+    left_limit: bool = False,
+    cursors: StageEventCursors | None = None,
+) -> StageProps:
+    t = target_time if target_time is not None else runtime.time()
+    result = +StageProps
+    result.order = stage.index
+    if cursors is not None:
+        _query_stage_mask(stage, t, left_limit, result, cursors.mask)
+        _query_stage_pivot(stage, t, left_limit, result, cursors.pivot)
+        _query_stage_style(stage, t, left_limit, result, cursors.style)
+    else:
+        _query_stage_mask(stage, t, left_limit, result)
+        _query_stage_pivot(stage, t, left_limit, result)
+        _query_stage_style(stage, t, left_limit, result)
+    return result
+
+
+def get_stage_pivot_props(
+    stage: DynamicStageLike, target_time: float | None = None, left_limit: bool = False
+) -> StageProps:
+    """Return stage props with only the pivot fields (pivot lane, division and y offset) set."""
+    t = target_time if target_time is not None else runtime.time()
+    result = +StageProps
+    result.order = stage.index
+    _query_stage_pivot(stage, t, left_limit, result)
     return result
 
 
+class CachedStageProps(_CachedStagePropsBase):
+    """Mixin for dynamic stages that evaluate their props once per frame for other entities to reuse.
+
+    Queries for the time the props were last evaluated at read them directly, and other queries only evaluate the
+    fields they need. Since playback mostly moves forward a frame at a time, the per-frame evaluation resumes each
+    event list from where the previous frame left off.
+    """
+
+    props: StageProps = shared_memory()
+    props_time: float = shared_memory()
+    event_cursors: StageEventCursors = shared_memory()
+
+    def init_props_cache(self):
+        self.props_time = -1e8
+
+    def update_props(self):
+        self.props @= get_stage_props(cast(DynamicStageLike, self), cursors=self.event_cursors)
+        self.props_time = runtime.time()
+
+    def pivot_props_at(self, t: float, left_limit: bool = False) -> StageProps:
+        result = +StageProps
+        if t == self.props_time and not left_limit:
+            result @= self.props
+        else:
+            result @= get_stage_pivot_props(cast(DynamicStageLike, self), t, left_limit=left_limit)
+        return result
+
+    def pivot_lane_at(self, t: float) -> float:
+        if t == self.props_time:
+            return self.props.pivot_lane
+        return get_stage_pivot_props(cast(DynamicStageLike, self), t).pivot_lane
+
+    def y_offset_at(self, t: float, left_limit: bool = False) -> float:
+        if t == self.props_time and not left_limit:
+            return self.props.y_offset
+        return get_stage_pivot_props(cast(DynamicStageLike, self), t, left_limit=left_limit).y_offset
+
+
 def draw_stage_and_accessories(
     z_stage_lane,
     z_stage_cover,
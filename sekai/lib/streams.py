@@ -3,6 +3,7 @@ from sonolus.script.containers import VarArray
 from sonolus.script.stream import Stream, StreamGroup, streams
 
 from sekai.lib.connector import ConnectorKind, ConnectorVisualState
+from sekai.lib.profiler import FrameProfileCounts, InputProfileCounts
 
 
 @streams
@@ -12,3 +13,5 @@ class Streams:
     connector_effect_kinds: StreamGroup[ConnectorKind, Dim[1_000_000]]
     fever_chance_counter: StreamGroup[float, Dim[1_000_000]]
     life: StreamGroup[float, Dim[1_000_000]]
+    frame_profile: Stream[FrameProfileCounts]
+    input_profile: Stream[InputProfileCounts]
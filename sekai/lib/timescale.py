@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 from math import inf
 from typing import Protocol, assert_never, cast
 
 from sonolus.script import runtime
 from sonolus.script.archetype import EntityRef, get_archetype_by_name
-from sonolus.script.interval import remap
+from sonolus.script.interval import Interval, remap
 from sonolus.script.record import Record
 from sonolus.script.timing import TimescaleEase, beat_to_bpm, beat_to_time
 
 from sekai.lib import archetype_names
+from sekai.lib.baseevent import init_event_list, query_event_list
 from sekai.lib.options import Options
 
 MIN_START_TIME = -2.0
@@ -46,6 +47,11 @@ class TimescaleChangeLike(Protocol):
     timescale_ease: TimescaleEase
     hide_notes: bool
     next_ref: EntityRef
+    prev_ref: EntityRef
+    time: float
+    scaled_time: CompositeTime
+    min_scaled_time: float
+    max_scaled_time: float
 
     @classmethod
     def at(cls, index: int) -> TimescaleChangeLike: ...
@@ -53,13 +59,11 @@ class TimescaleChangeLike(Protocol):
     @property
     def index(self) -> int: ...
 
+    def ref(self) -> EntityRef: ...
+
 
 class TimescaleGroupLike(Protocol):
     first_ref: EntityRef
-    time_to_scaled_time: TimeToScaledTime
-    time_to_last_change_index: TimeToLastChangeIndex
-    scaled_time_to_first_time: ScaledTimeToFirstTime
-    scaled_time_to_first_time_2: ScaledTimeToFirstTime
     current_scaled_time: CompositeTime
     hide_notes: bool
     force_note_speed: float
@@ -70,205 +74,79 @@ class TimescaleGroupLike(Protocol):
     def update(self) -> None: ...
 
 
-class TimeToScaledTime(Record):
-    last_timescale: float
-    last_time: float
-    last_scaled_time: CompositeTime
-    last_ease: TimescaleEase
-    first_change_index: int
-    next_change_index: int
-
-    def init(self, next_index: int):
-        self.first_change_index = next_index
-        self.reset()
-
-    def reset(self):
-        self.last_timescale = 1.0
-        self.last_time = MIN_START_TIME
-        self.last_scaled_time.base = MIN_START_TIME
-        self.last_scaled_time.delta = 0.0
-        self.last_ease = TimescaleEase.NONE
-        self.next_change_index = self.first_change_index
-
-    def get(self, time: float) -> CompositeTime:
-        result = +CompositeTime
-        if time <= MIN_START_TIME or Options.disable_timescale:
-            result.base = time
-            result.delta = 0.0
-            return result
-        if time < self.last_time:
-            self.reset()
-        for change in iter_timescale_changes(self.next_change_index):
-            next_timescale = change.timescale
-            next_time = beat_to_time(change.beat)
-            next_scaled_time = +CompositeTime
-            match self.last_ease:
-                case TimescaleEase.NONE:
-                    next_scaled_time @= self.last_scaled_time + (next_time - self.last_time) * self.last_timescale
-                case TimescaleEase.LINEAR:
-                    next_scaled_time @= (
-                        self.last_scaled_time
-                        + (next_time - self.last_time) * (next_timescale + self.last_timescale) / 2
-                    )
-                case _:
-                    assert_never(self.last_ease)
-            skip_scaled_time = change.timescale_skip * 60 / beat_to_bpm(change.beat)
-            if time == next_time:
-                result @= next_scaled_time + skip_scaled_time
-                return result
-            if time < next_time:
-                if abs(next_time - self.last_time) < 1e-6:
-                    result @= self.last_scaled_time
-                    return result
-                match self.last_ease:
-                    case TimescaleEase.NONE:
-                        result @= self.last_scaled_time + (time - self.last_time) * self.last_timescale
-                        return result
-                    case TimescaleEase.LINEAR:
-                        avg_timescale = (
-                            self.last_timescale
-                            + remap(self.last_time, next_time, self.last_timescale, next_timescale, time)
-                        ) / 2
-                        result @= self.last_scaled_time + (time - self.last_time) * avg_timescale
-                        return result
-                    case _:
-                        assert_never(self.last_ease)
-            self.last_timescale = next_timescale
-            self.last_time = next_time
-            self.last_scaled_time @= next_scaled_time + skip_scaled_time
-            self.last_ease = change.timescale_ease
-            self.next_change_index = change.next_ref.index
-        result @= self.last_scaled_time + (time - self.last_time) * self.last_timescale
-        return result
-
+class TimescaleSegment(Record):
+    """The part of a group from just after one change (including its skip) up to the next change."""
 
-class TimeToLastChangeIndex(Record):
-    last_time: float
-    first_change_index: int
-    current_change_index: int
+    timescale: float
+    time: float
+    scaled_time: CompositeTime
+    ease: TimescaleEase
+    hide_notes: bool
     next_change_index: int
 
-    def init(self, next_index: int):
-        self.first_change_index = next_index
-        self.reset()
-
-    def reset(self):
-        self.last_time = MIN_START_TIME
-        self.current_change_index = 0
-        self.next_change_index = self.first_change_index
-
-    def get(self, time: float) -> int:
-        if time < self.last_time:
-            self.reset()
-        for change in iter_timescale_changes(self.next_change_index):
-            next_time = beat_to_time(change.beat)
-            if time < next_time:
-                return self.current_change_index
-            self.last_time = next_time
-            self.current_change_index = change.index
-            self.next_change_index = change.next_ref.index
-        return self.current_change_index
-
-
-class ScaledTimeToFirstTime(Record):
-    last_timescale: float
-    last_time: float
-    last_scaled_time: CompositeTime
-    last_ease: TimescaleEase
-    first_change_index: int
-    next_change_index: int
-    last_query_scaled_time: float
-
-    def init(self, next_index: int):
-        self.first_change_index = next_index
-        self.reset()
-
-    def reset(self):
-        self.last_timescale = 1.0
-        self.last_time = MIN_START_TIME
-        self.last_scaled_time.base = MIN_START_TIME
-        self.last_scaled_time.delta = 0.0
-        self.last_ease = TimescaleEase.NONE
-        self.next_change_index = self.first_change_index
-        self.last_query_scaled_time = MIN_START_TIME
-
-    def get(self, scaled_time: float) -> float:
-        if Options.disable_timescale:
-            return scaled_time
-        if scaled_time < self.last_query_scaled_time or self.last_query_scaled_time < MIN_START_TIME:
-            self.reset()
-        self.last_query_scaled_time = scaled_time
-        for change in iter_timescale_changes(self.next_change_index):
-            next_timescale = change.timescale
-            next_time = beat_to_time(change.beat)
-            next_scaled_time = +CompositeTime
-            match self.last_ease:
-                case TimescaleEase.NONE:
-                    next_scaled_time @= self.last_scaled_time + (next_time - self.last_time) * self.last_timescale
-                    lst_tot = self.last_scaled_time.total
-                    nst_tot = next_scaled_time.total
-                    if (lst_tot <= scaled_time <= nst_tot and self.last_timescale > 0) or (
-                        lst_tot >= scaled_time >= nst_tot and self.last_timescale < 0
-                    ):
-                        if abs(nst_tot - lst_tot) < 1e-6:
-                            return self.last_time
-                        return remap(lst_tot, nst_tot, self.last_time, next_time, scaled_time)
-                case TimescaleEase.LINEAR:
-                    next_scaled_time @= (
-                        self.last_scaled_time
-                        + (next_time - self.last_time) * (next_timescale + self.last_timescale) / 2
-                    )
-                    lst_tot = self.last_scaled_time.total
-                    nst_tot = next_scaled_time.total
-                    if abs(next_time - self.last_time) < 1e-6:
-                        lo_scaled_time = min(lst_tot, nst_tot)
-                        hi_scaled_time = max(lst_tot, nst_tot)
-                        if lo_scaled_time <= scaled_time <= hi_scaled_time:
-                            return self.last_time
-                    else:
-                        a = (next_timescale - self.last_timescale) / (next_time - self.last_time)
-                        b = self.last_timescale
-                        c = lst_tot - scaled_time
-
-                        first_time = inf
-                        found_time = False
-
-                        if abs(a) < 1e-6:
-                            if abs(b) > 1e-6:
-                                dt = -c / b
-                                if 0 <= dt <= (next_time - self.last_time):
-                                    first_time = min(first_time, self.last_time + dt)
-                                    found_time = True
-                        else:
-                            discriminant = b * b - 2 * a * c
-                            if discriminant >= 0:
-                                sqrt_discriminant = discriminant**0.5
-                                for dt in ((-b + sqrt_discriminant) / a, (-b - sqrt_discriminant) / a):
-                                    if 0 <= dt <= (next_time - self.last_time):
-                                        first_time = min(first_time, self.last_time + dt)
-                                        found_time = True
-
-                        if found_time:
-                            return first_time
-                case _:
-                    assert_never(self.last_ease)
-            skip_scaled_time = change.timescale_skip * 60 / beat_to_bpm(change.beat)
-            nst_tot = next_scaled_time.total
-            if (nst_tot <= scaled_time <= nst_tot + skip_scaled_time) or (
-                nst_tot + skip_scaled_time <= scaled_time <= nst_tot
-            ):
-                return next_time
-            self.last_timescale = next_timescale
-            self.last_time = next_time
-            self.last_scaled_time @= next_scaled_time + skip_scaled_time
-            self.last_ease = change.timescale_ease
-            self.next_change_index = change.next_ref.index
-        if self.last_timescale == 0:
+    def init_first(self, first_index: int):
+        self.timescale = 1.0
+        self.time = MIN_START_TIME
+        self.scaled_time.base = MIN_START_TIME
+        self.scaled_time.delta = 0.0
+        self.ease = TimescaleEase.NONE
+        self.hide_notes = False
+        self.next_change_index = first_index
+
+    def init_after(self, change: TimescaleChangeLike):
+        self.timescale = change.timescale
+        self.time = change.time
+        self.scaled_time @= change.scaled_time
+        self.ease = change.timescale_ease
+        self.hide_notes = change.hide_notes
+        self.next_change_index = change.next_ref.index
+
+    def first_time_in_scaled_range(self, time: float, end_time: float, scaled_range: Interval) -> float:
+        """Return a time in [time, end_time] no later than when this segment first reaches the scaled range, or inf.
+
+        The end time must be no later than the next change. The time is exact while the timescale is constant. Eased
+        segments return the given time if they reach the range anywhere before the next change, since an early
+        estimate is safe for callers waiting on the range. The last segment of a group has no end and keeps its
+        timescale, so it is treated as constant.
+        """
+        if self.ease == TimescaleEase.LINEAR and self.next_change_index > 0:
+            change = timescale_change_archetype().at(self.next_change_index)
+            start_scaled_time = self.scaled_time.total
+            end_scaled_time = self.end_scaled_time(change).total
+            lo = min(start_scaled_time, end_scaled_time)
+            hi = max(start_scaled_time, end_scaled_time)
+            if self.timescale * change.timescale < 0:
+                duration = change.time - self.time
+                turn_dt = self.timescale * duration / (self.timescale - change.timescale)
+                turn_scaled_time = start_scaled_time + turn_dt * self.timescale / 2
+                lo = min(lo, turn_scaled_time)
+                hi = max(hi, turn_scaled_time)
+            if lo <= scaled_range.end and scaled_range.start <= hi:
+                return time
             return inf
-        additional_time = (scaled_time - self.last_scaled_time.total) / self.last_timescale
-        if additional_time < 0:
+        scaled_time = (self.scaled_time + (time - self.time) * self.timescale).total
+        if scaled_time in scaled_range:
+            return time
+        entry_time = inf
+        if self.timescale > 0 and scaled_time < scaled_range.start:
+            entry_time = time + (scaled_range.start - scaled_time) / self.timescale
+        elif self.timescale < 0 and scaled_time > scaled_range.end:
+            entry_time = time + (scaled_range.end - scaled_time) / self.timescale
+        if entry_time > end_time:
             return inf
-        return self.last_time + additional_time
+        return entry_time
+
+    def end_scaled_time(self, change: TimescaleChangeLike) -> CompositeTime:
+        """Return the scaled time on reaching the given change at the end of this segment, before its skip."""
+        result = +CompositeTime
+        match self.ease:
+            case TimescaleEase.NONE:
+                result @= self.scaled_time + (change.time - self.time) * self.timescale
+            case TimescaleEase.LINEAR:
+                result @= self.scaled_time + (change.time - self.time) * (change.timescale + self.timescale) / 2
+            case _:
+                assert_never(self.ease)
+        return result
 
 
 def timescale_change_archetype() -> type[TimescaleChangeLike]:
@@ -279,6 +157,194 @@ def timescale_group_archetype() -> type[TimescaleGroupLike]:
     return cast(type[TimescaleGroupLike], get_archetype_by_name(archetype_names.TIMESCALE_GROUP))
 
 
+def init_timescale_changes(first_ref: EntityRef):
+    """Compute the time and cumulative scaled time of each change in a group and build its skip list.
+
+    The scaled time stored on each change is the scaled time immediately after the change, including its skip.
+    The min and max scaled time stored on each change cover every scaled time reached from the start of the group up
+    to and including the change. Since scaled time is continuous apart from skips, every value in that range is reached.
+    """
+    segment = +TimescaleSegment
+    segment.init_first(first_ref.index)
+    min_scaled_time = MIN_START_TIME
+    max_scaled_time = MIN_START_TIME
+    for change in iter_timescale_changes(first_ref.index):
+        change.time = beat_to_time(change.beat)
+        end_scaled_time = segment.end_scaled_time(change)
+        if segment.ease == TimescaleEase.LINEAR and segment.timescale * change.timescale < 0:
+            # The timescale crosses zero inside the segment, so the scaled time turns around there.
+            duration = change.time - segment.time
+            turn_dt = segment.timescale * duration / (segment.timescale - change.timescale)
+            turn_scaled_time = (segment.scaled_time + turn_dt * segment.timescale / 2).total
+            min_scaled_time = min(min_scaled_time, turn_scaled_time)
+            max_scaled_time = max(max_scaled_time, turn_scaled_time)
+        change.scaled_time @= end_scaled_time + change.timescale_skip * 60 / beat_to_bpm(change.beat)
+        min_scaled_time = min(min_scaled_time, end_scaled_time.total, change.scaled_time.total)
+        max_scaled_time = max(max_scaled_time, end_scaled_time.total, change.scaled_time.total)
+        change.min_scaled_time = min_scaled_time
+        change.max_scaled_time = max_scaled_time
+        segment.init_after(change)
+    init_event_list(first_ref)
+
+
+def last_timescale_change_before(first_index: int, key: float, accessor: Callable[[TimescaleChangeLike], float]) -> int:
+    """Return the index of the last change whose key is strictly less than the given key, or 0 if there is none.
+
+    The key must never decrease along the group.
+    """
+    if first_index <= 0:
+        return 0
+    first = timescale_change_archetype().at(first_index)
+    last_ref, _ = query_event_list(first.ref(), key, accessor)
+    index = last_ref.index
+    # The skip list finds the last change with a key <= the given key, so step back over any exact matches.
+    while index > 0 and accessor(timescale_change_archetype().at(index)) >= key:
+        index = timescale_change_archetype().at(index).prev_ref.index
+    return index
+
+
+def timescale_segment_before(
+    first_index: int, key: float, accessor: Callable[[TimescaleChangeLike], float]
+) -> TimescaleSegment:
+    result = +TimescaleSegment
+    index = last_timescale_change_before(first_index, key, accessor)
+    if index > 0:
+        result.init_after(timescale_change_archetype().at(index))
+    else:
+        result.init_first(first_index)
+    return result
+
+
+def last_timescale_change_index_at(first_index: int, time: float) -> int:
+    if first_index <= 0:
+        return 0
+    first = timescale_change_archetype().at(first_index)
+    last_ref, _ = query_event_list(first.ref(), time, lambda e: e.time)
+    return last_ref.index
+
+
+def time_to_scaled_time(first_index: int, time: float) -> CompositeTime:
+    result = +CompositeTime
+    if time <= MIN_START_TIME or Options.disable_timescale:
+        result.base = time
+        result.delta = 0.0
+        return result
+    segment = timescale_segment_before(first_index, time, lambda e: e.time)
+    if segment.next_change_index <= 0:
+        result @= segment.scaled_time + (time - segment.time) * segment.timescale
+        return result
+    change = timescale_change_archetype().at(segment.next_change_index)
+    if time >= change.time:
+        result @= change.scaled_time
+        return result
+    if abs(change.time - segment.time) < 1e-6:
+        result @= segment.scaled_time
+        return result
+    match segment.ease:
+        case TimescaleEase.NONE:
+            result @= segment.scaled_time + (time - segment.time) * segment.timescale
+        case TimescaleEase.LINEAR:
+            avg_timescale = (
+                segment.timescale + remap(segment.time, change.time, segment.timescale, change.timescale, time)
+            ) / 2
+            result @= segment.scaled_time + (time - segment.time) * avg_timescale
+        case _:
+            assert_never(segment.ease)
+    return result
+
+
+def scaled_time_to_first_time(first_index: int, scaled_time: float) -> float:
+    if Options.disable_timescale:
+        return scaled_time
+    # Start from the last change whose reached range doesn't include the scaled time yet, so the next change
+    # is the first one whose segment or skip reaches it. The distance outside the range never increases.
+    segment = timescale_segment_before(
+        first_index,
+        0.0,
+        lambda e: -max(e.min_scaled_time - scaled_time, scaled_time - e.max_scaled_time),
+    )
+    # This normally finishes on the first change, but keeps going in case of rounding error.
+    for change in iter_timescale_changes(segment.next_change_index):
+        next_scaled_time = segment.end_scaled_time(change)
+        lst_tot = segment.scaled_time.total
+        nst_tot = next_scaled_time.total
+        match segment.ease:
+            case TimescaleEase.NONE:
+                if (lst_tot <= scaled_time <= nst_tot and segment.timescale > 0) or (
+                    lst_tot >= scaled_time >= nst_tot and segment.timescale < 0
+                ):
+                    if abs(nst_tot - lst_tot) < 1e-6:
+                        return segment.time
+                    return remap(lst_tot, nst_tot, segment.time, change.time, scaled_time)
+            case TimescaleEase.LINEAR:
+                if abs(change.time - segment.time) < 1e-6:
+                    lo_scaled_time = min(lst_tot, nst_tot)
+                    hi_scaled_time = max(lst_tot, nst_tot)
+                    if lo_scaled_time <= scaled_time <= hi_scaled_time:
+                        return segment.time
+                else:
+                    a = (change.timescale - segment.timescale) / (change.time - segment.time)
+                    b = segment.timescale
+                    c = lst_tot - scaled_time
+
+                    first_time = inf
+                    found_time = False
+
+                    if abs(a) < 1e-6:
+                        if abs(b) > 1e-6:
+                            dt = -c / b
+                            if 0 <= dt <= (change.time - segment.time):
+                                first_time = min(first_time, segment.time + dt)
+                                found_time = True
+                    else:
+                        discriminant = b * b - 2 * a * c
+                        if discriminant >= 0:
+                            sqrt_discriminant = discriminant**0.5
+                            for dt in ((-b + sqrt_discriminant) / a, (-b - sqrt_discriminant) / a):
+                                if 0 <= dt <= (change.time - segment.time):
+                                    first_time = min(first_time, segment.time + dt)
+                                    found_time = True
+
+                    if found_time:
+                        return first_time
+            case _:
+                assert_never(segment.ease)
+        cst_tot = change.scaled_time.total
+        if (nst_tot <= scaled_time <= cst_tot) or (cst_tot <= scaled_time <= nst_tot):
+            return change.time
+        segment.init_after(change)
+    if segment.timescale == 0:
+        return inf
+    additional_time = (scaled_time - segment.scaled_time.total) / segment.timescale
+    if additional_time < 0:
+        return inf
+    return segment.time + additional_time
+
+
+def next_time_in_scaled_range(first_index: int, time: float, scaled_range: Interval, max_time: float) -> float:
+    """Return a time at or after the given time, no later than when the group next shows notes in the scaled range.
+
+    Stretches where the group hides notes are skipped. Changes at or after the max time are not walked, and the max
+    time is returned if notes in the range aren't shown before it.
+    """
+    if Options.disable_timescale:
+        if time > scaled_range.end:
+            return max_time
+        return min(max(time, scaled_range.start), max_time)
+    segment = timescale_segment_before(first_index, time, lambda e: e.time)
+    for change in iter_timescale_changes(segment.next_change_index):
+        if change.time >= max_time:
+            break
+        if not segment.hide_notes:
+            entry_time = segment.first_time_in_scaled_range(max(time, segment.time), change.time, scaled_range)
+            if entry_time < inf:
+                return entry_time
+        segment.init_after(change)
+    if segment.hide_notes:
+        return max_time
+    return min(segment.first_time_in_scaled_range(max(time, segment.time), max_time, scaled_range), max_time)
+
+
 def iter_timescale_changes(index: int) -> Iterator[TimescaleChangeLike]:
     while True:
         if index <= 0:
@@ -326,7 +392,7 @@ def iter_timescale_changes_in_group_from_time(
     if group <= 0 or Options.disable_timescale:
         return
     group_entity = timescale_group_archetype().at(group)
-    next_index = group_entity.time_to_last_change_index.get(time)
+    next_index = last_timescale_change_index_at(group_entity.first_ref.index, time)
     if next_index <= 0:
         next_index = group_entity.first_ref.index
     while next_index > 0:
@@ -341,8 +407,12 @@ def group_time_to_scaled_time(
 ) -> CompositeTime:
     if isinstance(group, EntityRef):
         group = group.index
-    group_entity = timescale_group_archetype().at(group)
-    return group_entity.time_to_scaled_time.get(time)
+    result = +CompositeTime
+    if group <= 0:
+        result.base = time
+    else:
+        result @= time_to_scaled_time(timescale_group_archetype().at(group).first_ref.index, time)
+    return result
 
 
 def group_scaled_time_to_first_time(
@@ -351,19 +421,26 @@ def group_scaled_time_to_first_time(
 ) -> float:
     if isinstance(group, EntityRef):
         group = group.index
-    group_entity = timescale_group_archetype().at(group)
-    return group_entity.scaled_time_to_first_time.get(scaled_time)
+    if group <= 0:
+        return scaled_time
+    return scaled_time_to_first_time(timescale_group_archetype().at(group).first_ref.index, scaled_time)
 
 
-def group_scaled_time_to_first_time_2(
+def group_next_time_in_scaled_range(
     group: int | EntityRef,
-    scaled_time: float,
+    time: float,
+    scaled_range: Interval,
+    max_time: float,
 ) -> float:
-    # This is a second function so that we don't have to reset the timescale groups as often
     if isinstance(group, EntityRef):
         group = group.index
-    group_entity = timescale_group_archetype().at(group)
-    return group_entity.scaled_time_to_first_time_2.get(scaled_time)
+    if group <= 0:
+        if time > scaled_range.end:
+            return max_time
+        return min(max(time, scaled_range.start), max_time)
+    return next_time_in_scaled_range(
+        timescale_group_archetype().at(group).first_ref.index, time, scaled_range, max_time
+    )
 
 
 def update_timescale_group(group: int | EntityRef) -> None:
@@ -18,6 +18,7 @@ from sekai.lib.connector import (
     CONNECTOR_TRAIL_SPAWN_PERIOD,
     ActiveConnectorInfo,
     ConnectorKind,
+    ConnectorTessellation,
     ConnectorVisualState,
     destroy_looped_particle,
     destroy_looped_sfx,
@@ -26,6 +27,7 @@ from sekai.lib.connector import (
     schedule_connector_sfx,
     spawn_connector_slot_particles,
     spawn_linear_connector_trail_particle,
+    tessellate_connector,
     update_circular_connector_particle,
     update_connector_sfx,
     update_linear_connector_particle,
@@ -34,7 +36,7 @@ from sekai.lib.ease import EaseType, ease
 from sekai.lib.layout import compute_hitbox, current_layout_transform
 from sekai.lib.note import draw_hitbox_bounds_overlay, draw_slide_note_head, get_attach_params
 from sekai.lib.options import Options
-from sekai.lib.stage import get_stage_props
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 from sekai.lib.streams import Streams
 from sekai.lib.timescale import (
     group_hide_notes,
@@ -51,7 +53,7 @@ def legacy_note_duration() -> float:
     return lerp(0.35, 4, unlerp_clamped(12, 1, Options.note_speed) ** 1.31)
 
 
-class Connector(PlayArchetype):
+class Connector(PlayArchetype, FrameProfiled):
     name = archetype_names.CONNECTOR
 
     head_ref: EntityRef[note.BaseNote] = imported(name="head")
@@ -72,6 +74,7 @@ class Connector(PlayArchetype):
     last_visual_state: ConnectorVisualState = entity_memory()
     delay: bool = entity_memory()
     can_consume_empty: bool = entity_memory()
+    tessellation: ConnectorTessellation = entity_memory()
 
     @callback(order=1)  # After note preprocessing is done
     def preprocess(self):
@@ -107,6 +110,17 @@ class Connector(PlayArchetype):
             self.end_time = max(self.visual_active_interval.end, self.input_active_interval.end)
         if self.segment_head.segment_through_judge_line:
             self.end_time += CONNECTOR_THROUGH_JUDGE_LINE_DESPAWN_DELAY
+        tessellate_connector(
+            self.tessellation,
+            self.kind,
+            self.ease_type,
+            head_lane=head.lane,
+            head_size=head.size,
+            head_ease_frac=head.head_ease_frac,
+            tail_lane=tail.lane,
+            tail_size=tail.size,
+            tail_ease_frac=tail.tail_ease_frac,
+        )
         self.last_visual_state = ConnectorVisualState.WAITING
         self.can_consume_empty = True
         if self.active_head_ref.index > 0:
@@ -161,6 +175,7 @@ class Connector(PlayArchetype):
 
     @callback(order=-1)
     def update_sequential(self):
+        self.profile_update(ProfileFamily.CONNECTORS)
         current_time = time()
 
         if current_time >= self.end_time:
@@ -302,6 +317,7 @@ class Connector(PlayArchetype):
                 head_visual_progress = head.visual_progress
                 head_target_time = head.target_time
                 head_ease_frac = head.head_ease_frac
+            self.profile_draw()
             draw_connector(
                 kind=self.kind,
                 visual_state=visual_state,
@@ -323,6 +339,7 @@ class Connector(PlayArchetype):
                 segment_tail_alpha=segment_tail.segment_alpha,
                 layer=segment_head.segment_layer,
                 bypass_tail_target_time_check=segment_head.segment_through_judge_line,
+                tessellation=self.tessellation,
             )
         if Options.show_hitboxes and self.active_head_ref.index > 0 and time() in self.input_active_interval:
             draw_hitbox_bounds_overlay(self.active_connector_info.input_bounds, 0.6)
@@ -331,7 +348,7 @@ class Connector(PlayArchetype):
         head = self.head_ref.get().effective_attach_head
         tail = self.tail_ref.get().effective_attach_tail
         if head.stage_ref.index > 0 and head.stage_ref.index == tail.stage_ref.index:
-            pivot_lane = get_stage_props(head.stage_ref.get(), target_time).pivot_lane
+            pivot_lane = head.stage_ref.get().pivot_lane_at(target_time)
             head_lane = pivot_lane + head.rel_lane
             tail_lane = pivot_lane + tail.rel_lane
         else:
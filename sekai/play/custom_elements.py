@@ -17,6 +17,7 @@ from sekai.lib.custom_elements import (
 )
 from sekai.lib.initialization import calculate_note_weight
 from sekai.lib.options import Options
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 from sekai.play import initialization, note
 from sekai.play.events import Fever
 
@@ -57,7 +58,7 @@ class ComboJudgeMemory:
     latest_judge_id: int
 
 
-class ComboJudge(PlayArchetype):
+class ComboJudge(PlayArchetype, FrameProfiled):
     target_time: float = entity_memory()
     spawn_time: float = entity_memory()
     judgment: Judgment = entity_memory()
@@ -82,6 +83,7 @@ class ComboJudge(PlayArchetype):
         if self.my_judge_id != ComboJudgeMemory.latest_judge_id:
             self.despawn = True
             return
+        self.profile_draw(3)
         draw_combo_label(ap=ComboJudgeMemory.ap, z=self.z, z1=self.z1, combo=self.combo)
         draw_combo_number(
             draw_time=self.spawn_time, ap=ComboJudgeMemory.ap, combo=self.combo, z=self.z, z1=self.z1, z2=self.z2
@@ -96,6 +98,7 @@ class ComboJudge(PlayArchetype):
 
     @callback(order=3)
     def update_sequential(self):
+        self.profile_update(ProfileFamily.UI)
         if self.check:
             return
         self.check = True
@@ -235,7 +238,7 @@ class JudgmentAccuracyMemory:
     combo_check: int
 
 
-class JudgmentAccuracy(PlayArchetype):
+class JudgmentAccuracy(PlayArchetype, FrameProfiled):
     spawn_time: float = entity_memory()
     judgment: Judgment = entity_memory()
     accuracy: float = entity_memory()
@@ -256,6 +259,7 @@ class JudgmentAccuracy(PlayArchetype):
         if time() >= self.spawn_time + 0.5:
             self.despawn = True
             return
+        self.profile_draw()
         draw_judgment_accuracy(
             judgment=self.judgment,
             accuracy=self.accuracy,
@@ -266,6 +270,7 @@ class JudgmentAccuracy(PlayArchetype):
 
     @callback(order=3)
     def update_sequential(self):
+        self.profile_update(ProfileFamily.UI)
         if self.check:
             return
         self.check = True
@@ -278,7 +283,7 @@ class DamageFlashMemory:
     combo_check: int
 
 
-class DamageFlash(PlayArchetype):
+class DamageFlash(PlayArchetype, FrameProfiled):
     spawn_time: float = entity_memory()
     check: bool = entity_memory()
     combo: int = entity_memory()
@@ -295,10 +300,12 @@ class DamageFlash(PlayArchetype):
         if time() >= self.spawn_time + 0.35:
             self.despawn = True
             return
+        self.profile_draw()
         draw_damage_flash(draw_time=self.spawn_time, z=self.z)
 
     @callback(order=3)
     def update_sequential(self):
+        self.profile_update(ProfileFamily.UI)
         if self.check:
             return
         self.check = True
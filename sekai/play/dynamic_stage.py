@@ -9,7 +9,6 @@ from sonolus.script.archetype import (
     callback,
     entity_data,
     imported,
-    shared_memory,
 )
 from sonolus.script.interval import clamp
 from sonolus.script.runtime import time, touches
@@ -22,15 +21,15 @@ from sekai.lib.events import Fever, draw_judgment_effect
 from sekai.lib.layout import ZoomVerticalAlign, layout_lane_area, preempt_time, touch_to_lane
 from sekai.lib.level_config import LevelConfig
 from sekai.lib.options import Options
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 from sekai.lib.stage import (
+    CachedStageProps,
     DivisionParity,
     JudgeLineColor,
     StageBorderStyle,
-    StageProps,
     get_draw_end_time,
     get_draw_start_time,
     get_end_time,
-    get_stage_props,
     get_start_time,
     play_lane_hit_effects,
 )
@@ -76,7 +75,7 @@ class CameraChange(PlayArchetype, BaseEvent):
         return False
 
 
-class DynamicStage(PlayArchetype):
+class DynamicStage(PlayArchetype, FrameProfiled, CachedStageProps):
     name = archetype_names.STAGE
 
     from_start: bool = imported(name="fromStart")
@@ -90,8 +89,6 @@ class DynamicStage(PlayArchetype):
     draw_start_time: float = entity_data()
     draw_end_time: float = entity_data()
 
-    props: StageProps = shared_memory()
-
     @callback(order=-2)
     def preprocess(self):
         LevelConfig.dynamic_stages = True
@@ -99,6 +96,7 @@ class DynamicStage(PlayArchetype):
         init_event_list(self.first_mask_change_ref)
         init_event_list(self.first_pivot_change_ref)
         init_event_list(self.first_style_change_ref)
+        self.init_props_cache()
         self.start_time = get_start_time(self)
         self.end_time = get_end_time(self)
         self.draw_start_time = get_draw_start_time(self)
@@ -112,7 +110,8 @@ class DynamicStage(PlayArchetype):
 
     @callback(order=-1)
     def update_sequential(self):
-        self.props @= get_stage_props(self)
+        self.profile_update(ProfileFamily.STAGE)
+        self.update_props()
         if time() >= self.end_time:
             self.despawn = True
             return
@@ -190,6 +189,7 @@ class DynamicStage(PlayArchetype):
         t = time()
         if t < self.draw_start_time or t > self.draw_end_time:
             return
+        self.profile_draw()
         self.props.draw()
         if SkillActive.judgment:
             elapsed = t - SkillActive.start_time
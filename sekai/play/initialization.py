@@ -1,9 +1,18 @@
-from sonolus.script.archetype import EntityRef, PlayArchetype, callback, entity_info_at, exported, imported
+from sonolus.script.archetype import (
+    EntityRef,
+    PlayArchetype,
+    callback,
+    entity_info_at,
+    exported,
+    imported,
+    shared_memory,
+)
 from sonolus.script.runtime import level_score
 
 from sekai.lib import archetype_names
 from sekai.lib.baseevent import init_event_list
 from sekai.lib.buckets import init_buckets
+from sekai.lib.connector import init_connector_sprite_lookup
 from sekai.lib.initialization import LastNote, LayerCache, calculate_note_weight, sort_entities_by_time
 from sekai.lib.layer import (
     LAYER_BACKGROUND_SIDE,
@@ -22,12 +31,12 @@ from sekai.lib.level_config import (
     init_particle_version,
     init_ui_version,
 )
-from sekai.lib.note import init_life, init_score
+from sekai.lib.note import init_life, init_note_sprite_lookup, init_score
 from sekai.lib.options import Options, SkillMode
 from sekai.lib.particle import ActiveParticles, init_particles
 from sekai.lib.skin import ActiveSkin, init_skin
 from sekai.lib.ui import init_ui
-from sekai.play import custom_elements, input_manager, note, static_stage
+from sekai.play import custom_elements, input_manager, note, slot_effect, static_stage
 from sekai.play.common import init_play_common
 from sekai.play.dynamic_stage import CameraChange
 from sekai.play.events import Fever, Skill
@@ -39,6 +48,8 @@ class Initialization(PlayArchetype):
     revision: EngineRevision = imported(name="revision", default=EngineRevision.SONOLUS_1_1_0)
     initial_life: int = imported(name="initialLife", default=1000)
     first_camera_ref: EntityRef[CameraChange] = imported(name="firstCamera")
+    # The last camera change found while refreshing the layout, for resuming the next frame's query from.
+    camera_cursor: EntityRef[CameraChange] = shared_memory()
 
     replay_revision: EngineRevision = exported(name="replayRevision")
 
@@ -47,6 +58,8 @@ class Initialization(PlayArchetype):
         init_level_config(self.revision)
         init_layout()
         init_skin()
+        init_note_sprite_lookup()
+        init_connector_sprite_lookup()
         init_particles()
         init_ui_version(ActiveSkin.ui_checker.check)
         init_ui_margin()
@@ -78,6 +91,7 @@ class Initialization(PlayArchetype):
     def initialize(self):
         static_stage.StaticStage.spawn()
         input_manager.InputManager.spawn()
+        slot_effect.SlotEffectManager.spawn()
         self.replay_revision = self.revision
 
     def spawn_order(self) -> float:
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
-from sonolus.script.archetype import PlayArchetype, callback
+from math import floor
+
+from sonolus.script.archetype import EntityRef, PlayArchetype, callback
 from sonolus.script.array import Array, Dim
-from sonolus.script.containers import ArrayMap, ArraySet
+from sonolus.script.containers import ArrayMap, ArraySet, VarArray
 from sonolus.script.globals import level_memory
-from sonolus.script.runtime import Touch, time, touches
+from sonolus.script.interval import clamp
+from sonolus.script.quad import Quad
+from sonolus.script.record import Record
+from sonolus.script.runtime import Touch, offset_adjusted_time, screen, time, touches
 
+from sekai.debug import PROFILE_INPUT
 from sekai.lib import archetype_names
 from sekai.lib.buckets import SLIDE_END_LOCKOUT_DURATION
 from sekai.lib.layout import DynamicLayout, segment_closeness_score
 from sekai.lib.note import is_head
+from sekai.lib.profiler import InputProfileCounts
+from sekai.lib.streams import Streams
 from sekai.play import note
 
 INPUT_SLOTS = 16
 INPUT_SCORE_TIME_SCALE = 0.05
+INPUT_BUCKET_COUNT = 12
+INPUT_BUCKET_CAPACITY = 32
 
 
 @level_memory
@@ -25,6 +35,22 @@ class InputState:
     previous_touch_disallowed: bool
 
 
+@level_memory
+class InputProfile:
+    counts: InputProfileCounts
+
+
+class InputBuckets(Record):
+    """Candidate notes grouped by the vertical screen strips their hitboxes overlap.
+
+    Each bucket lists note indexes in ascending order, so scanning the bucket under a touch visits candidates in the
+    same order as scanning every note. If any bucket fills up, every touch falls back to scanning every note.
+    """
+
+    entries: Array[VarArray[int, Dim[INPUT_BUCKET_CAPACITY]], Dim[INPUT_BUCKET_COUNT]]
+    overflowed: bool
+
+
 def disallow_empty(touch: Touch):
     InputState.disallowed_empty_touches.add(touch.id)
     if touch.id == InputState.last_started_touch_id or touch.started:
@@ -57,9 +83,23 @@ class InputManager(PlayArchetype):
 
     @callback(order=-1)
     def touch(self):
+        if PROFILE_INPUT:
+            InputProfile.counts @= +InputProfileCounts
         update_input_state()
         preassign_taps()
         preassign_releases()
+        if PROFILE_INPUT:
+            record_input_profile()
+
+
+def record_input_profile():
+    """Record this frame's input assignment counters to the input_profile stream, for watch to show in replays."""
+    counts = InputProfile.counts
+    counts.tap_candidates = len(note.NoteMemory.active_tap_input_notes)
+    counts.release_candidates = len(note.NoteMemory.active_release_input_notes)
+    counts.disallowed_empty_touches = len(InputState.disallowed_empty_touches)
+    counts.disallowed_release_touches = len(InputState.disallowed_release_touches)
+    Streams.input_profile[offset_adjusted_time()] = counts
 
 
 def update_input_state():
@@ -91,10 +131,54 @@ def is_previous_touch_disallowed() -> bool:
     return InputState.previous_touch_disallowed
 
 
+def input_bucket(x: float) -> int:
+    area = screen()
+    return clamp(floor((x - area.l) / area.w * INPUT_BUCKET_COUNT), 0, INPUT_BUCKET_COUNT - 1)
+
+
+def fill_input_buckets(buckets: InputBuckets, active: VarArray[EntityRef[note.BaseNote], Dim[256]]):
+    for note_i in range(len(active)):
+        bounds = active[note_i].get().hitbox.bounds
+        first = input_bucket(min(bounds.bl.x, bounds.tl.x, bounds.tr.x, bounds.br.x))
+        last = input_bucket(max(bounds.bl.x, bounds.tl.x, bounds.tr.x, bounds.br.x))
+        for bucket in range(first, last + 1):
+            if len(buckets.entries[bucket]) >= INPUT_BUCKET_CAPACITY:
+                buckets.overflowed = True
+                return
+            buckets.entries[bucket].append(note_i)
+
+
+def input_candidate_count(buckets: InputBuckets, active_count: int, bucket: int) -> int:
+    return active_count if buckets.overflowed else len(buckets.entries[bucket])
+
+
+def input_candidate(buckets: InputBuckets, bucket: int, k: int) -> int:
+    return k if buckets.overflowed else buckets.entries[bucket][k]
+
+
+def has_started_touch() -> bool:
+    return any(touch.started for touch in touches())
+
+
+def has_ended_touch() -> bool:
+    return any(touch.ended for touch in touches())
+
+
+def has_ongoing_touch_in(bounds: Quad) -> bool:
+    return any(not touch.ended and bounds.contains_point(touch.position) for touch in touches())
+
+
 def preassign_taps():
+    if not has_started_touch():
+        return
     active = note.NoteMemory.active_tap_input_notes
     active.sort(key=lambda ref: ref.get().target_time)
 
+    buckets = +InputBuckets
+    fill_input_buckets(buckets, active)
+    if PROFILE_INPUT and buckets.overflowed:
+        InputProfile.counts.bucket_overflows += 1
+
     input_assigned = +Array[bool, Dim[INPUT_SLOTS]]
     for i in range(INPUT_SLOTS):
         if i >= len(touches()) or not touches()[i].started:
@@ -102,17 +186,24 @@ def preassign_taps():
 
     scores = +Array[float, Dim[INPUT_SLOTS]]
     preferred = +Array[int, Dim[INPUT_SLOTS]]
+    stale = +Array[bool, Dim[INPUT_SLOTS]]
+    for i in range(INPUT_SLOTS):
+        preferred[i] = -1
+        stale[i] = not input_assigned[i]
 
     for _ in range(INPUT_SLOTS):
+        if PROFILE_INPUT:
+            InputProfile.counts.tap_rounds += 1
         for i in range(INPUT_SLOTS):
+            if not stale[i]:
+                continue
+            stale[i] = False
             scores[i] = 0.0
             preferred[i] = -1
-
-        for i in range(INPUT_SLOTS):
-            if input_assigned[i]:
-                continue
             touch = touches()[i]
-            for note_i in range(len(active)):
+            bucket = input_bucket(touch.position.x)
+            for k in range(input_candidate_count(buckets, len(active), bucket)):
+                note_i = input_candidate(buckets, bucket, k)
                 target_note = active[note_i].get()
                 if target_note.captured_touch_id != 0:
                     continue
@@ -155,11 +246,25 @@ def preassign_taps():
         if not any_assigned:
             break
 
+        settle_preferences(active, input_assigned, preferred, stale)
+
 
 def preassign_releases():
+    if not has_ended_touch():
+        return
     active = note.NoteMemory.active_release_input_notes
     active.sort(key=lambda ref: ref.get().target_time)
 
+    # Whether a lockout applies doesn't depend on the touch being assigned, so it's checked at most once per note,
+    # the first time a released touch is inside the note's hitbox.
+    head_touch_checked = +Array[bool, Dim[256]]
+    ongoing_head_touches = +Array[bool, Dim[256]]
+
+    buckets = +InputBuckets
+    fill_input_buckets(buckets, active)
+    if PROFILE_INPUT and buckets.overflowed:
+        InputProfile.counts.bucket_overflows += 1
+
     input_assigned = +Array[bool, Dim[INPUT_SLOTS]]
     for i in range(INPUT_SLOTS):
         if i >= len(touches()) or not touches()[i].ended:
@@ -167,17 +272,24 @@ def preassign_releases():
 
     scores = +Array[float, Dim[INPUT_SLOTS]]
     preferred = +Array[int, Dim[INPUT_SLOTS]]
+    stale = +Array[bool, Dim[INPUT_SLOTS]]
+    for i in range(INPUT_SLOTS):
+        preferred[i] = -1
+        stale[i] = not input_assigned[i]
 
     for _ in range(INPUT_SLOTS):
+        if PROFILE_INPUT:
+            InputProfile.counts.release_rounds += 1
         for i in range(INPUT_SLOTS):
+            if not stale[i]:
+                continue
+            stale[i] = False
             scores[i] = 0.0
             preferred[i] = -1
-
-        for i in range(INPUT_SLOTS):
-            if input_assigned[i]:
-                continue
             touch = touches()[i]
-            for note_i in range(len(active)):
+            bucket = input_bucket(touch.position.x)
+            for k in range(input_candidate_count(buckets, len(active), bucket)):
+                note_i = input_candidate(buckets, bucket, k)
                 target_note = active[note_i].get()
                 if target_note.captured_touch_id != 0:
                     continue
@@ -187,14 +299,15 @@ def preassign_releases():
                     continue
                 ignore_lockout = False
                 if target_note.active_head_ref.index > 0:
-                    head_bounds = target_note.active_head_ref.get().active_connector_info.input_bounds
-                    ongoing = False
-                    for t in touches():
-                        if not t.ended and head_bounds.contains_point(t.position):
-                            ongoing = True
-                            break
-                    ignore_lockout = not ongoing
+                    if not head_touch_checked[note_i]:
+                        head_touch_checked[note_i] = True
+                        ongoing_head_touches[note_i] = has_ongoing_touch_in(
+                            target_note.active_head_ref.get().active_connector_info.input_bounds
+                        )
+                    ignore_lockout = not ongoing_head_touches[note_i]
                 if not ignore_lockout and not is_allowed_release(touch, target_note.target_time):
+                    if PROFILE_INPUT:
+                        InputProfile.counts.release_lockout_skips += 1
                     continue
                 score = (
                     segment_closeness_score(touch.position, target_note.hitbox.target) / DynamicLayout.w_scale
@@ -228,3 +341,23 @@ def preassign_releases():
 
         if not any_assigned:
             break
+
+        settle_preferences(active, input_assigned, preferred, stale)
+
+
+def settle_preferences(
+    active: VarArray[EntityRef[note.BaseNote], Dim[256]],
+    input_assigned: Array[bool, Dim[INPUT_SLOTS]],
+    preferred: Array[int, Dim[INPUT_SLOTS]],
+    stale: Array[bool, Dim[INPUT_SLOTS]],
+):
+    """Prepare for the next assignment round.
+
+    Notes only ever get captured between rounds, so a touch whose preferred note is still free would pick it again
+    and only touches that lost their preferred note need to rescan.
+    """
+    for i in range(INPUT_SLOTS):
+        if input_assigned[i]:
+            preferred[i] = -1
+        elif preferred[i] >= 0 and active[preferred[i]].get().captured_touch_id != 0:
+            stale[i] = True
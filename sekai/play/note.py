@@ -40,7 +40,9 @@ from sekai.lib.note import (
     get_note_haptic_feedback,
     get_note_particles,
     get_note_window,
+    get_visual_scaled_range,
     get_visual_spawn_time,
+    get_visual_wake_time,
     has_release_input,
     has_tap_input,
     is_head,
@@ -51,7 +53,14 @@ from sekai.lib.note import (
 )
 from sekai.lib.options import Options
 from sekai.lib.particle import BaseParticles
-from sekai.lib.stage import DivisionParity, get_stage_props
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
+from sekai.lib.sim_line import (
+    SimLinePoint,
+    has_published_sim_line_point,
+    publish_sim_line_point,
+    published_sim_line_point,
+)
+from sekai.lib.stage import DivisionParity
 from sekai.lib.timescale import (
     CompositeTime,
     group_force_note_speed,
@@ -71,7 +80,7 @@ DEFAULT_BEST_TOUCH_TIME = -1e8
 HITBOX_DRAW_MIN_EARLY_WINDOW = 0.050
 
 
-class BaseNote(PlayArchetype):
+class BaseNote(PlayArchetype, FrameProfiled):
     beat: StandardImport.BEAT
     timescale_group: StandardImport.TIMESCALE_GROUP
     stage_ref: EntityRef[DynamicStage] = imported(name="stage")
@@ -104,6 +113,9 @@ class BaseNote(PlayArchetype):
     unadjusted_input_interval_data: Interval = entity_data()
     perfect_window_end: float = entity_data()
 
+    # Set by sim lines attached to this note, which read the visual lane and progress it publishes each frame.
+    in_sim_line: bool = entity_data()
+
     # The id of the tap that activated this note, for tap notes and flicks or released the note, for release notes.
     # This is set by the input manager rather than the note itself.
     captured_touch_id: int = shared_memory()
@@ -124,6 +136,10 @@ class BaseNote(PlayArchetype):
 
     should_play_hit_effects: bool = entity_memory()
 
+    # While the note is off screen before taking input, updates are skipped in [hidden_start, hidden_end).
+    hidden_start: float = entity_memory()
+    hidden_end: float = entity_memory()
+
     hitbox: Hitbox = shared_memory()
 
     pending_post_judge: bool = entity_memory()
@@ -173,9 +189,8 @@ class BaseNote(PlayArchetype):
             self.start_time = min(self.visual_start_time, self.input_interval.start)
 
         if self.stage_ref.index > 0:
-            stage_props = get_stage_props(self.stage_ref.get(), self.target_time)
             self.rel_lane = self.lane
-            self.lane += stage_props.pivot_lane
+            self.lane += self.stage_ref.get().pivot_lane_at(self.target_time)
             self.target_y_offset = self._basic_y_offset_at(self.target_time, left_limit=True)
 
         if self.next_ref.index > 0:
@@ -251,12 +266,16 @@ class BaseNote(PlayArchetype):
         return self.target_time
 
     def update_sequential(self):
+        self.profile_update(ProfileFamily.NOTES)
         if self.despawn:
             return
         if self.pending_despawn:
             return
+        if self.is_hidden:
+            return
 
         update_timescale_group(self.timescale_group)
+        self.update_sim_line_point()
 
         if self.pending_post_judge:
             self.pending_post_judge = False
@@ -367,6 +386,8 @@ class BaseNote(PlayArchetype):
             return
         if time() < self.visual_start_time:
             return
+        if self.is_hidden:
+            return
         if self.tick_trigger():
             self.complete_parallel()
             return
@@ -378,16 +399,20 @@ class BaseNote(PlayArchetype):
             return
         if is_head(self.kind) and time() > self.target_time:
             return
+        if self.try_hide():
+            return
         if group_hide_notes(self.timescale_group):
             return
         if Options.disable_fake_notes and not self.is_scored:
             return
         if self.kind != NoteKind.HIDE_TICK:
+            self.profile_draw()
+            point = self.sim_line_point
             draw_note(
                 self.kind,
-                self.visual_lane,
+                point.lane,
                 self.size,
-                self.visual_progress,
+                point.progress,
                 self.direction,
                 self.target_time,
             )
@@ -400,6 +425,29 @@ class BaseNote(PlayArchetype):
                     unlerp_clamped(draw_start, self.target_time, time()),
                 )
 
+    @property
+    def is_hidden(self) -> bool:
+        return self.hidden_start <= time() < self.hidden_end
+
+    def try_hide(self) -> bool:
+        """Check whether the note is off screen and, if so, skip its updates until it may come back on screen.
+
+        Notes only hide before they take input, so hiding never delays judgment.
+        """
+        if self.is_attached:
+            return False
+        current_time = time()
+        hide_end = self.input_interval.start if self.is_scored else self.target_time
+        if current_time >= hide_end:
+            return False
+        if not group_hide_notes(self.timescale_group) and group_scaled_time(self.timescale_group).total in (
+            get_visual_scaled_range(self.timescale_group, self.target_scaled_time)
+        ):
+            return False
+        self.hidden_start = current_time
+        self.hidden_end = get_visual_wake_time(self.timescale_group, self.target_scaled_time, current_time, hide_end)
+        return True
+
     def tick_trigger(self):
         if self.kind in (NoteKind.NORM_TICK, NoteKind.CRIT_TICK, NoteKind.HIDE_TICK):
             head = +EntityRef[BaseNote]
@@ -937,7 +985,7 @@ class BaseNote(PlayArchetype):
     def _basic_visual_lane_at(self, t: float) -> float:
         if self.stage_ref.index <= 0:
             return self.lane
-        return get_stage_props(self.stage_ref.get(), t).pivot_lane + self.rel_lane
+        return self.stage_ref.get().pivot_lane_at(t) + self.rel_lane
 
     def visual_lane_at(self, t: float) -> float:
         if self.is_attached:
@@ -963,6 +1011,21 @@ class BaseNote(PlayArchetype):
     def visual_lane(self) -> float:
         return self.visual_lane_at(time())
 
+    def update_sim_line_point(self):
+        if self.in_sim_line:
+            publish_sim_line_point(self.index, self.visual_lane, self.visual_progress)
+
+    @property
+    def sim_line_point(self) -> SimLinePoint:
+        """The current visual lane and progress, reusing the values published this frame when there are any."""
+        result = +SimLinePoint
+        if self.in_sim_line and has_published_sim_line_point(self.index):
+            result @= published_sim_line_point(self.index)
+        else:
+            result.lane = self.visual_lane
+            result.progress = self.visual_progress
+        return result
+
     @property
     def _basic_visual_y_offset(self) -> float:
         if self.stage_ref.index > 0:
@@ -987,7 +1050,7 @@ class BaseNote(PlayArchetype):
     def _basic_y_offset_at(self, t: float, left_limit: bool = False) -> float:
         if self.stage_ref.index <= 0:
             return 0.0
-        return get_stage_props(self.stage_ref.get(), t, left_limit=left_limit).y_offset
+        return self.stage_ref.get().y_offset_at(t, left_limit=left_limit)
 
     def y_offset_at(self, t: float) -> float:
         if self.is_attached:
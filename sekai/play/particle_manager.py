@@ -10,6 +10,7 @@ from sonolus.script.record import Record
 from sekai.lib import archetype_names
 from sekai.lib.particle import NoteParticleSet
 from sekai.lib.particle_manager import handle_critical_flick_lane_effect
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 
 
 class ParticleEntry(Record):
@@ -18,7 +19,7 @@ class ParticleEntry(Record):
     chunk_id: float
 
 
-class ParticleManager(PlayArchetype):
+class ParticleManager(PlayArchetype, FrameProfiled):
     particles: NoteParticleSet = entity_memory()
     lane: float = entity_memory()
     size: float = entity_memory()
@@ -26,6 +27,7 @@ class ParticleManager(PlayArchetype):
     name = archetype_names.PARTICLE_MANAGER
 
     def update_sequential(self):
+        self.profile_update(ProfileFamily.PARTICLES)
         if self.despawn:
             return
         handle_critical_flick_lane_effect(self.particles, self.lane, self.size, self.spawn_time)
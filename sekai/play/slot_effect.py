@@ -1,70 +1,88 @@
 from sonolus.script.archetype import PlayArchetype, entity_memory
-from sonolus.script.runtime import time
-from sonolus.script.sprite import Sprite
+from sonolus.script.bucket import Judgment
 
 from sekai.lib import archetype_names
-from sekai.lib.options import Options
+from sekai.lib.layout import FlickDirection
+from sekai.lib.note import NoteKind, add_note_slot_effects
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 from sekai.lib.slot_effect import (
-    SLOT_EFFECT_DURATION,
-    SLOT_GLOW_EFFECT_DURATION,
+    SLOT_EFFECT_POOL_SIZE,
+    SlotEffectPool,
     draw_slot_effect,
     draw_slot_glow_effect,
+    is_pooled_slot_effect_live,
 )
 
 
-class SlotGlowEffect(PlayArchetype):
-    name = archetype_names.SLOT_GLOW_EFFECT
+class SlotEffectRequest(PlayArchetype):
+    """Adds the slot effects of a hit to the pool.
 
-    sprite: Sprite = entity_memory()
-    start_time: float = entity_memory()
+    Notes play their hit effects on terminate, where level memory can't be written, so they spawn one of these to add
+    every lane of the hit on its first update.
+    """
+
+    name = archetype_names.SLOT_EFFECT_REQUEST
+
+    kind: NoteKind = entity_memory()
     lane: float = entity_memory()
     size: float = entity_memory()
+    start_time: float = entity_memory()
+    direction: FlickDirection = entity_memory()
+    judgment: Judgment = entity_memory()
     y_offset: float = entity_memory()
-    end_time: float = entity_memory()
+    pivot_lane: float = entity_memory()
+    half_offset: bool = entity_memory()
 
-    def initialize(self):
-        self.end_time = self.start_time + SLOT_GLOW_EFFECT_DURATION / Options.effect_animation_speed
-
-    def update_parallel(self):
-        if time() > self.end_time:
-            self.despawn = True
-            return
-        draw_slot_glow_effect(
-            self.sprite,
-            self.start_time,
-            self.end_time,
+    def update_sequential(self):
+        add_note_slot_effects(
+            self.kind,
             self.lane,
-            0.5,
+            self.size,
+            self.start_time,
+            self.direction,
+            self.judgment,
             y_offset=self.y_offset,
+            pivot_lane=self.pivot_lane,
+            half_offset=self.half_offset,
         )
+        self.despawn = True
 
 
-class SlotEffect(PlayArchetype):
-    name = archetype_names.SLOT_EFFECT
+class SlotEffectManager(PlayArchetype, FrameProfiled):
+    """Draws every live slot effect in the pool."""
 
-    sprite: Sprite = entity_memory()
-    start_time: float = entity_memory()
-    lane: float = entity_memory()
-    y_offset: float = entity_memory()
-    end_time: float = entity_memory()
+    name = archetype_names.SLOT_EFFECT_MANAGER
 
-    def initialize(self):
-        self.end_time = self.start_time + SLOT_EFFECT_DURATION / Options.effect_animation_speed
+    def update_sequential(self):
+        self.profile_update(ProfileFamily.PARTICLES)
 
     def update_parallel(self):
-        if time() > self.end_time:
-            self.despawn = True
-            return
-        draw_slot_effect(
-            self.sprite,
-            self.start_time,
-            self.end_time,
-            self.lane,
-            y_offset=self.y_offset,
-        )
+        for i in range(SLOT_EFFECT_POOL_SIZE):
+            entry = SlotEffectPool.slot_effects[i]
+            if is_pooled_slot_effect_live(entry):
+                self.profile_draw()
+                draw_slot_effect(
+                    entry.sprite,
+                    entry.start_time,
+                    entry.end_time,
+                    entry.lane,
+                    y_offset=entry.y_offset,
+                )
+        for i in range(SLOT_EFFECT_POOL_SIZE):
+            entry = SlotEffectPool.slot_glow_effects[i]
+            if is_pooled_slot_effect_live(entry):
+                self.profile_draw()
+                draw_slot_glow_effect(
+                    entry.sprite,
+                    entry.start_time,
+                    entry.end_time,
+                    entry.lane,
+                    0.5,
+                    y_offset=entry.y_offset,
+                )
 
 
 SLOT_EFFECT_ARCHETYPES = (
-    SlotGlowEffect,
-    SlotEffect,
+    SlotEffectRequest,
+    SlotEffectManager,
 )
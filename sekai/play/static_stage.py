@@ -5,12 +5,21 @@ from sonolus.script.globals import level_memory
 from sonolus.script.interval import clamp
 from sonolus.script.runtime import offset_adjusted_time, time, touches
 
+from sekai.debug import PROFILE_FRAMES
 from sekai.lib import archetype_names
 from sekai.lib.custom_elements import LifeManager, ScoreIndicator
 from sekai.lib.events import reset_fever_bounds
 from sekai.lib.initialization import LastNote
 from sekai.lib.layout import layout_lane_area, refresh_layout, touch_to_lane
 from sekai.lib.level_config import LevelConfig
+from sekai.lib.profiler import (
+    FrameProfile,
+    FrameProfiled,
+    ProfileFamily,
+    begin_profile_frame,
+    draw_frame_profile,
+    draw_input_profile,
+)
 from sekai.lib.stage import draw_stage_and_accessories, init_stage_z_layers, play_lane_hit_effects
 from sekai.lib.streams import Streams
 from sekai.play import custom_elements, input_manager
@@ -22,9 +31,11 @@ class StageMemory:
     empty_lanes: VarArray[float, Dim[16]]
 
 
-class StaticStage(PlayArchetype):
+class StaticStage(PlayArchetype, FrameProfiled):
     name = archetype_names.STATIC_STAGE
     dead_time: float = entity_memory()
+    # The last life written to the life stream, which only records changes after its initial keyframe.
+    last_life: float = entity_memory()
     z_layer_stage_lane: float = entity_memory()
     z_layer_judgment: float = entity_memory()
     z_layer_cover: float = entity_memory()
@@ -49,12 +60,20 @@ class StaticStage(PlayArchetype):
     def initialize(self):
         init_stage_z_layers(self)
         self.dead_time = -2
+        self.last_life = LifeManager.life
+        Streams.life[self.index][-2] = LifeManager.life
 
     @callback(order=-2)
     def update_sequential(self):
         refresh_layout()
         reset_fever_bounds()
-        Streams.life[self.index][offset_adjusted_time()] = LifeManager.life
+        if LifeManager.life != self.last_life:
+            self.last_life = LifeManager.life
+            Streams.life[self.index][offset_adjusted_time()] = LifeManager.life
+        if PROFILE_FRAMES:
+            begin_profile_frame()
+            Streams.frame_profile[offset_adjusted_time()] = FrameProfile.last
+        self.profile_update(ProfileFamily.STAGE)
 
     @callback(order=3)
     def touch(self):
@@ -88,6 +107,7 @@ class StaticStage(PlayArchetype):
             Streams.empty_input_lanes[offset_adjusted_time()] = empty_lanes
 
     def update_parallel(self):
+        self.profile_draw()
         draw_stage_and_accessories(
             self.z_layer_stage_lane,
             self.z_layer_stage_cover,
@@ -114,3 +134,5 @@ class StaticStage(PlayArchetype):
         )
         if LifeManager.life == 0 and self.dead_time != -2:
             self.dead_time = time()
+        draw_frame_profile(FrameProfile.last)
+        draw_input_profile(input_manager.InputProfile.counts)
@@ -5,21 +5,23 @@ from sonolus.script.archetype import (
     PlayArchetype,
     StandardImport,
     callback,
+    entity_data,
     imported,
     shared_memory,
 )
 from sonolus.script.runtime import time
 
 from sekai.lib import archetype_names
+from sekai.lib.baseevent import BaseEvent
 from sekai.lib.timescale import (
     CompositeTime,
-    ScaledTimeToFirstTime,
-    TimeToLastChangeIndex,
-    TimeToScaledTime,
+    init_timescale_changes,
+    last_timescale_change_index_at,
+    time_to_scaled_time,
 )
 
 
-class TimescaleChange(PlayArchetype):
+class TimescaleChange(PlayArchetype, BaseEvent):
     name = archetype_names.TIMESCALE_CHANGE
 
     beat: StandardImport.BEAT
@@ -30,6 +32,11 @@ class TimescaleChange(PlayArchetype):
     hide_notes: bool = imported(name="hideNotes")
     next_ref: EntityRef[TimescaleChange] = imported(name="next")
 
+    time: float = entity_data()
+    scaled_time: CompositeTime = entity_data()
+    min_scaled_time: float = entity_data()
+    max_scaled_time: float = entity_data()
+
     def spawn_order(self) -> float:
         return 1e8
 
@@ -48,11 +55,6 @@ class TimescaleGroup(PlayArchetype):
     hide_notes: bool = shared_memory()
     last_updated: float = shared_memory()
 
-    time_to_scaled_time: TimeToScaledTime = shared_memory()
-    time_to_last_change_index: TimeToLastChangeIndex = shared_memory()
-    scaled_time_to_first_time: ScaledTimeToFirstTime = shared_memory()
-    scaled_time_to_first_time_2: ScaledTimeToFirstTime = shared_memory()
-
     def spawn_order(self) -> float:
         return -1e8
 
@@ -61,18 +63,15 @@ class TimescaleGroup(PlayArchetype):
 
     @callback(order=-2)
     def preprocess(self):
-        self.time_to_scaled_time.init(self.first_ref.index)
-        self.time_to_last_change_index.init(self.first_ref.index)
-        self.scaled_time_to_first_time.init(self.first_ref.index)
-        self.scaled_time_to_first_time_2.init(self.first_ref.index)
+        init_timescale_changes(self.first_ref)
         self.last_updated = -1e8
 
     def update(self):
         if self.last_updated == time():
             return
         self.last_updated = time()
-        self.current_scaled_time = self.time_to_scaled_time.get(time())
-        new_change_index = self.time_to_last_change_index.get(time())
+        self.current_scaled_time = time_to_scaled_time(self.first_ref.index, time())
+        new_change_index = last_timescale_change_index_at(self.first_ref.index, time())
         if self.last_change.index != new_change_index:
             self.last_change.index = new_change_index
             if self.last_change.index > 0:
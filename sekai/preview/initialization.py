@@ -8,9 +8,11 @@ from sonolus.script.timing import beat_to_time
 
 from sekai.lib import archetype_names
 from sekai.lib.baseevent import init_event_list
+from sekai.lib.connector import init_connector_sprite_lookup
 from sekai.lib.layer import LAYER_BEAT_LINE, get_z
 from sekai.lib.layout import CameraInfo, get_camera_info, get_next_camera_event_time
 from sekai.lib.level_config import EngineRevision, LevelConfig, init_level_config
+from sekai.lib.note import init_note_sprite_lookup
 from sekai.lib.particle import init_particles
 from sekai.lib.skin import ActiveSkin, init_skin
 from sekai.lib.ui import init_ui
@@ -43,6 +45,8 @@ class PreviewInitialization(PreviewArchetype):
     def preprocess(self):
         init_level_config(self.revision)
         init_skin()
+        init_note_sprite_lookup()
+        init_connector_sprite_lookup()
         init_ui()
         init_particles()
 
@@ -1,5 +1,7 @@
+from sekai.lib.connector import init_connector_sprite_lookup
 from sekai.lib.layout import init_layout
 from sekai.lib.level_config import init_level_config
+from sekai.lib.note import init_note_sprite_lookup
 from sekai.lib.particle import init_particles
 from sekai.lib.skin import init_skin
 from sekai.lib.ui import init_ui
@@ -9,5 +11,7 @@ def preprocess():
     init_level_config()
     init_layout()
     init_skin()
+    init_note_sprite_lookup()
+    init_connector_sprite_lookup()
     init_ui()
     init_particles()
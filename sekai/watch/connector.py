@@ -16,6 +16,7 @@ from sekai.lib.connector import (
     CONNECTOR_TRAIL_SPAWN_PERIOD,
     ActiveConnectorInfo,
     ConnectorKind,
+    ConnectorTessellation,
     ConnectorVisualState,
     destroy_looped_particle,
     draw_connector,
@@ -23,6 +24,7 @@ from sekai.lib.connector import (
     schedule_connector_sfx,
     spawn_connector_slot_particles,
     spawn_linear_connector_trail_particle,
+    tessellate_connector,
     update_circular_connector_particle,
     update_linear_connector_particle,
 )
@@ -30,7 +32,7 @@ from sekai.lib.ease import EaseType, ease
 from sekai.lib.layout import compute_hitbox, current_layout_transform
 from sekai.lib.note import draw_hitbox_bounds_overlay, draw_slide_note_head, get_attach_params
 from sekai.lib.options import Options
-from sekai.lib.stage import get_stage_props
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 from sekai.lib.streams import Streams
 from sekai.lib.timescale import (
     group_hide_notes,
@@ -45,7 +47,7 @@ def legacy_note_duration() -> float:
     return lerp(0.35, 4, unlerp_clamped(12, 1, Options.note_speed) ** 1.31)
 
 
-class WatchConnector(WatchArchetype):
+class WatchConnector(WatchArchetype, FrameProfiled):
     name = archetype_names.CONNECTOR
 
     head_ref: EntityRef[note.WatchBaseNote] = imported(name="head")
@@ -62,6 +64,8 @@ class WatchConnector(WatchArchetype):
     end_time: float = entity_data()
     visual_active_interval: Interval = entity_data()
 
+    tessellation: ConnectorTessellation = entity_memory()
+
     @callback(order=1)
     def preprocess(self):
         if DISABLE_NOTES:
@@ -94,6 +98,18 @@ class WatchConnector(WatchArchetype):
         if self.segment_head.segment_through_judge_line:
             self.end_time += CONNECTOR_THROUGH_JUDGE_LINE_DESPAWN_DELAY
 
+        tessellate_connector(
+            self.tessellation,
+            self.kind,
+            self.ease_type,
+            head_lane=head.lane,
+            head_size=head.size,
+            head_ease_frac=head.head_ease_frac,
+            tail_lane=tail.lane,
+            tail_size=tail.size,
+            tail_ease_frac=tail.tail_ease_frac,
+        )
+
         if self.head_ref.index == self.active_head_ref.index:
             # This is the first connector, so spawn the WatchSlideManager.
             WatchSlideManager.spawn(active_head_ref=self.active_head_ref, active_tail_ref=self.active_tail_ref)
@@ -110,6 +126,7 @@ class WatchConnector(WatchArchetype):
 
     @callback(order=-1)
     def update_sequential(self):
+        self.profile_update(ProfileFamily.CONNECTORS)
         update_timescale_group(self.head.timescale_group)
         update_timescale_group(self.tail.timescale_group)
         update_timescale_group(self.segment_head.timescale_group)
@@ -179,6 +196,7 @@ class WatchConnector(WatchArchetype):
                 head_visual_progress = head.visual_progress
                 head_target_time = head.target_time
                 head_ease_frac = head.head_ease_frac
+            self.profile_draw()
             draw_connector(
                 kind=self.kind,
                 visual_state=visual_state,
@@ -200,6 +218,7 @@ class WatchConnector(WatchArchetype):
                 segment_tail_alpha=segment_tail.segment_alpha,
                 layer=segment_head.segment_layer,
                 bypass_tail_target_time_check=segment_head.segment_through_judge_line,
+                tessellation=self.tessellation,
             )
         if Options.show_hitboxes and self.active_head_ref.index > 0 and time() in self.visual_active_interval:
             input_lane, input_size = self.get_attached_params(time())
@@ -221,7 +240,7 @@ class WatchConnector(WatchArchetype):
         head = self.head_ref.get().effective_attach_head
         tail = self.tail_ref.get().effective_attach_tail
         if head.stage_ref.index > 0 and head.stage_ref.index == tail.stage_ref.index:
-            pivot_lane = get_stage_props(head.stage_ref.get(), target_time).pivot_lane
+            pivot_lane = head.stage_ref.get().pivot_lane_at(target_time)
             head_lane = pivot_lane + head.rel_lane
             tail_lane = pivot_lane + tail.rel_lane
         else:
@@ -1,4 +1,8 @@
-from sonolus.script.archetype import EntityRef, WatchArchetype, callback, entity_memory
+from sonolus.script.archetype import WatchArchetype, callback, entity_memory
+from sonolus.script.array import Array, Dim
+from sonolus.script.globals import level_data
+from sonolus.script.record import Record
+from sonolus.script.runtime import time
 
 from sekai.lib import archetype_names
 from sekai.lib.custom_elements import (
@@ -9,145 +13,184 @@ from sekai.lib.custom_elements import (
     draw_judgment_accuracy,
     draw_judgment_text,
 )
+from sekai.lib.initialization import LayerCache
 from sekai.lib.options import Options
-from sekai.watch import initialization, note
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
+from sekai.watch import note
 from sekai.watch.events import Fever
 
-
-def spawn_custom(
-    next_ref: EntityRef[note.WatchBaseNote],
-    note_index: int,
-):
-    ComboJudge.spawn(
-        next_ref=next_ref,
-        note_index=note_index,
+HUD_INDEX_SIZE = 256
+JUDGMENT_ACCURACY_DURATION = 0.5
+DAMAGE_FLASH_DURATION = 0.35
+
+
+@level_data
+class HudIndex:
+    """Every ``stride``-th scored note of the list sorted by calc_time, for finding the current note by binary search.
+
+    Levels with more notes than the index holds are sampled, so a lookup walks at most ``stride`` notes of the sorted
+    list after the search.
+    """
+
+    notes: Array[int, Dim[HUD_INDEX_SIZE]]
+    count: int
+    stride: int
+
+
+def build_hud_index(head: int, length: int):
+    HudIndex.stride = (length + HUD_INDEX_SIZE - 1) // HUD_INDEX_SIZE
+    HudIndex.count = 0
+    ptr = head
+    position = 0
+    while ptr > 0:
+        if position % HudIndex.stride == 0:
+            HudIndex.notes[HudIndex.count] = ptr
+            HudIndex.count += 1
+        position += 1
+        ptr = note.WatchBaseNote.at(ptr).next_ref.index
+
+
+def find_hud_note(target_time: float) -> int:
+    """Return the index of the last scored note with a calc_time at or before the given time, or 0 if there is none."""
+    lo = 0
+    hi = HudIndex.count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if note.WatchBaseNote.at(HudIndex.notes[mid]).calc_time <= target_time:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo == 0:
+        return 0
+    ptr = HudIndex.notes[lo - 1]
+    next_index = note.WatchBaseNote.at(ptr).next_ref.index
+    while next_index > 0 and note.WatchBaseNote.at(next_index).calc_time <= target_time:
+        ptr = next_index
+        next_index = note.WatchBaseNote.at(ptr).next_ref.index
+    return ptr
+
+
+class HudState(Record):
+    score: float
+    percentage: float
+    ap: bool
+    note_score: float
+    note_time: float
+    fever_chance_combo: int
+
+
+def hud_state_of_note(note_index: int) -> HudState:
+    """Return the HUD state once the given note is judged, or the initial state for index 0.
+
+    The per-note combo, count, score, percentage and AP fields are running totals over the sorted note list, so the
+    state depends only on the note and not on the notes shown before it.
+    """
+    state = HudState(
+        score=0,
+        percentage=100 if Options.custom_score == 2 else 0,
+        ap=False,
+        note_score=0,
+        note_time=0,
+        fever_chance_combo=0,
     )
-
-
-class ComboJudge(WatchArchetype):
-    next_ref: EntityRef[note.WatchBaseNote] = entity_memory()
-    note_index: int = entity_memory()
-    z: float = entity_memory()
-    z1: float = entity_memory()
-    z2: float = entity_memory()
-    checker: float = entity_memory()
-    name = archetype_names.COMBO_JUDGE
-
-    def initialize(self):
-        self.z = initialization.LayerCache.judgment
-        self.z1 = initialization.LayerCache.judgment1
-        self.z2 = initialization.LayerCache.judgment2
+    if note_index == 0:
+        return state
+    current_note = note.WatchBaseNote.at(note_index)
+    state.score = current_note.score
+    state.percentage = current_note.percentage
+    state.ap = current_note.ap
+    if current_note.last_scoring_ref.index > 0:
+        scoring_note = current_note.last_scoring_ref.get()
+        state.note_score = scoring_note.note_raw_score
+        state.note_time = scoring_note.calc_time
+    # Notes in the fever chance are consecutive in the sorted list, so the last one judged is either this note or
+    # the last note of the fever chance.
+    if Fever.fever_first_count != 0 and current_note.calc_time >= Fever.fever_chance_time:
+        state.fever_chance_combo = min(current_note.count, Fever.fever_last_count) - Fever.fever_first_count
+    return state
+
+
+class Hud(WatchArchetype, FrameProfiled):
+    """Draws the combo, judgment, judgment accuracy and damage flash of the latest scored note.
+
+    The current note is looked up every frame and the score indicator is set from its state whenever it changes, so
+    seeking updates the HUD immediately without replaying the notes in between.
+    """
+
+    name = archetype_names.HUD
+
+    current_note_index: int = entity_memory()
+    # The note the score indicator was last updated from.
+    applied_note_index: int = entity_memory()
 
     def spawn_time(self) -> float:
-        return note.WatchBaseNote.at(self.note_index).calc_time
+        return -1e8
 
-    def despawn_time(self):
-        if self.next_ref.index > 0:
-            return self.next_ref.get().calc_time
-        else:
-            return 1e8
+    def despawn_time(self) -> float:
+        return 1e8
+
+    @callback(order=3)
+    def update_sequential(self):
+        self.profile_update(ProfileFamily.UI)
+        self.current_note_index = find_hud_note(time())
+        if self.current_note_index == self.applied_note_index:
+            return
+        self.applied_note_index = self.current_note_index
+        state = hud_state_of_note(self.current_note_index)
+        Fever.fever_chance_current_combo = state.fever_chance_combo
+        if Options.custom_score > 0 or Options.custom_score_bar:
+            ScoreIndicator.score = state.score
+            ScoreIndicator.percentage = state.percentage
+            ScoreIndicator.ap = state.ap
+            ScoreIndicator.note_score = state.note_score
+            ScoreIndicator.note_time = state.note_time
 
     def update_parallel(self):
-        current_note = note.WatchBaseNote.at(self.note_index)
+        if self.current_note_index == 0:
+            return
+        current_note = note.WatchBaseNote.at(self.current_note_index)
+        self.profile_draw(3)
         draw_combo_label(
             ap=current_note.ap,
-            z=self.z,
-            z1=self.z1,
+            z=LayerCache.judgment,
+            z1=LayerCache.judgment1,
             combo=current_note.combo,
         )
         draw_combo_number(
-            draw_time=self.spawn_time(),
+            draw_time=current_note.calc_time,
             ap=current_note.ap,
             combo=current_note.combo,
-            z=self.z,
-            z1=self.z1,
-            z2=self.z2,
+            z=LayerCache.judgment,
+            z1=LayerCache.judgment1,
+            z2=LayerCache.judgment2,
         )
         draw_judgment_text(
-            draw_time=self.spawn_time(),
+            draw_time=current_note.calc_time,
             judgment=current_note.judgment,
             windows=current_note.judgment_window,
             accuracy=current_note.accuracy,
-            z=self.z,
+            z=LayerCache.judgment,
         )
 
-    @callback(order=3)
-    def update_sequential(self):
-        if self.checker:
-            return
-        current_note = note.WatchBaseNote.at(self.note_index)
-        if Fever.fever_chance_time <= current_note.calc_time < Fever.fever_start_time:
-            Fever.fever_chance_current_combo = current_note.count - Fever.fever_first_count
-
-        if Options.custom_score > 0 or Options.custom_score_bar:
-            ScoreIndicator.score = current_note.score
-            ScoreIndicator.percentage = current_note.percentage
-            ScoreIndicator.ap = current_note.ap
-            note_score = current_note.note_raw_score
-            ScoreIndicator.note_score = note_score if note_score > 0 else ScoreIndicator.note_score
-            ScoreIndicator.note_time = self.spawn_time() if note_score > 0 else ScoreIndicator.note_time
-
-        self.checker = True
-
-    def terminate(self):
-        self.checker = False
-
-
-class JudgmentAccuracy(WatchArchetype):
-    next_ref: EntityRef[note.WatchBaseNote] = entity_memory()
-    note_index: int = entity_memory()
-    z: float = entity_memory()
-    name = archetype_names.JUDGMENT_ACCURACY
-
-    def initialize(self):
-        self.z = initialization.LayerCache.judgment
-
-    def spawn_time(self) -> float:
-        if not Options.custom_accuracy:
-            return 1e8
-        return note.WatchBaseNote.at(self.note_index).calc_time
-
-    def despawn_time(self):
-        current_note = note.WatchBaseNote.at(self.note_index)
-        if self.next_ref.index > 0 and current_note.calc_time + 0.5 >= self.next_ref.get().calc_time:
-            return self.next_ref.get().calc_time
-        else:
-            return current_note.calc_time + 0.5
-
-    def update_parallel(self):
-        current_note = note.WatchBaseNote.at(self.note_index)
-        draw_judgment_accuracy(
-            judgment=current_note.judgment,
-            windows=current_note.judgment_window,
-            accuracy=current_note.accuracy,
-            wrong_way=current_note.wrong_way_check,
-            z=self.z,
-        )
-
-
-class DamageFlash(WatchArchetype):
-    next_ref: EntityRef[note.WatchBaseNote] = entity_memory()
-    note_index: int = entity_memory()
-    z: float = entity_memory()
-    name = archetype_names.DAMAGE_FLASH
-
-    def initialize(self):
-        self.z = initialization.LayerCache.damage
-
-    def spawn_time(self) -> float:
-        if not Options.custom_damage:
-            return 1e8
-        return note.WatchBaseNote.at(self.note_index).calc_time
-
-    def despawn_time(self):
-        current_note = note.WatchBaseNote.at(self.note_index)
-        if self.next_ref.index > 0 and current_note.calc_time + 0.35 >= self.next_ref.get().calc_time:
-            return self.next_ref.get().calc_time
-        else:
-            return current_note.calc_time + 0.35
-
-    def update_parallel(self):
-        draw_damage_flash(draw_time=self.spawn_time(), z=self.z)
-
-
-CUSTOM_ARCHETYPES = (ComboJudge, JudgmentAccuracy, DamageFlash)
+        accuracy_index = current_note.last_accuracy_ref.index
+        if Options.custom_accuracy and accuracy_index > 0:
+            accuracy_note = note.WatchBaseNote.at(accuracy_index)
+            if time() < accuracy_note.calc_time + JUDGMENT_ACCURACY_DURATION:
+                self.profile_draw()
+                draw_judgment_accuracy(
+                    judgment=accuracy_note.judgment,
+                    windows=accuracy_note.judgment_window,
+                    accuracy=accuracy_note.accuracy,
+                    wrong_way=accuracy_note.wrong_way_check,
+                    z=LayerCache.judgment,
+                )
+
+        damage_index = current_note.last_damage_ref.index
+        if Options.custom_damage and damage_index > 0:
+            damage_time = note.WatchBaseNote.at(damage_index).calc_time
+            if time() < damage_time + DAMAGE_FLASH_DURATION:
+                self.profile_draw()
+                draw_damage_flash(draw_time=damage_time, z=LayerCache.damage)
+
+
+CUSTOM_ARCHETYPES = (Hud,)
@@ -9,7 +9,6 @@ from sonolus.script.archetype import (
     callback,
     entity_data,
     imported,
-    shared_memory,
 )
 from sonolus.script.interval import clamp
 from sonolus.script.runtime import time
@@ -22,15 +21,15 @@ from sekai.lib.events import Fever, draw_judgment_effect
 from sekai.lib.layout import ZoomVerticalAlign, preempt_time
 from sekai.lib.level_config import LevelConfig
 from sekai.lib.options import Options
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 from sekai.lib.stage import (
+    CachedStageProps,
     DivisionParity,
     JudgeLineColor,
     StageBorderStyle,
-    StageProps,
     get_draw_end_time,
     get_draw_start_time,
     get_end_time,
-    get_stage_props,
     get_start_time,
 )
 from sekai.watch.events import SkillActive
@@ -66,7 +65,7 @@ class WatchCameraChange(WatchArchetype, BaseEvent):
             self.rotate *= -1
 
 
-class WatchDynamicStage(WatchArchetype):
+class WatchDynamicStage(WatchArchetype, FrameProfiled, CachedStageProps):
     name = archetype_names.STAGE
 
     from_start: bool = imported(name="fromStart")
@@ -80,8 +79,6 @@ class WatchDynamicStage(WatchArchetype):
     draw_start_time: float = entity_data()
     draw_end_time: float = entity_data()
 
-    props: StageProps = shared_memory()
-
     @callback(order=-2)
     def preprocess(self):
         LevelConfig.dynamic_stages = True
@@ -89,6 +86,7 @@ class WatchDynamicStage(WatchArchetype):
         init_event_list(self.first_mask_change_ref)
         init_event_list(self.first_pivot_change_ref)
         init_event_list(self.first_style_change_ref)
+        self.init_props_cache()
         self.start_time = get_start_time(self)
         self.end_time = get_end_time(self)
         self.draw_start_time = get_draw_start_time(self)
@@ -102,7 +100,8 @@ class WatchDynamicStage(WatchArchetype):
 
     @callback(order=-1)
     def update_sequential(self):
-        self.props @= get_stage_props(self)
+        self.profile_update(ProfileFamily.STAGE)
+        self.update_props()
         self.fever_boundary()
 
     def fever_boundary(self):
@@ -129,6 +128,7 @@ class WatchDynamicStage(WatchArchetype):
         t = time()
         if t < self.draw_start_time or t > self.draw_end_time:
             return
+        self.profile_draw()
         self.props.draw()
 
         if SkillActive.judgment:
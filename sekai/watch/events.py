@@ -28,11 +28,11 @@ from sekai.lib.events import (
     spawn_fever_chance_particle,
     spawn_fever_start_particle,
 )
+from sekai.lib.initialization import LayerCache
 from sekai.lib.level_config import LevelConfig
 from sekai.lib.options import Options, SkillMode
 from sekai.lib.skin import ActiveSkin
 from sekai.lib.streams import Streams
-from sekai.watch import initialization
 
 
 @level_memory
@@ -67,8 +67,8 @@ class Skill(WatchArchetype):
             add_life_scheduled(250, self.start_time)
 
     def initialize(self):
-        self.z = initialization.LayerCache.skill_bar
-        self.z2 = initialization.LayerCache.skill_etc
+        self.z = LayerCache.skill_bar
+        self.z2 = LayerCache.skill_etc
 
     def spawn_time(self):
         return -1e8 if self.count == 0 else self.start_time
@@ -126,10 +126,10 @@ class FeverChance(WatchArchetype):
         )
 
     def initialize(self):
-        self.z = initialization.LayerCache.fever_chance_cover
-        self.z2 = initialization.LayerCache.fever_chance_side
-        self.z3 = initialization.LayerCache.fever_chance_gauge
-        self.z4 = initialization.LayerCache.fever_chance_gauge
+        self.z = LayerCache.fever_chance_cover
+        self.z2 = LayerCache.fever_chance_side
+        self.z3 = LayerCache.fever_chance_gauge
+        self.z4 = LayerCache.fever_chance_gauge
 
     def spawn_time(self):
         return self.start_time
@@ -6,14 +6,17 @@ from sonolus.script.archetype import (
     callback,
     entity_info_at,
     imported,
+    shared_memory,
 )
 from sonolus.script.bucket import Judgment
 from sonolus.script.interval import clamp
 from sonolus.script.runtime import is_replay, level_score
 
+from sekai.debug import DISABLE_NOTES
 from sekai.lib import archetype_names
 from sekai.lib.baseevent import init_event_list
 from sekai.lib.buckets import init_buckets
+from sekai.lib.connector import init_connector_sprite_lookup
 from sekai.lib.custom_elements import LifeManager, NeumaierSum
 from sekai.lib.initialization import LastNote, LayerCache, calculate_note_weight, sort_entities_by_time
 from sekai.lib.layer import (
@@ -33,7 +36,7 @@ from sekai.lib.level_config import (
     init_particle_version,
     init_ui_version,
 )
-from sekai.lib.note import init_life, init_score
+from sekai.lib.note import init_life, init_note_sprite_lookup, init_score
 from sekai.lib.options import Options, SkillMode
 from sekai.lib.particle import ActiveParticles, init_particles
 from sekai.lib.skin import ActiveSkin, init_skin
@@ -53,6 +56,8 @@ class WatchInitialization(WatchArchetype):
     replay_revision: EngineRevision = imported(name="replayRevision", default=EngineRevision.BASE)
     initial_life: int = imported(name="initialLife", default=1000)
     first_camera_ref: EntityRef[WatchCameraChange] = imported(name="firstCamera")
+    # The last camera change found while refreshing the layout, for resuming the next frame's query from.
+    camera_cursor: EntityRef[WatchCameraChange] = shared_memory()
 
     is_multi: bool = imported()
 
@@ -63,6 +68,8 @@ class WatchInitialization(WatchArchetype):
         init_level_config(self.revision)
         init_layout()
         init_skin()
+        init_note_sprite_lookup()
+        init_connector_sprite_lookup()
         init_particles()
         init_ui_version(ActiveSkin.ui_checker.check)
         init_ui_margin()
@@ -89,6 +96,7 @@ class WatchInitialization(WatchArchetype):
 
         init_event_list(self.first_camera_ref)
         WatchStaticStage.spawn()
+        custom_elements.Hud.spawn()
 
         for input_time, lanes in Streams.empty_input_lanes.iter_items_from(-2):
             for lane in lanes:
@@ -112,6 +120,8 @@ def sorted_linked_list():
     if note_length > 0:
         sorted_note_head = sort_entities_by_time(note_head, note.WatchBaseNote)
         setting_combo(sorted_note_head.index, sorted_skill_head.index)
+        if not DISABLE_NOTES:
+            custom_elements.build_hud_index(sorted_note_head.index, note_length)
 
 
 def initial_list(entity_count):
@@ -182,20 +192,11 @@ def setting_combo(head: int, skill: int) -> None:
             note.WatchBaseNote.at(ptr).at(ptr).ap = True
 
         if is_replay() and judgment != Judgment.PERFECT and note.WatchBaseNote.at(ptr).played_hit_effects:
-            if prev_acc > 0:
-                custom_elements.JudgmentAccuracy.spawn(
-                    note_index=prev_acc,
-                    next_ref=note.WatchBaseNote.at(ptr).ref(),
-                )
             prev_acc = ptr
-
         if is_replay() and judgment == Judgment.MISS:
-            if prev_damage > 0:
-                custom_elements.DamageFlash.spawn(
-                    note_index=prev_damage,
-                    next_ref=note.WatchBaseNote.at(ptr).ref(),
-                )
             prev_damage = ptr
+        note.WatchBaseNote.at(ptr).last_accuracy_ref.index = prev_acc
+        note.WatchBaseNote.at(ptr).last_damage_ref.index = prev_damage
 
         count += 1
         note.WatchBaseNote.at(ptr).count = count
@@ -220,17 +221,6 @@ def setting_combo(head: int, skill: int) -> None:
         LastNote.last_time = max(LastNote.last_time, note.WatchBaseNote.at(ptr).calc_time)
         ptr = note.WatchBaseNote.at(ptr).next_ref.index
 
-    if prev_acc > 0:
-        custom_elements.JudgmentAccuracy.spawn(
-            note_index=prev_acc,
-            next_ref=+EntityRef[note.WatchBaseNote],
-        )
-    if prev_damage > 0:
-        custom_elements.DamageFlash.spawn(
-            note_index=prev_damage,
-            next_ref=+EntityRef[note.WatchBaseNote],
-        )
-
     calculate_score(head, 1000000, total_weight.total)
 
 
@@ -244,10 +234,10 @@ def calculate_score(head: int, max_score: int, total_weight: float):
     perfect_step = 0
     great_step = 0
     good_step = 0
+    last_scoring = 0
     total_weight = total_weight if total_weight > 0 else 1.0
     if Options.custom_score == 2:
         custom_elements.ScoreIndicator.percentage = 100
-    custom_elements.ScoreIndicator.first = note.WatchBaseNote.at(head).calc_time
     while ptr > 0:
         count += 1
         # score = judgmentMultiplier * (consecutiveJudgmentMultiplier + archetypeMultiplier + entityMultiplier)
@@ -306,6 +296,9 @@ def calculate_score(head: int, max_score: int, total_weight: float):
         )
         raw_calc = (note_raw_score * max_score) / total_weight
         note.WatchBaseNote.at(ptr).note_raw_score = raw_calc
+        if raw_calc > 0:
+            last_scoring = ptr
+        note.WatchBaseNote.at(ptr).last_scoring_ref.index = last_scoring
 
         current_raw_score.add(note_raw_score)
 
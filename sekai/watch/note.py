@@ -31,7 +31,9 @@ from sekai.lib.note import (
     get_note_bucket,
     get_note_effect_kind,
     get_note_particles,
+    get_visual_scaled_range,
     get_visual_spawn_time,
+    get_visual_wake_time,
     has_release_input,
     has_tap_input,
     is_head,
@@ -44,7 +46,14 @@ from sekai.lib.note import (
 )
 from sekai.lib.options import Options
 from sekai.lib.particle import BaseParticles
-from sekai.lib.stage import DivisionParity, get_stage_props
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
+from sekai.lib.sim_line import (
+    SimLinePoint,
+    has_published_sim_line_point,
+    publish_sim_line_point,
+    published_sim_line_point,
+)
+from sekai.lib.stage import DivisionParity
 from sekai.lib.timescale import (
     CompositeTime,
     group_force_note_speed,
@@ -54,14 +63,13 @@ from sekai.lib.timescale import (
     update_timescale_group,
 )
 from sekai.play.note import HITBOX_DRAW_MIN_EARLY_WINDOW, derive_note_archetypes, get_note_window
-from sekai.watch.custom_elements import spawn_custom
 from sekai.watch.dynamic_stage import WatchDynamicStage
 from sekai.watch.particle_manager import ParticleManager
 
 MIN_START_TIME = 0.0167  # Executes the terminate process with a guaranteed minimum duration.
 
 
-class WatchBaseNote(WatchArchetype):
+class WatchBaseNote(WatchArchetype, FrameProfiled):
     beat: StandardImport.BEAT
     timescale_group: StandardImport.TIMESCALE_GROUP
     stage_ref: EntityRef[WatchDynamicStage] = imported(name="stage")
@@ -93,8 +101,16 @@ class WatchBaseNote(WatchArchetype):
 
     active_connector_info: ActiveConnectorInfo = shared_memory()
 
+    # Set by sim lines attached to this note, which read the visual lane and progress it publishes each frame.
+    # Entity data is full, so unlike in play this lives in shared memory.
+    in_sim_line: bool = shared_memory()
+
     hitbox: Hitbox = entity_memory()
 
+    # While the note is off screen before its target time, updates are skipped in [hidden_start, hidden_end).
+    hidden_start: float = entity_memory()
+    hidden_end: float = entity_memory()
+
     end_time: float = imported()
     played_hit_effects: bool = imported()
 
@@ -108,6 +124,11 @@ class WatchBaseNote(WatchArchetype):
     score: float = shared_memory()
     percentage: float = shared_memory()
     note_raw_score: float = shared_memory()
+    # The latest note up to this one in calc_time order showing a judgment accuracy or damage flash, for the HUD.
+    last_accuracy_ref: EntityRef[WatchBaseNote] = shared_memory()
+    last_damage_ref: EntityRef[WatchBaseNote] = shared_memory()
+    # The latest note up to this one with a positive raw score, whose score the score bar shows.
+    last_scoring_ref: EntityRef[WatchBaseNote] = shared_memory()
 
     def init_data(self):
         if self.data_init_done:
@@ -130,9 +151,8 @@ class WatchBaseNote(WatchArchetype):
             self.start_time = self.visual_start_time
 
         if self.stage_ref.index > 0:
-            stage_props = get_stage_props(self.stage_ref.get(), self.target_time)
             self.rel_lane = self.lane
-            self.lane += stage_props.pivot_lane
+            self.lane += self.stage_ref.get().pivot_lane_at(self.target_time)
             self.target_y_offset = self._basic_y_offset_at(self.target_time, left_limit=True)
 
         if self.next_ref.index > 0:
@@ -224,12 +244,6 @@ class WatchBaseNote(WatchArchetype):
             stage.start_time = min(stage.start_time, self.start_time - 1.0)
             stage.end_time = max(stage.end_time, self.target_time + 1.0)
 
-        if self.is_scored:
-            spawn_custom(
-                self.next_ref,
-                self.index,
-            )
-
         if self.played_hit_effects or not is_replay():
             self.spawn_critical_lane()
             self.get_min_start_time()
@@ -269,25 +283,56 @@ class WatchBaseNote(WatchArchetype):
         else:
             return self.target_time
 
+    @property
+    def is_hidden(self) -> bool:
+        return self.hidden_start <= time() < self.hidden_end
+
+    def try_hide(self) -> bool:
+        """Check whether the note is off screen and, if so, skip its updates until it may come back on screen."""
+        if self.is_attached:
+            return False
+        current_time = time()
+        if current_time >= self.target_time:
+            return False
+        if not group_hide_notes(self.timescale_group) and group_scaled_time(self.timescale_group).total in (
+            get_visual_scaled_range(self.timescale_group, self.target_scaled_time)
+        ):
+            return False
+        self.hidden_start = current_time
+        self.hidden_end = get_visual_wake_time(
+            self.timescale_group, self.target_scaled_time, current_time, self.target_time
+        )
+        return True
+
     def update_sequential(self):
+        self.profile_update(ProfileFamily.NOTES)
+        if self.is_hidden:
+            return
         update_timescale_group(self.timescale_group)
+        self.update_sim_line_point()
 
     def update_parallel(self):
         if time() < self.visual_start_time:
             return
+        if self.is_hidden:
+            return
         if is_head(self.kind) and time() > self.target_time:
             return
+        if self.try_hide():
+            return
         if group_hide_notes(self.timescale_group):
             return
         if Options.disable_fake_notes and not self.is_scored:
             return
         if self.not_render:
             return
+        self.profile_draw()
+        point = self.sim_line_point
         draw_note(
             self.kind,
-            self.visual_lane,
+            point.lane,
             self.size,
-            self.visual_progress,
+            point.progress,
             self.direction,
             self.target_time,
         )
@@ -322,7 +367,7 @@ class WatchBaseNote(WatchArchetype):
     def _basic_visual_lane_at(self, t: float) -> float:
         if self.stage_ref.index <= 0:
             return self.lane
-        return get_stage_props(self.stage_ref.get(), t).pivot_lane + self.rel_lane
+        return self.stage_ref.get().pivot_lane_at(t) + self.rel_lane
 
     def visual_lane_at(self, t: float) -> float:
         if self.is_attached:
@@ -347,7 +392,7 @@ class WatchBaseNote(WatchArchetype):
     def _basic_y_offset_at(self, t: float, left_limit: bool = False) -> float:
         if self.stage_ref.index <= 0:
             return 0.0
-        return get_stage_props(self.stage_ref.get(), t, left_limit=left_limit).y_offset
+        return self.stage_ref.get().y_offset_at(t, left_limit=left_limit)
 
     def y_offset_at(self, t: float) -> float:
         if self.is_attached:
@@ -365,18 +410,33 @@ class WatchBaseNote(WatchArchetype):
     def _stage_pivot_lane_at(self, t: float) -> float:
         if self.stage_ref.index <= 0:
             return 0.0
-        return get_stage_props(self.stage_ref.get(), t).pivot_lane
+        return self.stage_ref.get().pivot_lane_at(t)
 
     def _stage_half_offset_at(self, t: float) -> bool:
         if self.stage_ref.index <= 0:
             return False
-        division = get_stage_props(self.stage_ref.get(), t).division.start
+        division = self.stage_ref.get().pivot_props_at(t).division.start
         return division.parity == DivisionParity.ODD and division.size % 2 == 1
 
     @property
     def visual_lane(self) -> float:
         return self.visual_lane_at(time())
 
+    def update_sim_line_point(self):
+        if self.in_sim_line:
+            publish_sim_line_point(self.index, self.visual_lane, self.visual_progress)
+
+    @property
+    def sim_line_point(self) -> SimLinePoint:
+        """The current visual lane and progress, reusing the values published this frame when there are any."""
+        result = +SimLinePoint
+        if self.in_sim_line and has_published_sim_line_point(self.index):
+            result @= published_sim_line_point(self.index)
+        else:
+            result.lane = self.visual_lane
+            result.progress = self.visual_progress
+        return result
+
     @property
     def _basic_visual_y_offset(self) -> float:
         if self.stage_ref.index > 0:
@@ -8,6 +8,7 @@ from sonolus.script.runtime import is_skip, time
 from sekai.lib import archetype_names
 from sekai.lib.particle import NoteParticleSet
 from sekai.lib.particle_manager import ParticleHandler, handle_critical_flick_lane_effect
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
 
 
 class ParticleEntry(Record):
@@ -16,7 +17,7 @@ class ParticleEntry(Record):
     chunk_id: float
 
 
-class ParticleManager(WatchArchetype):
+class ParticleManager(WatchArchetype, FrameProfiled):
     particles: NoteParticleSet = entity_memory()
     lane: float = entity_memory()
     size: float = entity_memory()
@@ -31,6 +32,7 @@ class ParticleManager(WatchArchetype):
         return self.target_time + 1
 
     def update_sequential(self):
+        self.profile_update(ProfileFamily.PARTICLES)
         if is_skip():
             ParticleHandler.critical_flick_lane_effect.clear()
             self.check = False
@@ -1,55 +1,96 @@
+from __future__ import annotations
+
 from sonolus.script.archetype import EntityRef, WatchArchetype, callback, entity_data, imported
-from sonolus.script.runtime import is_replay
+from sonolus.script.runtime import is_replay, time
 
 from sekai.debug import DISABLE_NOTES
 from sekai.lib import archetype_names
-from sekai.lib.sim_line import draw_sim_line
+from sekai.lib.profiler import FrameProfiled, ProfileFamily
+from sekai.lib.sim_line import SimLinePoint, draw_sim_line
 from sekai.lib.timescale import group_hide_notes, update_timescale_group
 from sekai.watch.note import WatchBaseNote
 
 
-class WatchSimLine(WatchArchetype):
+class WatchSimLine(WatchArchetype, FrameProfiled):
     name = archetype_names.SIM_LINE
 
     left_ref: EntityRef[WatchBaseNote] = imported(name="left")
     right_ref: EntityRef[WatchBaseNote] = imported(name="right")
+    # The next line of the same chord. A chain of lines is spawned and drawn as one by its first line.
+    next_ref: EntityRef[WatchSimLine] = imported(name="next")
 
     start_time: float = entity_data()
     end_time: float = entity_data()
+    is_chained: bool = entity_data()
 
     @callback(order=1)
     def preprocess(self):
         if DISABLE_NOTES:
             return
-        self.start_time = min(self.left.start_time, self.right.start_time)
-        if is_replay():
-            self.end_time = min(self.left.end_time, self.right.end_time, self.left.target_time)
-        else:
-            self.end_time = min(self.left.target_time, self.right.target_time)
+        self.left.in_sim_line = True
+        self.right.in_sim_line = True
+        if self.next_ref.index > 0:
+            self.next_ref.get().is_chained = True
+        self.start_time = 1e8
+        self.end_time = -1e8
+        index = self.index
+        while index > 0:
+            line = WatchSimLine.at(index)
+            self.start_time = min(self.start_time, line.left.start_time, line.right.start_time)
+            self.end_time = max(self.end_time, line.line_end_time())
+            index = line.next_ref.index
 
     def spawn_time(self) -> float:
-        if DISABLE_NOTES:
+        if DISABLE_NOTES or self.is_chained:
             return 1e8
         return self.start_time
 
     def despawn_time(self) -> float:
+        if self.is_chained:
+            return 1e8
         return self.end_time
 
+    def line_end_time(self) -> float:
+        if is_replay():
+            return min(self.left.end_time, self.right.end_time, self.left.target_time)
+        else:
+            return min(self.left.target_time, self.right.target_time)
+
     def update_sequential(self):
-        update_timescale_group(self.left.timescale_group)
-        update_timescale_group(self.right.timescale_group)
+        self.profile_update(ProfileFamily.SIM_LINES)
+        index = self.index
+        while index > 0:
+            line = WatchSimLine.at(index)
+            update_timescale_group(line.left.timescale_group)
+            update_timescale_group(line.right.timescale_group)
+            index = line.next_ref.index
 
     def update_parallel(self):
-        if group_hide_notes(self.left.timescale_group) or group_hide_notes(self.right.timescale_group):
-            return
-        draw_sim_line(
-            left_lane=self.left.visual_lane,
-            left_visual_progress=self.left.visual_progress,
-            left_target_time=self.left.target_time,
-            right_lane=self.right.visual_lane,
-            right_visual_progress=self.right.visual_progress,
-            right_target_time=self.right.target_time,
-        )
+        # Consecutive lines share a note, so its point carries over from one line to the next.
+        left_point = +SimLinePoint
+        left_point_index = -1
+        index = self.index
+        while index > 0:
+            line = WatchSimLine.at(index)
+            index = line.next_ref.index
+            if time() >= line.line_end_time():
+                continue
+            if group_hide_notes(line.left.timescale_group) or group_hide_notes(line.right.timescale_group):
+                continue
+            if left_point_index != line.left_ref.index:
+                left_point @= line.left.sim_line_point
+            right_point = line.right.sim_line_point
+            self.profile_draw()
+            draw_sim_line(
+                left_lane=left_point.lane,
+                left_visual_progress=left_point.progress,
+                left_target_time=line.left.target_time,
+                right_lane=right_point.lane,
+                right_visual_progress=right_point.progress,
+                right_target_time=line.right.target_time,
+            )
+            left_point @= right_point
+            left_point_index = line.right_ref.index
 
     @property
     def left(self) -> WatchBaseNote:
@@ -1,17 +1,25 @@
 from sonolus.script.archetype import WatchArchetype, callback, entity_memory
 from sonolus.script.runtime import is_replay, is_skip, time
 
+from sekai.debug import PROFILE_FRAMES, PROFILE_INPUT
 from sekai.lib import archetype_names
 from sekai.lib.custom_elements import LifeManager, ScoreIndicator
 from sekai.lib.events import reset_fever_bounds
 from sekai.lib.initialization import LastNote
 from sekai.lib.layout import refresh_layout
-from sekai.lib.options import Options
+from sekai.lib.profiler import (
+    FrameProfile,
+    FrameProfiled,
+    ProfileFamily,
+    begin_profile_frame,
+    draw_frame_profile,
+    draw_input_profile,
+)
 from sekai.lib.stage import draw_stage_and_accessories, init_stage_z_layers, play_lane_particle
 from sekai.lib.streams import Streams
 
 
-class WatchStaticStage(WatchArchetype):
+class WatchStaticStage(WatchArchetype, FrameProfiled):
     name = archetype_names.STATIC_STAGE
     dead_time: float = entity_memory()
     z_layer_stage_lane: float = entity_memory()
@@ -43,16 +51,15 @@ class WatchStaticStage(WatchArchetype):
     def update_sequential(self):
         refresh_layout()
         reset_fever_bounds()
-        LifeManager.life = Streams.life[self.index][time()] if is_replay() else LifeManager.life
-        if is_skip() and time() < ScoreIndicator.first:
-            if Options.custom_score == 2:
-                ScoreIndicator.percentage = 100
-            else:
-                ScoreIndicator.percentage = 0
-            ScoreIndicator.score = 0
-            ScoreIndicator.ap = False
+        if is_replay():
+            # Life is only recorded when it changes, so it holds its value between keys instead of interpolating.
+            LifeManager.life = Streams.life[self.index].get_previous_inclusive(time())
+        if PROFILE_FRAMES:
+            begin_profile_frame()
+        self.profile_update(ProfileFamily.STAGE)
 
     def update_parallel(self):
+        self.profile_draw()
         draw_stage_and_accessories(
             self.z_layer_stage_lane,
             self.z_layer_stage_cover,
@@ -79,6 +86,15 @@ class WatchStaticStage(WatchArchetype):
         )
         if LifeManager.life == 0 and self.dead_time != -2:
             self.dead_time = time()
+        if PROFILE_FRAMES:
+            # Replays show the counts recorded during play rather than those of the playback.
+            if is_replay():
+                draw_frame_profile(Streams.frame_profile.get_previous_inclusive(time()))
+            else:
+                draw_frame_profile(FrameProfile.last)
+        if PROFILE_INPUT and is_replay():
+            # Input is only assigned in play, so there is nothing to show outside of replays.
+            draw_input_profile(Streams.input_profile.get_previous_inclusive(time()))
 
 
 class WatchScheduledLaneEffect(WatchArchetype):
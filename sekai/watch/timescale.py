@@ -5,21 +5,23 @@ from sonolus.script.archetype import (
     StandardImport,
     WatchArchetype,
     callback,
+    entity_data,
     imported,
     shared_memory,
 )
 from sonolus.script.runtime import time
 
 from sekai.lib import archetype_names
+from sekai.lib.baseevent import BaseEvent
 from sekai.lib.timescale import (
     CompositeTime,
-    ScaledTimeToFirstTime,
-    TimeToLastChangeIndex,
-    TimeToScaledTime,
+    init_timescale_changes,
+    last_timescale_change_index_at,
+    time_to_scaled_time,
 )
 
 
-class WatchTimescaleChange(WatchArchetype):
+class WatchTimescaleChange(WatchArchetype, BaseEvent):
     name = archetype_names.TIMESCALE_CHANGE
 
     beat: StandardImport.BEAT
@@ -30,6 +32,11 @@ class WatchTimescaleChange(WatchArchetype):
     hide_notes: bool = imported(name="hideNotes")
     next_ref: EntityRef[WatchTimescaleChange] = imported(name="next")
 
+    time: float = entity_data()
+    scaled_time: CompositeTime = entity_data()
+    min_scaled_time: float = entity_data()
+    max_scaled_time: float = entity_data()
+
 
 class WatchTimescaleGroup(WatchArchetype):
     name = archetype_names.TIMESCALE_GROUP
@@ -42,11 +49,6 @@ class WatchTimescaleGroup(WatchArchetype):
     hide_notes: bool = shared_memory()
     last_updated: float = shared_memory()
 
-    time_to_scaled_time: TimeToScaledTime = shared_memory()
-    time_to_last_change_index: TimeToLastChangeIndex = shared_memory()
-    scaled_time_to_first_time: ScaledTimeToFirstTime = shared_memory()
-    scaled_time_to_first_time_2: ScaledTimeToFirstTime = shared_memory()
-
     def spawn_time(self) -> float:
         return -1e8
 
@@ -55,18 +57,15 @@ class WatchTimescaleGroup(WatchArchetype):
 
     @callback(order=-2)
     def preprocess(self):
-        self.time_to_scaled_time.init(self.first_ref.index)
-        self.time_to_last_change_index.init(self.first_ref.index)
-        self.scaled_time_to_first_time.init(self.first_ref.index)
-        self.scaled_time_to_first_time_2.init(self.first_ref.index)
+        init_timescale_changes(self.first_ref)
         self.last_updated = -1e8
 
     def update(self):
         if self.last_updated == time():
             return
         self.last_updated = time()
-        self.current_scaled_time = self.time_to_scaled_time.get(time())
-        self.last_change.index = self.time_to_last_change_index.get(time())
+        self.current_scaled_time = time_to_scaled_time(self.first_ref.index, time())
+        self.last_change.index = last_timescale_change_index_at(self.first_ref.index, time())
         if self.last_change.index > 0:
             self.hide_notes = self.last_change.get().hide_notes
         else: